@@ -0,0 +1,139 @@
+"""
+Fábrica compartilhada de clientes AWS
+
+Os clientes são criados sob demanda, reutilizados por (serviço, região,
+ajustes) e protegidos por lock, de modo que jobs em lote reaproveitam o
+pool de conexões TLS em vez de pagar um handshake por cliente. As
+credenciais vêm do SecretsManager; se ausentes, vale a cadeia padrão do boto3.
+
+Variáveis:
+    AWS_MAX_POOL_CONNECTIONS: conexões por cliente (padrão 50)
+    AWS_MAX_ATTEMPTS: tentativas no modo de retry adaptativo (padrão 5)
+    AWS_CASSETTE, AWS_CASSETTE_MODE, AWS_CASSETTE_LATENCY, AWS_CASSETTE_SERVICES:
+        gravação/reprodução das chamadas (ver config/cassette.py)
+    AWS_MODEL_CACHE, AWS_MODEL_CACHE_DIR: cache em disco dos modelos do
+        botocore (ver config/model_cache.py)
+
+boto3, botocore e config.cassette só são importados quando o primeiro
+cliente é criado, para que scripts que não chegam a usar a AWS (--help,
+validações) não paguem esse custo.
+"""
+
+import os
+import sys
+import threading
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from config.secrets import SecretsManager
+
+_clients: Dict[Tuple, Any] = {}
+_sessions: Dict[Tuple, Any] = {}
+_lock = threading.Lock()
+
+
+def client_config(**overrides):
+    """
+    Retorna o botocore Config padrão (pool, keepalive, retry adaptativo)
+
+    Args:
+        overrides: Parâmetros de botocore.config.Config que substituem o padrão
+    """
+    from botocore.config import Config
+
+    settings = {
+        'max_pool_connections': int(os.environ.get('AWS_MAX_POOL_CONNECTIONS', '50')),
+        'tcp_keepalive': True,
+        'retries': {'mode': 'adaptive', 'max_attempts': int(os.environ.get('AWS_MAX_ATTEMPTS', '5'))},
+        'connect_timeout': 5,
+        'read_timeout': 60
+    }
+    settings.update(overrides)
+    return Config(**settings)
+
+
+def _session(access_key: Optional[str], secret_key: Optional[str]):
+    key = (access_key, secret_key)
+    session = _sessions.get(key)
+    if session is None:
+        import boto3
+
+        from config.model_cache import botocore_session
+
+        session = boto3.session.Session(aws_access_key_id=access_key, aws_secret_access_key=secret_key,
+                                        botocore_session=botocore_session())
+        _sessions[key] = session
+    return session
+
+
+def _active_cassette():
+    if not os.environ.get('AWS_CASSETTE'):
+        return None
+    from config.cassette import active_cassette
+
+    return active_cassette()
+
+
+def get_client(service: str, region: Optional[str] = None, **config_overrides):
+    """
+    Retorna o cliente compartilhado do serviço, criando-o na primeira chamada
+
+    Args:
+        service: Nome do serviço boto3 ('s3', 'bedrock-runtime', 'iam'...)
+        region: Região; padrão é a do SecretsManager
+        config_overrides: Ajustes de botocore Config (ex.: read_timeout=2)
+
+    Returns:
+        Cliente boto3 thread-safe para uso concorrente
+    """
+    aws = SecretsManager.snapshot().aws
+    region = region or aws.region
+    cassette = _active_cassette()
+    access_key, secret_key = aws.access_key, aws.secret_key
+    if cassette is not None and cassette.mode == 'replay' and not (access_key and secret_key):
+        # Em replay nada sai para a rede, mas o botocore ainda assina as requisições
+        access_key, secret_key = 'CASSETTEREPLAY', 'cassette-replay'
+    key = (service, region, access_key, secret_key, repr(sorted(config_overrides.items())))
+
+    client = _clients.get(key)
+    if client is not None:
+        return client
+
+    with _lock:
+        client = _clients.get(key)
+        if client is None:
+            session = _session(access_key, secret_key)
+            client = session.client(service, region_name=region, config=client_config(**config_overrides))
+            if cassette is not None:
+                cassette.attach(client)
+            _clients[key] = client
+    return client
+
+
+def preload(services: Iterable[str], region: Optional[str] = None) -> threading.Thread:
+    """
+    Cria em segundo plano os clientes dos serviços informados (e só deles)
+
+    O carregamento dos modelos do botocore acontece enquanto o chamador
+    prepara o trabalho; quem pedir o cliente depois o recebe pronto, ou
+    aguarda no lock se a criação ainda estiver em andamento.
+
+    Returns:
+        A thread (daemon) do pré-carregamento
+    """
+    def run() -> None:
+        for service in services:
+            try:
+                get_client(service, region)
+            except Exception as e:
+                print(f"⚠️ Pré-carregamento de {service} falhou: {str(e)}", file=sys.stderr)
+
+    thread = threading.Thread(target=run, name='aws-preload', daemon=True)
+    thread.start()
+    return thread
+
+
+def reset_clients() -> None:
+    """Descarta os clientes em cache (ex.: após rotação de credenciais)"""
+    with _lock:
+        _clients.clear()
+        _sessions.clear()
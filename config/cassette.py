@@ -0,0 +1,246 @@
+"""
+Gravação e reprodução (cassetes) de chamadas AWS via eventos do botocore
+
+Modo `record`: o handler de `before-send` envia a requisição pela sessão
+HTTP do próprio cliente, lê a resposta inteira, grava o par
+requisição/resposta e devolve ao botocore uma cópia em memória. Modo
+`replay`: a mesma resposta é servida sem rede, com latência nula, a
+gravada ou uma sintética. Como a resposta passa pelo parser normal do
+botocore, erros (ThrottlingException, NoSuchKey...) e streams de eventos
+do Bedrock são reproduzidos fielmente.
+
+As cassetes são JSONL (gzip se o nome terminar em .gz), uma interação por
+linha. Cabeçalhos de requisição (assinatura, credenciais) não são
+gravados; o corpo da requisição entra apenas como hash.
+
+Ativação pelas variáveis lidas em get_client():
+    AWS_CASSETTE: caminho do arquivo de cassete
+    AWS_CASSETTE_MODE: record | replay (padrão replay)
+    AWS_CASSETTE_LATENCY: none | recorded | <ms fixos> (padrão none)
+    AWS_CASSETTE_SERVICES: serviços gravados/reproduzidos, separados por
+        vírgula (padrão DEFAULT_SERVICES; '*' para todos)
+
+Por padrão só S3, Bedrock e IAM passam pela cassete: respostas do Secrets
+Manager, SSM e STS trazem segredos e credenciais em texto puro e nunca são
+gravadas, a menos que pedidas explicitamente.
+"""
+
+import atexit
+import base64
+import gzip
+import hashlib
+import io
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Union
+
+DROPPED_RESPONSE_HEADERS = {
+    'date', 'server', 'connection', 'keep-alive', 'x-amz-id-2', 'x-amz-request-id',
+    'x-amzn-requestid', 'x-amz-apigw-id', 'x-amz-cf-id', 'x-amz-cf-pop', 'via'
+}
+
+# Serviços da cassete de AWS_CASSETTE quando AWS_CASSETTE_SERVICES não é definida
+DEFAULT_SERVICES = ('s3', 'bedrock-runtime', 'bedrock', 'iam')
+
+Latency = Union[None, str, float, Callable[[Dict[str, Any]], float]]
+
+
+class CassetteMiss(Exception):
+    """Nenhuma interação gravada corresponde à requisição em modo replay"""
+
+
+class _BufferedRaw(io.BytesIO):
+    """Corpo em memória com a interface de urllib3.HTTPResponse usada pelo botocore"""
+
+    def stream(self, amt: int = 1024, decode_content: Optional[bool] = None):
+        while True:
+            chunk = self.read(amt)
+            if not chunk:
+                return
+            yield chunk
+
+
+def _body_hash(body: Any) -> str:
+    if body is None:
+        return 'empty'
+    if isinstance(body, str):
+        body = body.encode('utf-8')
+    if isinstance(body, (bytes, bytearray)):
+        return hashlib.sha256(body).hexdigest()[:32]
+    return 'stream'
+
+
+def _fingerprint(request) -> str:
+    return f"{request.method} {request.url} {_body_hash(request.body)}"
+
+
+class Cassette:
+    """
+    Grava ou reproduz as interações HTTP dos clientes anexados
+
+    Uso:
+        cassette = Cassette('cassettes/final-system.jsonl.gz', mode='record')
+        cassette.attach(get_client('s3'))
+        ...
+        cassette.save()
+
+    Em replay, cada requisição consome a próxima interação ainda não usada
+    com a mesma impressão digital (método, URL, hash do corpo); se não
+    houver, a próxima da mesma operação na ordem gravada. Isso cobre
+    chaves com uuid e timestamps, que mudam a cada execução.
+    """
+
+    def __init__(self, path: str, mode: str = 'replay', latency: Latency = None,
+                 services: Optional[List[str]] = None):
+        if mode not in ('record', 'replay'):
+            raise ValueError(f"Modo de cassete inválido: {mode!r}")
+        self.path = path
+        self.mode = mode
+        self.latency = latency
+        self.services = set(services) if services else None
+        self.interactions: List[Dict[str, Any]] = []
+        self.stats = {'recorded': 0, 'replayed': 0, 'exact': 0, 'sequence': 0}
+        self._by_fingerprint: Dict[str, Deque[int]] = defaultdict(deque)
+        self._by_operation: Dict[str, Deque[int]] = defaultdict(deque)
+        self._used: set = set()
+        self._lock = threading.Lock()
+        if mode == 'replay':
+            self._load()
+
+    def _open(self, mode: str):
+        if self.path.endswith('.gz'):
+            return gzip.open(self.path, mode + 't', encoding='utf-8')
+        return open(self.path, mode, encoding='utf-8')
+
+    def _load(self) -> None:
+        with self._open('r') as f:
+            for line in f:
+                if line.strip():
+                    self.interactions.append(json.loads(line))
+        for index, interaction in enumerate(self.interactions):
+            self._by_fingerprint[interaction['fingerprint']].append(index)
+            self._by_operation[interaction['operation']].append(index)
+
+    def save(self) -> None:
+        """Grava as interações capturadas (modo record)"""
+        if self.mode != 'record':
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            interactions = list(self.interactions)
+        with self._open('w') as f:
+            for interaction in interactions:
+                f.write(json.dumps(interaction, ensure_ascii=False, separators=(',', ':')) + '\n')
+
+    def attach(self, client) -> None:
+        """Registra o handler de before-send nos eventos do cliente"""
+        service = client.meta.service_model.service_id.hyphenize()
+        # Aceita o nome do cliente ('secretsmanager') ou o service id ('secrets-manager')
+        if self.services is not None and not {service, client.meta.service_model.service_name} & self.services:
+            return
+        http_session = client._endpoint.http_session
+
+        def handler(request, **kwargs):
+            operation = f"{service}.{kwargs['event_name'].rsplit('.', 1)[-1]}"
+            if self.mode == 'record':
+                return self._record(http_session, operation, request)
+            return self._replay(operation, request)
+
+        client.meta.events.register(f"before-send.{service}", handler, unique_id=f"cassette-{id(self)}")
+
+    def _record(self, http_session, operation: str, request):
+        from botocore.awsrequest import AWSResponse
+
+        started = time.perf_counter()
+        response = http_session.send(request)
+        content = response.content
+        elapsed = time.perf_counter() - started
+
+        interaction: Dict[str, Any] = {
+            'operation': operation,
+            'fingerprint': _fingerprint(request),
+            'status': response.status_code,
+            'headers': {k.lower(): v for k, v in response.headers.items() if k.lower() not in DROPPED_RESPONSE_HEADERS},
+            'elapsed_ms': round(elapsed * 1000, 1)
+        }
+        try:
+            interaction['body'] = content.decode('utf-8')
+        except UnicodeDecodeError:
+            interaction['body_b64'] = base64.b64encode(content).decode('ascii')
+        with self._lock:
+            self.interactions.append(interaction)
+            self.stats['recorded'] += 1
+        return AWSResponse(response.url, response.status_code, response.headers, _BufferedRaw(content))
+
+    def _replay(self, operation: str, request):
+        from botocore.awsrequest import AWSResponse
+
+        with self._lock:
+            index = self._take(self._by_fingerprint.get(_fingerprint(request)))
+            kind = 'exact'
+            if index is None:
+                index = self._take(self._by_operation.get(operation))
+                kind = 'sequence'
+            if index is None:
+                raise CassetteMiss(f"Sem interação gravada para {operation} ({request.method} {request.url})")
+            self.stats['replayed'] += 1
+            self.stats[kind] += 1
+        interaction = self.interactions[index]
+
+        delay = self._delay(interaction)
+        if delay > 0:
+            time.sleep(delay)
+        if 'body_b64' in interaction:
+            content = base64.b64decode(interaction['body_b64'])
+        else:
+            content = interaction['body'].encode('utf-8')
+        headers = dict(interaction['headers'])
+        if 'content-length' in headers:
+            headers['content-length'] = str(len(content))
+        return AWSResponse(request.url, interaction['status'], headers, _BufferedRaw(content))
+
+    def _take(self, candidates: Optional[Deque[int]]) -> Optional[int]:
+        while candidates:
+            index = candidates.popleft()
+            if index not in self._used:
+                self._used.add(index)
+                return index
+        return None
+
+    def _delay(self, interaction: Dict[str, Any]) -> float:
+        if self.latency in (None, 'none'):
+            return 0.0
+        if self.latency == 'recorded':
+            return interaction.get('elapsed_ms', 0.0) / 1000
+        if callable(self.latency):
+            return self.latency(interaction)
+        return float(self.latency) / 1000
+
+
+_active: Optional[Cassette] = None
+_active_lock = threading.Lock()
+
+
+def active_cassette() -> Optional[Cassette]:
+    """Cassete configurada por AWS_CASSETTE (criada uma vez por processo), ou None"""
+    global _active
+    path = os.environ.get('AWS_CASSETTE')
+    if not path:
+        return None
+    with _active_lock:
+        if _active is None or _active.path != path:
+            mode = os.environ.get('AWS_CASSETTE_MODE', 'replay')
+            names = os.environ.get('AWS_CASSETTE_SERVICES', '').strip()
+            if names == '*':
+                services = None
+            else:
+                services = [name.strip() for name in names.split(',') if name.strip()] or list(DEFAULT_SERVICES)
+            _active = Cassette(path, mode=mode, latency=os.environ.get('AWS_CASSETTE_LATENCY'), services=services)
+            if mode == 'record':
+                atexit.register(_active.save)
+        return _active
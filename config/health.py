@@ -0,0 +1,172 @@
+"""
+Verificação ativa de saúde das dependências externas
+
+Cada dependência (Aurora, S3, Bedrock, Cognito) é sondada em paralelo com
+timeout próprio, de modo que a verificação completa dura o tempo da sonda
+mais lenta. O resultado fica em cache por alguns segundos para que polls
+frequentes do load balancer não cheguem à AWS.
+"""
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from config.aws_clients import get_client
+from config.secrets import ConfigSnapshot, SecretsManager
+
+Probe = Callable[[ConfigSnapshot, float], Awaitable[Optional[str]]]
+
+
+class ProbeSkipped(Exception):
+    """Sinaliza que a sonda não se aplica (ex.: configuração ausente)"""
+
+
+def _boto_client(service: str, timeout: float):
+    return get_client(
+        service,
+        connect_timeout=timeout,
+        read_timeout=timeout,
+        retries={'mode': 'standard', 'total_max_attempts': 1}
+    )
+
+
+def _aws_call(service: str, timeout: float, operation: str, **kwargs) -> Awaitable[Any]:
+    """
+    Cria o cliente e executa a operação em uma thread
+
+    Na primeira execução a criação do cliente (carga dos modelos do botocore)
+    é a parte mais cara da sonda; feita no event loop, ela serializaria as
+    sondas AWS e distorceria a latência medida.
+    """
+    def call():
+        return getattr(_boto_client(service, timeout), operation)(**kwargs)
+
+    return asyncio.to_thread(call)
+
+
+async def probe_aurora(snapshot: ConfigSnapshot, timeout: float) -> Optional[str]:
+    """Executa SELECT 1 no Aurora/PostgreSQL via asyncpg"""
+    if not snapshot.database.database_url:
+        raise ProbeSkipped('DATABASE_URL não configurado')
+    import asyncpg
+
+    connection = await asyncpg.connect(dsn=snapshot.database.database_url, timeout=timeout)
+    try:
+        await connection.fetchval('SELECT 1')
+    finally:
+        await connection.close()
+    return None
+
+
+async def probe_s3(snapshot: ConfigSnapshot, timeout: float) -> Optional[str]:
+    """Executa head_bucket no bucket configurado"""
+    if not snapshot.aws.s3_bucket:
+        raise ProbeSkipped('S3_BUCKET_NAME não configurado')
+    await _aws_call('s3', timeout, 'head_bucket', Bucket=snapshot.aws.s3_bucket)
+    return snapshot.aws.s3_bucket
+
+
+async def probe_bedrock(snapshot: ConfigSnapshot, timeout: float) -> Optional[str]:
+    """Lista os modelos de fundação disponíveis (não consome tokens)"""
+    response = await _aws_call('bedrock', timeout, 'list_foundation_models', byOutputModality='TEXT')
+    return f"{len(response.get('modelSummaries', []))} modelos"
+
+
+async def probe_cognito(snapshot: ConfigSnapshot, timeout: float) -> Optional[str]:
+    """Executa describe_user_pool no User Pool configurado"""
+    if not snapshot.aws.cognito_user_pool_id:
+        raise ProbeSkipped('COGNITO_USER_POOL_ID não configurado')
+    await _aws_call('cognito-idp', timeout, 'describe_user_pool', UserPoolId=snapshot.aws.cognito_user_pool_id)
+    return snapshot.aws.cognito_user_pool_id
+
+
+DEFAULT_PROBES: Dict[str, Probe] = {
+    'aurora': probe_aurora,
+    's3': probe_s3,
+    'bedrock': probe_bedrock,
+    'cognito': probe_cognito
+}
+
+
+async def _run_probe(probe: Probe, snapshot: ConfigSnapshot, timeout: float) -> Dict[str, Any]:
+    started = time.perf_counter()
+    result: Dict[str, Any] = {}
+    try:
+        detail = await asyncio.wait_for(probe(snapshot, timeout), timeout)
+        result['status'] = 'ok'
+        if detail:
+            result['detail'] = detail
+    except ProbeSkipped as e:
+        result['status'] = 'skipped'
+        result['detail'] = str(e)
+    except asyncio.TimeoutError:
+        result['status'] = 'timeout'
+        result['error'] = f"sem resposta em {timeout:.1f}s"
+    except Exception as e:
+        result['status'] = 'error'
+        result['error'] = str(e)
+    result['latency_ms'] = round((time.perf_counter() - started) * 1000, 1)
+    return result
+
+
+class HealthProber:
+    """
+    Executa as sondas em paralelo e guarda o resultado por `ttl` segundos
+
+    Chamadas concorrentes durante uma verificação aguardam a mesma execução.
+    """
+
+    def __init__(self, probes: Optional[Dict[str, Probe]] = None, timeout: float = 2.0, ttl: float = 10.0):
+        self.probes = dict(DEFAULT_PROBES if probes is None else probes)
+        self.timeout = timeout
+        self.ttl = ttl
+        self._cached: Optional[Dict[str, Any]] = None
+        self._cached_at = 0.0
+        self._lock: Optional[asyncio.Lock] = None
+        self._lock_loop = None
+
+    def _get_lock(self) -> asyncio.Lock:
+        loop = asyncio.get_running_loop()
+        if self._lock is None or self._lock_loop is not loop:
+            self._lock = asyncio.Lock()
+            self._lock_loop = loop
+        return self._lock
+
+    async def check(self, force: bool = False) -> Dict[str, Any]:
+        """
+        Retorna o status de cada dependência, usando o cache quando válido
+
+        Returns:
+            Dict com uma entrada por sonda (status, latency_ms, detail/error),
+            'overall_status', 'total_ms', 'checked_at' e 'cached'
+        """
+        if not force and self._is_fresh():
+            return {**self._cached, 'cached': True}
+
+        async with self._get_lock():
+            if not force and self._is_fresh():
+                return {**self._cached, 'cached': True}
+
+            snapshot = SecretsManager.snapshot()
+            started = time.perf_counter()
+            names = list(self.probes)
+            results = await asyncio.gather(*(
+                _run_probe(self.probes[name], snapshot, self.timeout) for name in names
+            ))
+
+            report: Dict[str, Any] = dict(zip(names, results))
+            failed = [name for name, r in report.items() if r['status'] in ('error', 'timeout')]
+            report['overall_status'] = 'healthy' if not failed else 'degraded'
+            report['failed_probes'] = failed
+            report['total_ms'] = round((time.perf_counter() - started) * 1000, 1)
+            report['checked_at'] = time.time()
+
+            self._cached = report
+            self._cached_at = time.monotonic()
+            return {**report, 'cached': False}
+
+    def _is_fresh(self) -> bool:
+        return self._cached is not None and time.monotonic() - self._cached_at < self.ttl
+
+
+default_prober = HealthProber()
@@ -0,0 +1,127 @@
+"""
+Cache em disco dos modelos de serviço do botocore
+
+Na criação do primeiro cliente de cada serviço o botocore descompacta e
+interpreta o JSON do modelo (service-2.json.gz do S3 tem vários MB), além
+de endpoints.json e _retry.json. Este módulo troca o leitor de arquivos do
+botocore por um que guarda o resultado já interpretado em formato
+`marshal`, cuja leitura é bem mais rápida que gzip + json. A chave inclui a
+versão do botocore e o caminho, tamanho e mtime do arquivo original, então
+uma atualização do botocore invalida o cache sozinha.
+
+Um único Loader é compartilhado por todas as sessões do processo, de modo
+que cada modelo é lido no máximo uma vez por processo.
+
+Só a API pública do botocore é usada (JSONFileLoader.load_file e o
+parâmetro file_loader do Loader); se o Loader não aceitar o leitor, vale o
+Loader padrão, sem cache em disco.
+
+Variáveis:
+    AWS_MODEL_CACHE: '0' desativa o cache em disco
+    AWS_MODEL_CACHE_DIR: diretório do cache (padrão ~/.cache/iaprender/botocore)
+"""
+
+import hashlib
+import marshal
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Optional
+
+from botocore import __version__ as BOTOCORE_VERSION
+from botocore.loaders import JSONFileLoader, Loader
+
+DEFAULT_CACHE_DIR = os.path.join('~', '.cache', 'iaprender', 'botocore')
+# Extensões dos modelos, na ordem em que JSONFileLoader.load_file as procura
+MODEL_EXTENSIONS = ('.json', '.json.gz')
+
+_loader: Optional[Loader] = None
+_loader_lock = threading.Lock()
+
+
+def _plain(value: Any) -> Any:
+    """OrderedDict → dict (marshal só aceita os tipos básicos)"""
+    if isinstance(value, OrderedDict):
+        return {key: _plain(item) for key, item in value.items()}
+    if isinstance(value, dict):
+        return {key: _plain(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_plain(item) for item in value]
+    return value
+
+
+class CachedJSONFileLoader(JSONFileLoader):
+    """JSONFileLoader que guarda os modelos interpretados em disco (marshal)"""
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = os.path.join(os.path.expanduser(cache_dir), BOTOCORE_VERSION)
+        self.stats = {'hits': 0, 'misses': 0}
+
+    def _cache_path(self, full_path: str, stat: os.stat_result) -> str:
+        digest = hashlib.sha1(f"{full_path}|{stat.st_size}|{stat.st_mtime_ns}".encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, f"{digest}.marshal")
+
+    def _source(self, file_path):
+        """(caminho, stat) do arquivo que load_file vai ler, ou None"""
+        for ext in MODEL_EXTENSIONS:
+            try:
+                return file_path + ext, os.stat(file_path + ext)
+            except OSError:
+                continue
+        return None
+
+    def load_file(self, file_path):
+        source = self._source(file_path)
+        if source is None:
+            return super().load_file(file_path)
+        cache_path = self._cache_path(*source)
+        try:
+            # marshal.loads sobre os bytes é bem mais rápido que marshal.load(arquivo)
+            with open(cache_path, 'rb') as f:
+                data = marshal.loads(f.read())
+            self.stats['hits'] += 1
+            return data
+        except (OSError, EOFError, ValueError, TypeError):
+            pass
+
+        data = super().load_file(file_path)
+        if data is None:
+            return None
+        self.stats['misses'] += 1
+        data = _plain(data)
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            temp_path = f"{cache_path}.{os.getpid()}.tmp"
+            with open(temp_path, 'wb') as f:
+                f.write(marshal.dumps(data))
+            os.replace(temp_path, cache_path)
+        except OSError:
+            pass
+        return data
+
+
+def shared_loader() -> Loader:
+    """Loader do botocore compartilhado pelo processo (com cache em disco, salvo AWS_MODEL_CACHE=0)"""
+    global _loader
+    if _loader is None:
+        with _loader_lock:
+            if _loader is None:
+                extra = os.environ.get('AWS_DATA_PATH')
+                paths = [os.path.expanduser(os.path.expandvars(p)) for p in extra.split(os.pathsep)] if extra else []
+                file_loader = None
+                if os.environ.get('AWS_MODEL_CACHE', '1') != '0':
+                    file_loader = CachedJSONFileLoader(os.environ.get('AWS_MODEL_CACHE_DIR', DEFAULT_CACHE_DIR))
+                try:
+                    _loader = Loader(extra_search_paths=paths, file_loader=file_loader)
+                except TypeError:
+                    _loader = Loader(extra_search_paths=paths)
+    return _loader
+
+
+def botocore_session():
+    """Sessão botocore nova que usa o Loader compartilhado"""
+    from botocore.session import get_session
+
+    session = get_session()
+    session.register_component('data_loader', shared_loader())
+    return session
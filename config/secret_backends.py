@@ -0,0 +1,283 @@
+"""
+Backends de segredos para o SecretsManager
+
+A cadeia padrão consulta, em ordem de precedência: variáveis de ambiente,
+arquivo .env, AWS Secrets Manager e SSM Parameter Store. Os valores ficam
+em cache em memória com TTL e podem ser renovados por uma thread em segundo
+plano antes de expirarem, de modo que leituras nunca esperam pela rede.
+
+Os clientes AWS dos backends vêm de config.aws_clients.get_client, com as
+credenciais do snapshot já carregado (variáveis de ambiente).
+"""
+
+import json
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from types import MappingProxyType
+from typing import Callable, Dict, Iterable, List, Mapping, Optional, Sequence
+
+
+class SecretBackend(ABC):
+    """
+    Origem de segredos; fetch() retorna todas as chaves conhecidas pelo backend
+
+    Falhas parciais (alguns segredos lidos, outros não) ficam em `failed`
+    (nome → erro) e são reportadas pela BackendChain sem descartar o resto.
+    """
+
+    name = 'base'
+    failed: Mapping[str, str] = MappingProxyType({})
+
+    @abstractmethod
+    def fetch(self) -> Dict[str, str]:
+        """Todas as chaves conhecidas pelo backend"""
+
+
+class EnvBackend(SecretBackend):
+    """Variáveis de ambiente do processo"""
+
+    name = 'env'
+
+    def __init__(self, environ: Optional[Mapping[str, str]] = None):
+        self.environ = os.environ if environ is None else environ
+
+    def fetch(self) -> Dict[str, str]:
+        return dict(self.environ)
+
+
+class DotEnvBackend(SecretBackend):
+    """Arquivo .env lido com python-dotenv (ausência do arquivo não é erro)"""
+
+    name = 'dotenv'
+
+    def __init__(self, path: str = '.env'):
+        self.path = path
+
+    def fetch(self) -> Dict[str, str]:
+        if not os.path.isfile(self.path):
+            return {}
+        from dotenv import dotenv_values
+
+        return {key: value for key, value in dotenv_values(self.path).items() if value is not None}
+
+
+class AwsSecretsManagerBackend(SecretBackend):
+    """
+    Segredos do AWS Secrets Manager buscados em lote (BatchGetSecretValue)
+
+    Segredos com SecretString em JSON objeto são expandidos chave a chave;
+    os demais são expostos sob o último segmento do nome do segredo.
+    """
+
+    name = 'secretsmanager'
+    BATCH_SIZE = 20
+
+    def __init__(self, secret_ids: Sequence[str], client=None, region: Optional[str] = None):
+        self.secret_ids = list(secret_ids)
+        self.region = region
+        self._client = client
+
+    @property
+    def client(self):
+        if self._client is None:
+            from config.aws_clients import get_client
+
+            self._client = get_client('secretsmanager', self.region)
+        return self._client
+
+    def fetch(self) -> Dict[str, str]:
+        values: Dict[str, str] = {}
+        failed: Dict[str, str] = {}
+        for start in range(0, len(self.secret_ids), self.BATCH_SIZE):
+            batch = self.secret_ids[start:start + self.BATCH_SIZE]
+            kwargs = {'SecretIdList': batch}
+            while True:
+                response = self.client.batch_get_secret_value(**kwargs)
+                for secret in response.get('SecretValues', []):
+                    values.update(_expand_secret(secret['Name'], secret.get('SecretString')))
+                for error in response.get('Errors', []):
+                    failed[str(error.get('SecretId'))] = str(error.get('ErrorCode') or error.get('Message'))
+                next_token = response.get('NextToken')
+                if not next_token:
+                    break
+                kwargs['NextToken'] = next_token
+        self.failed = failed
+        return values
+
+
+class SsmParameterBackend(SecretBackend):
+    """Parâmetros do SSM Parameter Store sob um caminho (GetParametersByPath paginado)"""
+
+    name = 'ssm'
+
+    def __init__(self, path: str, client=None, region: Optional[str] = None):
+        self.path = path.rstrip('/') or '/'
+        self.region = region
+        self._client = client
+
+    @property
+    def client(self):
+        if self._client is None:
+            from config.aws_clients import get_client
+
+            self._client = get_client('ssm', self.region)
+        return self._client
+
+    def fetch(self) -> Dict[str, str]:
+        values: Dict[str, str] = {}
+        paginator = self.client.get_paginator('get_parameters_by_path')
+        pages = paginator.paginate(Path=self.path, Recursive=True, WithDecryption=True)
+        for page in pages:
+            for parameter in page.get('Parameters', []):
+                values[parameter['Name'].rsplit('/', 1)[-1]] = parameter['Value']
+        return values
+
+
+class StaticBackend(SecretBackend):
+    """Backend local em memória, usado em testes e como stub dos backends AWS"""
+
+    name = 'static'
+
+    def __init__(self, values: Optional[Mapping[str, str]] = None, latency: float = 0.0):
+        self.values = dict(values or {})
+        self.latency = latency
+        self.fetch_count = 0
+
+    def fetch(self) -> Dict[str, str]:
+        self.fetch_count += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return dict(self.values)
+
+
+def _expand_secret(name: str, secret_string: Optional[str]) -> Dict[str, str]:
+    if secret_string is None:
+        return {}
+    try:
+        parsed = json.loads(secret_string)
+    except ValueError:
+        parsed = None
+    if isinstance(parsed, dict):
+        return {str(key): str(value) for key, value in parsed.items()}
+    return {name.rsplit('/', 1)[-1]: secret_string}
+
+
+class BackendChain:
+    """
+    Cadeia de backends com cache TTL e renovação em segundo plano
+
+    O primeiro backend da lista tem maior precedência. Se um backend falhar
+    durante uma renovação, os últimos valores obtidos dele são mantidos.
+    """
+
+    def __init__(self, backends: Iterable[SecretBackend], ttl: float = 300.0, refresh_ahead: float = 0.2):
+        self.backends: List[SecretBackend] = list(backends)
+        self.ttl = ttl
+        self.refresh_ahead = refresh_ahead
+        self.errors: Dict[str, str] = {}
+        self._per_backend: Dict[int, Dict[str, str]] = {}
+        self._values: Optional[Mapping[str, str]] = None
+        self._expires_at = 0.0
+        self._lock = threading.Lock()
+        self._listeners: List[Callable[[Mapping[str, str]], None]] = []
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def values(self) -> Mapping[str, str]:
+        """
+        Retorna os valores combinados de todos os backends
+
+        Só bloqueia na primeira carga ou quando o cache expirou sem que a
+        thread de renovação esteja ativa.
+        """
+        current = self._values
+        if current is None or (self._thread is None and time.monotonic() >= self._expires_at):
+            current = self.refresh()
+        return current
+
+    def refresh(self) -> Mapping[str, str]:
+        """Busca todos os backends agora e notifica os ouvintes se algo mudou"""
+        with self._lock:
+            for index, backend in enumerate(self.backends):
+                try:
+                    self._per_backend[index] = backend.fetch()
+                    if backend.failed:
+                        failed = ', '.join(f"{name} ({code})" for name, code in sorted(backend.failed.items()))
+                        self.errors[backend.name] = f"Falha ao buscar segredos: {failed}"
+                    else:
+                        self.errors.pop(backend.name, None)
+                except Exception as e:
+                    self.errors[backend.name] = str(e)
+                    self._per_backend.setdefault(index, {})
+
+            merged: Dict[str, str] = {}
+            for index in reversed(range(len(self.backends))):
+                merged.update(self._per_backend[index])
+
+            previous = self._values
+            self._values = MappingProxyType(merged)
+            self._expires_at = time.monotonic() + self.ttl
+            current = self._values
+            listeners = list(self._listeners) if previous is not None and dict(previous) != merged else []
+
+        for listener in listeners:
+            listener(current)
+        return current
+
+    def subscribe(self, listener: Callable[[Mapping[str, str]], None]) -> None:
+        """Registra um callback chamado com os novos valores após cada mudança"""
+        self._listeners.append(listener)
+
+    def start_refresher(self) -> None:
+        """Inicia a thread daemon que renova o cache antes de expirar"""
+        if self._thread is not None:
+            return
+        if self._values is None:
+            self.refresh()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='secrets-refresher', daemon=True)
+        self._thread.start()
+
+    def stop_refresher(self) -> None:
+        thread = self._thread
+        if thread is None:
+            return
+        self._stop.set()
+        thread.join()
+        self._thread = None
+
+    def _run(self) -> None:
+        interval = max(self.ttl * (1 - self.refresh_ahead), 0.01)
+        while not self._stop.wait(interval):
+            self.refresh()
+
+
+def default_chain(environ: Optional[Mapping[str, str]] = None) -> BackendChain:
+    """
+    Monta a cadeia padrão a partir das variáveis de bootstrap
+
+    Variáveis:
+        SECRETS_DOTENV_PATH: caminho do arquivo .env (padrão '.env')
+        AWS_SECRETS_IDS: IDs do Secrets Manager separados por vírgula
+        SSM_PARAMETER_PATH: caminho base no Parameter Store
+        SECRETS_CACHE_TTL: TTL do cache em segundos (padrão 300)
+    """
+    env = os.environ if environ is None else environ
+    region = env.get('AWS_REGION', 'us-east-1')
+
+    backends: List[SecretBackend] = [
+        EnvBackend(env),
+        DotEnvBackend(env.get('SECRETS_DOTENV_PATH', '.env'))
+    ]
+
+    secret_ids = [s.strip() for s in env.get('AWS_SECRETS_IDS', '').split(',') if s.strip()]
+    if secret_ids:
+        backends.append(AwsSecretsManagerBackend(secret_ids, region=region))
+
+    ssm_path = env.get('SSM_PARAMETER_PATH')
+    if ssm_path:
+        backends.append(SsmParameterBackend(ssm_path, region=region))
+
+    return BackendChain(backends, ttl=float(env.get('SECRETS_CACHE_TTL', '300')))
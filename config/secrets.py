@@ -1,175 +1,519 @@
 import os
-from typing import Dict, Optional
+import re
+import signal
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Callable, Dict, Mapping, Optional
+
+
+@dataclass(frozen=True, slots=True)
+class AwsConfig:
+    """Credenciais AWS e configuração do Cognito"""
+    region: str
+    cognito_user_pool_id: Optional[str]
+    cognito_client_id: Optional[str]
+    cognito_client_secret: Optional[str]
+    cognito_domain: Optional[str]
+    cognito_redirect_uri: Optional[str]
+    access_key: Optional[str]
+    secret_key: Optional[str]
+    s3_bucket: Optional[str]
+
+
+@dataclass(frozen=True, slots=True)
+class DatabaseConfig:
+    """Configuração de conexão do PostgreSQL"""
+    database_url: Optional[str]
+    pghost: Optional[str]
+    pgport: int
+    pguser: Optional[str]
+    pgpassword: Optional[str]
+    pgdatabase: Optional[str]
+
+
+@dataclass(frozen=True, slots=True)
+class AiApiKeys:
+    """Chaves de API dos serviços de IA"""
+    openai_api_key: Optional[str]
+    anthropic_api_key: Optional[str]
+    perplexity_api_key: Optional[str]
+    litellm_api_key: Optional[str]
+
+
+@dataclass(frozen=True, slots=True)
+class JwtConfig:
+    """Configuração JWT; jwt_expiration em segundos"""
+    jwt_secret: str
+    jwt_algorithm: str
+    jwt_expiration: int
+
+
+@dataclass(frozen=True, slots=True)
+class EmailConfig:
+    """Configuração dos serviços de email"""
+    sendgrid_api_key: Optional[str]
+    smtp_host: Optional[str]
+    smtp_port: int
+    smtp_user: Optional[str]
+    smtp_password: Optional[str]
+
+
+@dataclass(frozen=True, slots=True)
+class ApplicationConfig:
+    """Configurações gerais da aplicação"""
+    environment: str
+    port: int
+    frontend_url: str
+    backend_url: str
+    replit_domain: str
+    debug_mode: bool
+
+
+@dataclass(frozen=True, slots=True)
+class ConfigSnapshot:
+    """
+    Fotografia imutável da configuração, lida e convertida uma única vez.
+
+    Os atributos tipados (snapshot.database.pgport, snapshot.jwt.jwt_expiration...)
+    são a forma preferida de leitura. O campo `legacy` guarda os dicts no
+    formato original dos métodos get_* (valores como string). `invalid`
+    lista as variáveis tipadas que não puderam ser convertidas e caíram no
+    valor padrão.
+    """
+    aws: AwsConfig
+    database: DatabaseConfig
+    ai_apis: AiApiKeys
+    jwt: JwtConfig
+    email: EmailConfig
+    application: ApplicationConfig
+    legacy: Mapping[str, Mapping[str, Optional[str]]]
+    loaded_at: float
+    invalid: Mapping[str, str] = field(default_factory=lambda: MappingProxyType({}))
+
+
+# Gramática do pacote `ms`, usada pelo jsonwebtoken ('24h', '7 days', '1.5h', '1w')
+_DURATION_RE = re.compile(
+    r'^\s*(-?\d*\.?\d+)\s*(milliseconds?|msecs?|ms|seconds?|secs?|s|minutes?|mins?|m|'
+    r'hours?|hrs?|h|days?|d|weeks?|w|years?|yrs?|y)?\s*$',
+    re.IGNORECASE
+)
+_DURATION_UNITS_MS = {
+    'ms': 1, 's': 1000, 'se': 1000, 'm': 60_000, 'mi': 60_000, 'h': 3_600_000,
+    'd': 86_400_000, 'w': 604_800_000, 'y': 31_557_600_000
+}
+_DEFAULTS = {
+    'PGPORT': '5432',
+    'JWT_EXPIRATION': '24h',
+    'SMTP_PORT': '587',
+    'PORT': '5000'
+}
+
+
+def parse_duration(value: str) -> int:
+    """
+    Converte durações no formato do jsonwebtoken em segundos (arredondado para baixo)
+
+    Aceita a mesma gramática do pacote `ms`: '24h', '30m', '7 days', '1w',
+    '1.5h', '500ms'. Como no jsonwebtoken, um número sem unidade é lido em
+    milissegundos ('120' = 120ms).
+
+    Raises:
+        ValueError: se o valor não estiver em um formato reconhecido
+    """
+    match = _DURATION_RE.match(value or '')
+    if not match:
+        raise ValueError(f"Duração inválida: {value!r}")
+    amount, unit = match.groups()
+    unit = (unit or 'ms').lower()
+    if unit.startswith(('ms', 'msec', 'millisecond')):
+        factor = 1
+    elif unit.startswith('mi') or unit == 'm':
+        factor = _DURATION_UNITS_MS['m']
+    else:
+        factor = _DURATION_UNITS_MS[unit[0]]
+    return int(float(amount) * factor // 1000)
+
+
+def _parse_port(name: str, value: str) -> int:
+    try:
+        port = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} deve ser um número inteiro: {value!r}") from None
+    if not 0 < port < 65536:
+        raise ValueError(f"{name} fora do intervalo válido: {port}")
+    return port
+
+
+def _typed(name: str, value: Optional[str], parse: Callable[..., int], invalid: Dict[str, str]) -> int:
+    """Converte um valor tipado; se inválido, registra o erro e usa o padrão"""
+    try:
+        return parse(value)
+    except ValueError as e:
+        invalid[name] = str(e)
+        return parse(_DEFAULTS[name])
+
+
+def build_snapshot(env: Mapping[str, str], strict: bool = False) -> ConfigSnapshot:
+    """
+    Constrói um ConfigSnapshot a partir de um mapeamento de variáveis
+
+    Um valor tipado inválido (porta, duração) não derruba a configuração
+    inteira: o campo tipado correspondente volta ao padrão, o erro fica em
+    snapshot.invalid e os dicts legados mantêm o texto original, como antes.
+
+    Args:
+        env: Origem dos valores (os.environ por padrão em SecretsManager)
+        strict: Se True, levanta ValueError no primeiro valor inválido
+
+    Returns:
+        ConfigSnapshot com valores já convertidos
+
+    Raises:
+        ValueError: apenas com strict=True, se algum valor tipado for inválido
+    """
+    get = env.get
+
+    aws = {
+        'region': get('AWS_REGION', 'us-east-1'),
+        'cognito_user_pool_id': get('COGNITO_USER_POOL_ID'),
+        'cognito_client_id': get('COGNITO_CLIENT_ID'),
+        'cognito_client_secret': get('COGNITO_CLIENT_SECRET'),
+        'cognito_domain': get('COGNITO_DOMAIN'),
+        'cognito_redirect_uri': get('COGNITO_REDIRECT_URI'),
+        'access_key': get('AWS_ACCESS_KEY_ID'),
+        'secret_key': get('AWS_SECRET_ACCESS_KEY'),
+        's3_bucket': get('S3_BUCKET_NAME')
+    }
+    database = {
+        'database_url': get('DATABASE_URL'),
+        'pghost': get('PGHOST'),
+        'pgport': get('PGPORT', _DEFAULTS['PGPORT']),
+        'pguser': get('PGUSER'),
+        'pgpassword': get('PGPASSWORD'),
+        'pgdatabase': get('PGDATABASE')
+    }
+    ai_apis = {
+        'openai_api_key': get('OPENAI_API_KEY'),
+        'anthropic_api_key': get('ANTHROPIC_API_KEY'),
+        'perplexity_api_key': get('PERPLEXITY_API_KEY'),
+        'litellm_api_key': get('LITELLM_API_KEY')
+    }
+    jwt = {
+        'jwt_secret': get('JWT_SECRET', 'test_secret_key_iaprender_2025'),
+        'jwt_algorithm': get('JWT_ALGORITHM', 'HS256'),
+        'jwt_expiration': get('JWT_EXPIRATION', _DEFAULTS['JWT_EXPIRATION'])
+    }
+    email = {
+        'sendgrid_api_key': get('SENDGRID_API_KEY'),
+        'smtp_host': get('SMTP_HOST'),
+        'smtp_port': get('SMTP_PORT', _DEFAULTS['SMTP_PORT']),
+        'smtp_user': get('SMTP_USER'),
+        'smtp_password': get('SMTP_PASSWORD')
+    }
+    application = {
+        'environment': get('NODE_ENV', 'development'),
+        'port': get('PORT', _DEFAULTS['PORT']),
+        'frontend_url': get('FRONTEND_URL', 'http://localhost:3000'),
+        'backend_url': get('BACKEND_URL', 'http://localhost:5000'),
+        'replit_domain': get('REPLIT_DOMAINS', ''),
+        'debug_mode': get('DEBUG', 'false').lower() == 'true'
+    }
+
+    legacy = MappingProxyType({
+        'aws': MappingProxyType(aws),
+        'database': MappingProxyType(database),
+        'ai_apis': MappingProxyType(ai_apis),
+        'jwt': MappingProxyType(jwt),
+        'email': MappingProxyType(email),
+        'application': MappingProxyType(application)
+    })
+
+    invalid: Dict[str, str] = {}
+    pgport = _typed('PGPORT', database['pgport'], lambda v: _parse_port('PGPORT', v), invalid)
+    jwt_expiration = _typed('JWT_EXPIRATION', jwt['jwt_expiration'], parse_duration, invalid)
+    smtp_port = _typed('SMTP_PORT', email['smtp_port'], lambda v: _parse_port('SMTP_PORT', v), invalid)
+    port = _typed('PORT', application['port'], lambda v: _parse_port('PORT', v), invalid)
+    if strict and invalid:
+        raise ValueError('; '.join(invalid.values()))
+
+    return ConfigSnapshot(
+        aws=AwsConfig(**aws),
+        database=DatabaseConfig(**{**database, 'pgport': pgport}),
+        ai_apis=AiApiKeys(**ai_apis),
+        jwt=JwtConfig(**{**jwt, 'jwt_expiration': jwt_expiration}),
+        email=EmailConfig(**{**email, 'smtp_port': smtp_port}),
+        application=ApplicationConfig(**{**application, 'port': port}),
+        legacy=legacy,
+        loaded_at=time.time(),
+        invalid=MappingProxyType(invalid)
+    )
+
+
+def _warn_invalid(snapshot: ConfigSnapshot) -> None:
+    for name, message in snapshot.invalid.items():
+        print(f"⚠️ {message} — usando o padrão {name}={_DEFAULTS[name]}", file=sys.stderr)
+
+
+_snapshot: Optional[ConfigSnapshot] = None
+_snapshot_lock = threading.Lock()
+_source: Callable[[], Mapping[str, str]] = lambda: os.environ
+_chain = None
+
 
 class SecretsManager:
     """
     Gerenciador centralizado de credenciais e configurações sensíveis
     para o sistema IAverse com integração AWS Cognito
+
+    A configuração é lida uma única vez para um ConfigSnapshot imutável.
+    Use SecretsManager.reload() (ou SIGHUP, após install_reload_signal())
+    para trocar o snapshot atomicamente após mudanças no ambiente, e
+    use_backends() para ler também de .env, Secrets Manager e SSM.
     """
-    
+
+    @staticmethod
+    def snapshot() -> ConfigSnapshot:
+        """
+        Retorna o snapshot de configuração atual, carregando-o na primeira chamada
+
+        Returns:
+            ConfigSnapshot imutável com leitura por atributo
+        """
+        current = _snapshot
+        if current is None:
+            with _snapshot_lock:
+                current = _snapshot
+                if current is None:
+                    current = SecretsManager._swap(build_snapshot(_source()))
+                    _warn_invalid(current)
+        return current
+
+    @staticmethod
+    def reload(refresh: bool = True) -> ConfigSnapshot:
+        """
+        Relê a configuração e substitui o snapshot atual de forma atômica
+
+        Com backends ativos (use_backends), refresh=True busca os backends
+        de novo antes de reconstruir o snapshot, em vez de reaproveitar o
+        cache da cadeia.
+
+        Leitores concorrentes continuam vendo o snapshot anterior até a troca.
+        Valores tipados inválidos caem no padrão (ver build_snapshot) e geram
+        um aviso em stderr.
+
+        Args:
+            refresh: Se False, usa os valores já em cache na cadeia de backends
+
+        Returns:
+            O novo ConfigSnapshot
+        """
+        if refresh and _chain is not None:
+            _chain.refresh()
+        new_snapshot = build_snapshot(_source())
+        with _snapshot_lock:
+            SecretsManager._swap(new_snapshot)
+        _warn_invalid(new_snapshot)
+        return new_snapshot
+
+    @staticmethod
+    def use_backends(chain=None, background: bool = True) -> ConfigSnapshot:
+        """
+        Passa a ler a configuração de uma cadeia de backends (env, .env, AWS)
+
+        Args:
+            chain: BackendChain de config.secret_backends; None usa default_chain()
+            background: Se True, inicia a renovação do cache em segundo plano
+
+        Returns:
+            O ConfigSnapshot construído a partir da cadeia
+        """
+        global _source, _chain
+        from config.secret_backends import default_chain
+
+        # Os backends AWS criam clientes com as credenciais do snapshot atual;
+        # carregá-lo antes evita que a primeira busca dependa da própria cadeia
+        SecretsManager.snapshot()
+        chain = chain if chain is not None else default_chain()
+        chain.subscribe(lambda _values: SecretsManager._reload_quietly(refresh=False))
+        _source = chain.values
+        _chain = chain
+        if background:
+            chain.start_refresher()
+        return SecretsManager.reload(refresh=False)
+
+    @staticmethod
+    def _swap(new_snapshot: ConfigSnapshot) -> ConfigSnapshot:
+        global _snapshot
+        _snapshot = new_snapshot
+        return new_snapshot
+
+    @staticmethod
+    def install_reload_signal(signum: int = getattr(signal, 'SIGHUP', 0)) -> None:
+        """
+        Registra um handler que executa reload() ao receber o sinal (SIGHUP por padrão)
+
+        Com backends ativos, a recarga busca os backends de novo. Ela roda em
+        uma thread própria: o handler interrompe a thread principal, que pode
+        estar no meio de uma renovação da cadeia (cujo lock não é reentrante).
+        Deve ser chamado a partir da thread principal.
+        """
+        if not signum:
+            raise RuntimeError("Sinal de recarga não suportado nesta plataforma")
+
+        def handler(_signum, _frame):
+            threading.Thread(target=SecretsManager._reload_quietly, name='secrets-reload', daemon=True).start()
+
+        signal.signal(signum, handler)
+
+    @staticmethod
+    def _reload_quietly(refresh: bool = True) -> None:
+        try:
+            SecretsManager.reload(refresh=refresh)
+        except Exception as e:
+            print(f"⚠️ Recarga de configuração ignorada: {str(e)}", file=sys.stderr)
+
     @staticmethod
     def get_aws_credentials() -> Dict[str, Optional[str]]:
         """
         Recupera credenciais AWS necessárias para autenticação e serviços
-        
+
         Returns:
             Dict contendo todas as credenciais AWS necessárias
         """
-        return {
-            'region': os.environ.get('AWS_REGION', 'us-east-1'),
-            'cognito_user_pool_id': os.environ.get('COGNITO_USER_POOL_ID'),
-            'cognito_client_id': os.environ.get('COGNITO_CLIENT_ID'),
-            'cognito_client_secret': os.environ.get('COGNITO_CLIENT_SECRET'),
-            'cognito_domain': os.environ.get('COGNITO_DOMAIN'),
-            'cognito_redirect_uri': os.environ.get('COGNITO_REDIRECT_URI'),
-            'access_key': os.environ.get('AWS_ACCESS_KEY_ID'),
-            'secret_key': os.environ.get('AWS_SECRET_ACCESS_KEY')
-        }
-    
+        return dict(SecretsManager.snapshot().legacy['aws'])
+
     @staticmethod
     def get_database_credentials() -> Dict[str, Optional[str]]:
         """
         Recupera credenciais do banco de dados PostgreSQL
-        
+
         Returns:
             Dict contendo configurações de conexão do banco
         """
-        return {
-            'database_url': os.environ.get('DATABASE_URL'),
-            'pghost': os.environ.get('PGHOST'),
-            'pgport': os.environ.get('PGPORT', '5432'),
-            'pguser': os.environ.get('PGUSER'),
-            'pgpassword': os.environ.get('PGPASSWORD'),
-            'pgdatabase': os.environ.get('PGDATABASE')
-        }
-    
+        return dict(SecretsManager.snapshot().legacy['database'])
+
     @staticmethod
     def get_ai_api_keys() -> Dict[str, Optional[str]]:
         """
         Recupera chaves de API para serviços de IA integrados
-        
+
         Returns:
             Dict contendo chaves de API dos serviços de IA
         """
-        return {
-            'openai_api_key': os.environ.get('OPENAI_API_KEY'),
-            'anthropic_api_key': os.environ.get('ANTHROPIC_API_KEY'),
-            'perplexity_api_key': os.environ.get('PERPLEXITY_API_KEY'),
-            'litellm_api_key': os.environ.get('LITELLM_API_KEY')
-        }
-    
+        return dict(SecretsManager.snapshot().legacy['ai_apis'])
+
     @staticmethod
     def get_jwt_secrets() -> Dict[str, Optional[str]]:
         """
         Recupera segredos para autenticação JWT
-        
+
         Returns:
             Dict contendo configurações JWT
         """
-        return {
-            'jwt_secret': os.environ.get('JWT_SECRET', 'test_secret_key_iaprender_2025'),
-            'jwt_algorithm': os.environ.get('JWT_ALGORITHM', 'HS256'),
-            'jwt_expiration': os.environ.get('JWT_EXPIRATION', '24h')
-        }
-    
+        return dict(SecretsManager.snapshot().legacy['jwt'])
+
     @staticmethod
     def get_email_credentials() -> Dict[str, Optional[str]]:
         """
         Recupera credenciais para serviços de email
-        
+
         Returns:
             Dict contendo configurações de email
         """
-        return {
-            'sendgrid_api_key': os.environ.get('SENDGRID_API_KEY'),
-            'smtp_host': os.environ.get('SMTP_HOST'),
-            'smtp_port': os.environ.get('SMTP_PORT', '587'),
-            'smtp_user': os.environ.get('SMTP_USER'),
-            'smtp_password': os.environ.get('SMTP_PASSWORD')
-        }
-    
+        return dict(SecretsManager.snapshot().legacy['email'])
+
     @staticmethod
     def get_application_config() -> Dict[str, Optional[str]]:
         """
         Recupera configurações gerais da aplicação
-        
+
         Returns:
             Dict contendo configurações da aplicação
         """
-        return {
-            'environment': os.environ.get('NODE_ENV', 'development'),
-            'port': os.environ.get('PORT', '5000'),
-            'frontend_url': os.environ.get('FRONTEND_URL', 'http://localhost:3000'),
-            'backend_url': os.environ.get('BACKEND_URL', 'http://localhost:5000'),
-            'replit_domain': os.environ.get('REPLIT_DOMAINS', ''),
-            'debug_mode': os.environ.get('DEBUG', 'false').lower() == 'true'
-        }
-    
+        return dict(SecretsManager.snapshot().legacy['application'])
+
     @staticmethod
     def validate_aws_credentials() -> tuple[bool, list[str]]:
         """
         Valida se todas as credenciais AWS necessárias estão presentes
-        
+
         Returns:
             Tuple (is_valid, missing_credentials)
         """
-        aws_creds = SecretsManager.get_aws_credentials()
+        aws_creds = SecretsManager.snapshot().aws
         required_keys = [
             'cognito_user_pool_id',
             'cognito_client_id',
             'cognito_domain',
             'cognito_redirect_uri'
         ]
-        
-        missing = [key for key in required_keys if not aws_creds.get(key)]
+
+        missing = [key for key in required_keys if not getattr(aws_creds, key)]
         return len(missing) == 0, missing
-    
+
     @staticmethod
     def validate_database_credentials() -> tuple[bool, list[str]]:
         """
         Valida se as credenciais do banco de dados estão presentes
-        
+
         Returns:
             Tuple (is_valid, missing_credentials)
         """
-        db_creds = SecretsManager.get_database_credentials()
+        db_creds = SecretsManager.snapshot().database
         required_keys = ['database_url']
-        
-        missing = [key for key in required_keys if not db_creds.get(key)]
+
+        missing = [key for key in required_keys if not getattr(db_creds, key)]
         return len(missing) == 0, missing
-    
+
     @staticmethod
     def get_all_secrets() -> Dict[str, Dict[str, Optional[str]]]:
         """
         Recupera todas as configurações organizadas por categoria
-        
+
         Returns:
             Dict contendo todas as configurações categorizadas
         """
-        return {
-            'aws': SecretsManager.get_aws_credentials(),
-            'database': SecretsManager.get_database_credentials(),
-            'ai_apis': SecretsManager.get_ai_api_keys(),
-            'jwt': SecretsManager.get_jwt_secrets(),
-            'email': SecretsManager.get_email_credentials(),
-            'application': SecretsManager.get_application_config()
-        }
-    
+        legacy = SecretsManager.snapshot().legacy
+        return {category: dict(values) for category, values in legacy.items()}
+
+    @staticmethod
+    async def probe_system_health(force: bool = False) -> Dict[str, any]:
+        """
+        Sonda Aurora, S3, Bedrock e Cognito em paralelo (resultado em cache por alguns segundos)
+
+        Args:
+            force: Ignora o cache e sonda novamente
+
+        Returns:
+            Dict com status e latência de cada dependência
+        """
+        from config.health import default_prober
+
+        return await default_prober.check(force=force)
+
     @staticmethod
-    def check_system_health() -> Dict[str, any]:
+    def check_system_health(probe: bool = False) -> Dict[str, any]:
         """
         Verifica a saúde do sistema de credenciais
-        
+
+        Args:
+            probe: Se True, inclui em 'probes' o resultado das sondas ativas
+                (não usar de dentro de um event loop; prefira probe_system_health)
+
         Returns:
             Dict contendo status de cada categoria de credenciais
         """
         aws_valid, aws_missing = SecretsManager.validate_aws_credentials()
         db_valid, db_missing = SecretsManager.validate_database_credentials()
-        
-        ai_creds = SecretsManager.get_ai_api_keys()
+
+        snapshot = SecretsManager.snapshot()
+        ai_creds = snapshot.legacy['ai_apis']
         ai_keys_present = sum(1 for key in ai_creds.values() if key)
-        
-        return {
+
+        health = {
             'aws_cognito': {
                 'status': 'ok' if aws_valid else 'error',
                 'missing_credentials': aws_missing
@@ -183,32 +527,47 @@ class SecretsManager:
                 'available_services': ai_keys_present,
                 'total_services': len(ai_creds)
             },
+            'configuration': {
+                'status': 'warning' if snapshot.invalid else 'ok',
+                'invalid_values': dict(snapshot.invalid)
+            },
             'overall_status': 'healthy' if aws_valid and db_valid else 'needs_attention'
         }
 
+        if probe:
+            import asyncio
+
+            probes = asyncio.run(SecretsManager.probe_system_health())
+            health['probes'] = probes
+            if probes['overall_status'] != 'healthy':
+                health['overall_status'] = 'needs_attention'
+
+        return health
+
 
 # Exemplo de uso e testes
 if __name__ == "__main__":
     # Teste das funcionalidades
     print("=== TESTE DO SISTEMA DE CREDENCIAIS ===")
-    
+
     # Verificar saúde do sistema
     health = SecretsManager.check_system_health()
     print(f"Status geral: {health['overall_status']}")
-    
+
     # Verificar AWS
     aws_valid, aws_missing = SecretsManager.validate_aws_credentials()
     print(f"AWS Cognito: {'✅' if aws_valid else '❌'}")
     if aws_missing:
         print(f"  Credenciais faltantes: {', '.join(aws_missing)}")
-    
+
     # Verificar Database
     db_valid, db_missing = SecretsManager.validate_database_credentials()
     print(f"Database: {'✅' if db_valid else '❌'}")
     if db_missing:
         print(f"  Credenciais faltantes: {', '.join(db_missing)}")
-    
+
     # Mostrar configuração da aplicação
-    app_config = SecretsManager.get_application_config()
-    print(f"Ambiente: {app_config['environment']}")
-    print(f"Porta: {app_config['port']}")
\ No newline at end of file
+    config = SecretsManager.snapshot()
+    print(f"Ambiente: {config.application.environment}")
+    print(f"Porta: {config.application.port}")
+    print(f"Expiração JWT: {config.jwt.jwt_expiration}s")
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Benchmark do codec de artefatos: bytes armazenados e tempo de encode/decode
+
+Monta os artefatos como o GenerationEngine os grava (default_artifact de
+pedidos criados por PromptTemplate, com conteúdo em Markdown do tamanho
+das respostas reais) e compara o formato legado (JSON indentado) com o
+ArtifactCodec.encode/decode em cada compressão disponível, com e sem a
+reconstrução do prompt por `prompt_template`. O S3 é o MemoryS3, então as
+chamadas ao PromptStore aparecem na coluna de requisições.
+"""
+
+import json
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from iaprender_ops import codec  # noqa: E402
+from iaprender_ops.converse import ATIVIDADE, PLANO_AULA  # noqa: E402
+from iaprender_ops.generation import GenerationRequest, GenerationResult, default_artifact  # noqa: E402
+from iaprender_ops.stubs import MemoryS3  # noqa: E402
+
+BUCKET = 'bench-codec'
+TEMAS = ['frações', 'ciclo da água', 'sistema solar', 'verbos no passado', 'Independência do Brasil',
+         'geometria plana', 'cadeia alimentar', 'interpretação de texto']
+DISCIPLINAS = ['Matemática', 'Ciências', 'Língua Portuguesa', 'História', 'Geografia']
+PALAVRAS = ('os alunos devem compreender identificar comparar representar resolver problemas situações do '
+            'cotidiano utilizando materiais concretos em grupos discussão coletiva registro no caderno '
+            'atividade avaliação formativa observação participação habilidade competência conceito').split()
+
+
+def frase(rng):
+    return ' '.join(rng.choice(PALAVRAS) for _ in range(rng.randint(10, 22))).capitalize() + '.'
+
+
+def artefato(rng):
+    """Artefato de plano de aula ou atividade, como o engine o monta"""
+    tema = rng.choice(TEMAS)
+    disciplina = rng.choice(DISCIPLINAS)
+    ano = f"{rng.randint(1, 9)}º ano"
+    if rng.random() < 0.5:
+        template, variables = PLANO_AULA, {'disciplina': disciplina, 'ano': ano, 'tema': tema,
+                                           'duracao': '50 minutos'}
+        secoes = ['Objetivos de aprendizagem', 'Habilidades da BNCC', 'Conteúdos', 'Metodologia', 'Recursos',
+                  'Avaliação']
+        metadata = {'tipo': 'plano_aula', 'bncc_aligned': True, 'professor': 'Sistema IAprender',
+                    'duracao_estimada': '50 minutos'}
+    else:
+        template, variables = ATIVIDADE, {'disciplina': disciplina, 'ano': ano, 'tema': tema, 'exercicios': 5}
+        secoes = [f"Exercício {n}" for n in range(1, 6)] + ['Gabarito']
+        metadata = {'exercicios': 5, 'dificuldade': 'variada', 'tempo_estimado': '30 minutos',
+                    'gabarito_incluido': True}
+    conteudo = '\n\n'.join(
+        f"## {secao}\n" + '\n'.join(f"- {frase(rng)}" for _ in range(rng.randint(3, 7))) for secao in secoes
+    )
+    request = GenerationRequest.from_template(
+        template, variables, artifact={'disciplina': disciplina, 'ano': ano, 'tema': tema, 'metadata': metadata}
+    )
+    result = GenerationResult(
+        request=request,
+        text=conteudo,
+        latency=rng.uniform(2.0, 9.0),
+        usage={'input_tokens': rng.randint(2300, 2500), 'output_tokens': rng.randint(500, 800),
+               'cache_read_input_tokens': rng.choice((0, 2200))}
+    )
+    return default_artifact(result)
+
+
+def legacy_encode(doc):
+    return json.dumps(doc, indent=2, ensure_ascii=False).encode('utf-8')
+
+
+def variants():
+    encodings = [None, 'gzip'] + (['zstd'] if codec.zstandard is not None else [])
+    for encoding in encodings:
+        for templates, suffix in ((codec.TEMPLATES, ' + prompt por modelo'), ({}, '')):
+            label = f"codec {encoding or 'sem compressão'}{suffix}"
+            yield label, lambda s3, e=encoding, t=templates: codec.ArtifactCodec(s3, BUCKET, encoding=e, templates=t)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    rng = random.Random(7)
+    docs = [artefato(rng) for _ in range(count)]
+
+    print(f"⏱️ Codec de artefatos: {count} artefatos do engine (melhor de 5)")
+    print(f"  {'formato':<40} {'bytes/obj':>10} {'vs legado':>10} {'encode µs':>10} {'decode µs':>10} {'req S3':>7}")
+
+    bodies = [legacy_encode(doc) for doc in docs]
+    baseline = sum(len(b) for b in bodies) / count
+    enc = min(timeit.repeat(lambda: [legacy_encode(doc) for doc in docs], number=1, repeat=5)) / count * 1e6
+    dec = min(timeit.repeat(lambda: [json.loads(b) for b in bodies], number=1, repeat=5)) / count * 1e6
+    print(f"  {'legado (indent=2)':<40} {baseline:>10.0f} {1:>9.0%} {enc:>10.1f} {dec:>10.1f} {0:>7}")
+
+    for label, factory in variants():
+        s3 = MemoryS3()
+        artifact_codec = factory(s3)
+        encoded = [artifact_codec.encode(doc) for doc in docs]
+        size = sum(len(body) for body, _ in encoded) / count
+        requests = sum(s3.calls.values())
+        decoded = [artifact_codec.decode(body, extra.get('ContentEncoding')) for body, extra in encoded]
+        if any(d != doc for d, doc in zip(decoded, docs)):
+            raise SystemExit(f"❌ {label}: decode não reproduz o artefato original")
+        enc = min(timeit.repeat(lambda: [artifact_codec.encode(doc) for doc in docs], number=1, repeat=5))
+        dec = min(timeit.repeat(
+            lambda: [artifact_codec.decode(body, extra.get('ContentEncoding')) for body, extra in encoded],
+            number=1, repeat=5
+        ))
+        print(f"  {label:<40} {size:>10.0f} {size / baseline:>9.0%} {enc / count * 1e6:>10.1f} "
+              f"{dec / count * 1e6:>10.1f} {requests:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Benchmark do Bedrock: latência, TTFT, tokens/s e throttling por nível de concorrência
+
+Exemplos:
+    python scripts/bench-bedrock.py --levels 1,4,16 --output bench-bedrock.json
+    python scripts/bench-bedrock.py --stub --time-scale 0.01 --baseline bench-anterior.json
+"""
+
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from iaprender_ops.bench import BedrockBenchmark, compare  # noqa: E402
+from iaprender_ops.generation import DEFAULT_MODEL_ID, bedrock_client  # noqa: E402
+from iaprender_ops.stubs import DEFAULT_STUB_PROFILES, StubBedrock, StubModelProfile  # noqa: E402
+
+
+def load_profiles(path):
+    """Perfis do stub em JSON: {"model_id": {"ttft_median": 0.4, "tokens_per_second": 80, ...}}"""
+    if not path:
+        return DEFAULT_STUB_PROFILES
+    with open(path, 'r', encoding='utf-8') as f:
+        return {model_id: StubModelProfile(**params) for model_id, params in json.load(f).items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de latência/vazão do Bedrock")
+    parser.add_argument('--models', default=DEFAULT_MODEL_ID, help="IDs de modelo separados por vírgula")
+    parser.add_argument('--levels', default='1,2,4,8,16', help="Níveis de concorrência separados por vírgula")
+    parser.add_argument('--requests', type=int, default=24, help="Chamadas por nível")
+    parser.add_argument('--output', default='bench-bedrock.json', help="Arquivo JSON de resultados")
+    parser.add_argument('--baseline', help="JSON de uma execução anterior para comparação")
+    parser.add_argument('--stub', action='store_true', help="Usa o backend simulado (sem rede)")
+    parser.add_argument('--stub-profiles', help="JSON com perfis de latência do stub por modelo")
+    parser.add_argument('--time-scale', type=float, default=1.0, help="Fator de tempo do stub (ex.: 0.01)")
+    parser.add_argument('--seed', type=int, default=42, help="Semente do stub")
+    args = parser.parse_args()
+
+    models = [m.strip() for m in args.models.split(',') if m.strip()]
+    levels = [int(level) for level in args.levels.split(',')]
+
+    if args.stub:
+        bedrock = StubBedrock(load_profiles(args.stub_profiles), time_scale=args.time_scale, seed=args.seed)
+        backend = f"stub (time_scale={args.time_scale})"
+    else:
+        bedrock = bedrock_client()
+        backend = 'bedrock'
+
+    print(f"⏱️ Benchmark do Bedrock [{backend}]: {len(models)} modelo(s), níveis {levels}, {args.requests} chamadas/nível")
+    bench = BedrockBenchmark(bedrock, requests_per_level=args.requests)
+    report = bench.run(models, levels, backend=backend)
+    bench.write(report, args.output)
+    print(f"\n💾 Resultados salvos em {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        print(f"\n📊 Comparação com {args.baseline}:")
+        for row in compare(baseline, report):
+            p95, tps = row['p95_ms'], row['tokens_per_second']
+            label = f"  {row['model_id']} c={row['concurrency']:<3}"
+            if p95['change'] is None or tps['change'] is None:
+                print(f"{label} sem dados suficientes")
+                continue
+            print(f"{label} p95 {p95['before']} → {p95['after']}ms ({p95['change']:+.1%}) | "
+                  f"tok/s {tps['before']} → {tps['after']} ({tps['change']:+.1%})")
+
+
+if __name__ == "__main__":
+    main()
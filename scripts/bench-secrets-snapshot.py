@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: snapshot de configuração vs. construção de dicts por chamada
+"""
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from config.secrets import SecretsManager  # noqa: E402
+
+
+def legacy_get_all_secrets():
+    """Reproduz o comportamento anterior: relê os.environ e monta dicts novos a cada chamada"""
+    env = os.environ
+    return {
+        'aws': {
+            'region': env.get('AWS_REGION', 'us-east-1'),
+            'cognito_user_pool_id': env.get('COGNITO_USER_POOL_ID'),
+            'cognito_client_id': env.get('COGNITO_CLIENT_ID'),
+            'cognito_client_secret': env.get('COGNITO_CLIENT_SECRET'),
+            'cognito_domain': env.get('COGNITO_DOMAIN'),
+            'cognito_redirect_uri': env.get('COGNITO_REDIRECT_URI'),
+            'access_key': env.get('AWS_ACCESS_KEY_ID'),
+            'secret_key': env.get('AWS_SECRET_ACCESS_KEY')
+        },
+        'database': {
+            'database_url': env.get('DATABASE_URL'),
+            'pghost': env.get('PGHOST'),
+            'pgport': env.get('PGPORT', '5432'),
+            'pguser': env.get('PGUSER'),
+            'pgpassword': env.get('PGPASSWORD'),
+            'pgdatabase': env.get('PGDATABASE')
+        },
+        'ai_apis': {
+            'openai_api_key': env.get('OPENAI_API_KEY'),
+            'anthropic_api_key': env.get('ANTHROPIC_API_KEY'),
+            'perplexity_api_key': env.get('PERPLEXITY_API_KEY'),
+            'litellm_api_key': env.get('LITELLM_API_KEY')
+        },
+        'jwt': {
+            'jwt_secret': env.get('JWT_SECRET', 'test_secret_key_iaprender_2025'),
+            'jwt_algorithm': env.get('JWT_ALGORITHM', 'HS256'),
+            'jwt_expiration': env.get('JWT_EXPIRATION', '24h')
+        },
+        'email': {
+            'sendgrid_api_key': env.get('SENDGRID_API_KEY'),
+            'smtp_host': env.get('SMTP_HOST'),
+            'smtp_port': env.get('SMTP_PORT', '587'),
+            'smtp_user': env.get('SMTP_USER'),
+            'smtp_password': env.get('SMTP_PASSWORD')
+        },
+        'application': {
+            'environment': env.get('NODE_ENV', 'development'),
+            'port': env.get('PORT', '5000'),
+            'frontend_url': env.get('FRONTEND_URL', 'http://localhost:3000'),
+            'backend_url': env.get('BACKEND_URL', 'http://localhost:5000'),
+            'replit_domain': env.get('REPLIT_DOMAINS', ''),
+            'debug_mode': env.get('DEBUG', 'false').lower() == 'true'
+        }
+    }
+
+
+def legacy_get_port():
+    return os.environ.get('PORT', '5000')
+
+
+def snapshot_get_port():
+    return SecretsManager.snapshot().application.port
+
+
+def bench(label, func, number):
+    elapsed = min(timeit.repeat(func, number=number, repeat=5))
+    per_call_ns = elapsed / number * 1e9
+    print(f"  {label:<45} {per_call_ns:>10.1f} ns/chamada")
+    return per_call_ns
+
+
+def main():
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    SecretsManager.snapshot()
+
+    print(f"⏱️ Micro-benchmark de configuração ({number} chamadas, melhor de 5)")
+
+    print(f"\n📦 Todas as categorias:")
+    legacy_all = bench("legado: dicts reconstruídos por chamada", legacy_get_all_secrets, number)
+    snap_all = bench("snapshot: get_all_secrets() (cópias)", SecretsManager.get_all_secrets, number)
+
+    print(f"\n🔑 Leitura de um valor (porta):")
+    legacy_port = bench("legado: os.environ.get('PORT')", legacy_get_port, number)
+    snap_port = bench("snapshot: .application.port (int)", snapshot_get_port, number)
+
+    print(f"\n📊 Ganho:")
+    print(f"  get_all_secrets: {legacy_all / snap_all:.1f}x")
+    print(f"  leitura de valor: {legacy_port / snap_port:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Benchmark de inicialização da CLI e dos clientes AWS (python -X importtime)
+
+Cada alvo roda N vezes em um subprocesso novo. Mede o tempo total (wall)
+e o tempo de import reportado por -X importtime, e lista os imports de
+topo mais caros. O resultado é comparado com o orçamento em
+startup-budget.json; acima do orçamento o script sai com código 1.
+
+Uso:
+    python scripts/bench-startup.py                     # compara com o orçamento
+    python scripts/bench-startup.py --runs 10 --top 15
+    python scripts/bench-startup.py --update-budget     # grava medições + folga
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Tuple
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.join(SCRIPTS_DIR, '..')
+DEFAULT_BUDGET = os.path.join(SCRIPTS_DIR, 'startup-budget.json')
+
+_CLIENTS = (
+    "import sys; sys.path.insert(0, {root!r}); "
+    "from config.aws_clients import get_client; "
+    "[get_client(s) for s in ('s3', 'iam', 'bedrock-runtime')]"
+)
+
+# nome → (argumentos do python, variáveis extras, aquecer o cache de modelos antes)
+TARGETS: Dict[str, Tuple[List[str], Dict[str, str], bool]] = {
+    'ops-help': ([os.path.join(SCRIPTS_DIR, 'iaprender-ops.py'), '--help'], {}, False),
+    'aws-clients-import': (['-c', f"import sys; sys.path.insert(0, {ROOT!r}); import config.aws_clients"], {}, False),
+    'clients-cold': (['-c', _CLIENTS.format(root=ROOT)], {'AWS_MODEL_CACHE': '0'}, False),
+    'clients-warm': (['-c', _CLIENTS.format(root=ROOT)], {}, True),
+}
+
+
+def parse_importtime(stderr: str) -> Tuple[float, List[Tuple[str, float]]]:
+    """
+    Interpreta a saída de -X importtime
+
+    Returns:
+        (tempo total de import em ms, [(módulo de topo, cumulativo em ms)])
+    """
+    total_us = 0
+    top_level = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+        total_us += int(self_us)
+        if not name[1:].startswith(' '):
+            top_level.append((name.strip(), int(cumulative_us) / 1000))
+    return total_us / 1000, top_level
+
+
+def run_target(name: str, runs: int, cache_dir: str) -> Dict:
+    args, extra_env, warm = TARGETS[name]
+    env = dict(os.environ, AWS_MODEL_CACHE_DIR=cache_dir, **extra_env)
+    env.setdefault('AWS_REGION', 'us-east-1')
+    command = [sys.executable, '-X', 'importtime'] + args
+    if warm:
+        subprocess.run(command, env=env, capture_output=True, text=True)
+
+    walls, imports, tops = [], [], {}
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = subprocess.run(command, env=env, capture_output=True, text=True)
+        walls.append((time.perf_counter() - started) * 1000)
+        if result.returncode != 0:
+            raise RuntimeError(f"{name} saiu com código {result.returncode}: {result.stderr.strip()[-500:]}")
+        import_ms, top_level = parse_importtime(result.stderr)
+        imports.append(import_ms)
+        for module, cumulative in top_level:
+            tops.setdefault(module, []).append(cumulative)
+
+    return {
+        'wall_ms': round(statistics.median(walls), 1),
+        'import_ms': round(statistics.median(imports), 1),
+        'top': sorted(((module, round(statistics.median(values), 1)) for module, values in tops.items()),
+                      key=lambda item: -item[1]),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de inicialização (python -X importtime)")
+    parser.add_argument('--runs', type=int, default=5, help="execuções por alvo (mediana)")
+    parser.add_argument('--target', action='append', choices=sorted(TARGETS), help="alvos (padrão: todos)")
+    parser.add_argument('--top', type=int, default=8, help="imports de topo listados por alvo")
+    parser.add_argument('--budget', default=DEFAULT_BUDGET, help="arquivo de orçamento")
+    parser.add_argument('--update-budget', action='store_true', help="grava as medições + folga como orçamento")
+    parser.add_argument('--headroom', type=float, default=1.5, help="folga aplicada com --update-budget")
+    parser.add_argument('--output', help="grava o resultado em JSON")
+    args = parser.parse_args()
+
+    budget = {}
+    if os.path.exists(args.budget):
+        with open(args.budget, 'r', encoding='utf-8') as f:
+            budget = json.load(f)
+
+    print(f"⏱️ Benchmark de inicialização ({args.runs} execuções por alvo, mediana)")
+    results = {}
+    regressions = []
+    with tempfile.TemporaryDirectory(prefix='model-cache-') as cache_dir:
+        for name in args.target or list(TARGETS):
+            measured = results[name] = run_target(name, args.runs, cache_dir)
+            limits = budget.get(name, {})
+            print(f"\n🚀 {name}: {measured['wall_ms']:.1f} ms total, {measured['import_ms']:.1f} ms em imports")
+            for metric in ('wall_ms', 'import_ms'):
+                if metric in limits and measured[metric] > limits[metric]:
+                    regressions.append(f"{name} {metric}: {measured[metric]:.1f} > {limits[metric]:.1f}")
+                    print(f"  ❌ {metric} acima do orçamento ({limits[metric]:.1f} ms)")
+            for module, cumulative in measured['top'][:args.top]:
+                print(f"    {cumulative:>8.1f} ms  {module}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"\n💾 Resultado salvo em {args.output}")
+
+    if args.update_budget:
+        budget.update({
+            name: {metric: round(measured[metric] * args.headroom, 1) for metric in ('wall_ms', 'import_ms')}
+            for name, measured in results.items()
+        })
+        with open(args.budget, 'w', encoding='utf-8') as f:
+            json.dump(budget, f, indent=2)
+            f.write('\n')
+        print(f"\n💾 Orçamento atualizado em {args.budget} (folga {args.headroom}x)")
+        return
+
+    if regressions:
+        print(f"\n❌ {len(regressions)} regressão(ões) de inicialização:")
+        for regression in regressions:
+            print(f"  - {regression}")
+        sys.exit(1)
+    print(f"\n✅ Dentro do orçamento")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Benchmark de vazão do motor de transferência (upload multipart e download paralelo)
+
+Exemplos:
+    python scripts/bench-transfer.py --sizes 1,8,64,512,1024,5120 --threads 8,16
+    python scripts/bench-transfer.py --stub --sizes 1,8,64,256
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from config.aws_clients import get_client  # noqa: E402
+from iaprender_ops.stubs import MemoryS3  # noqa: E402
+from iaprender_ops.transfer import TransferEngine, choose_part_size  # noqa: E402
+
+BUCKET = os.getenv("S3_BUCKET_NAME")
+_MB = 1024 * 1024
+
+
+def make_file(directory, size_mb):
+    path = os.path.join(directory, f"bench-{size_mb}mb.bin")
+    remaining = size_mb * _MB
+    with open(path, 'wb') as f:
+        while remaining:
+            chunk = min(remaining, 64 * _MB)
+            f.write(os.urandom(chunk))
+            remaining -= chunk
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vazão de upload/download de arquivos grandes")
+    parser.add_argument('--sizes', default='1,8,64,512,1024,5120', help="Tamanhos em MB separados por vírgula")
+    parser.add_argument('--threads', default='16', help="Números de threads separados por vírgula")
+    parser.add_argument('--prefix', default='temp/bench-transfer/', help="Prefixo dos objetos de teste")
+    parser.add_argument('--stub', action='store_true', help="Usa um S3 em memória (sem rede)")
+    parser.add_argument('--output', help="Arquivo JSON de resultados")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(',')]
+    thread_counts = [int(threads) for threads in args.threads.split(',')]
+    if not args.stub and not BUCKET:
+        parser.error("S3_BUCKET_NAME não configurado (use --stub para rodar sem rede)")
+    s3 = MemoryS3() if args.stub else get_client('s3')
+    bucket = 'bench' if args.stub else BUCKET
+
+    print(f"⏱️ Benchmark de transferência ({'stub' if args.stub else bucket}): tamanhos {sizes} MB, threads {thread_counts}")
+    print(f"  {'tamanho':>9} {'parte':>7} {'threads':>8} {'upload MB/s':>12} {'download MB/s':>14}")
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for size_mb in sizes:
+            path = make_file(directory, size_mb)
+            key = f"{args.prefix}bench-{size_mb}mb.bin"
+            for threads in thread_counts:
+                engine = TransferEngine(s3, bucket, max_threads=threads)
+                try:
+                    up = engine.upload(path, key, content_type='application/octet-stream')
+                    down = engine.download(key, path + '.down')
+                finally:
+                    s3.delete_object(Bucket=bucket, Key=key)
+                part_mb = choose_part_size(size_mb * _MB) // _MB
+                results.append({'size_mb': size_mb, 'part_mb': part_mb, 'threads': threads,
+                                'upload': up, 'download': down})
+                print(f"  {size_mb:>7}MB {part_mb:>5}MB {threads:>8} {up['mb_per_second']:>12} {down['mb_per_second']:>14}")
+                os.remove(path + '.down')
+            os.remove(path)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"\n💾 Resultados salvos em {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,15 @@
 #!/usr/bin/env python3
-import boto3
 import json
 import os
+import sys
 from datetime import datetime
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from config.aws_clients import get_client  # noqa: E402
+from iaprender_ops.access_matrix import simulation_main  # noqa: E402
+from iaprender_ops.iam_policy import PolicyEvaluator  # noqa: E402
+
 # Carregar configs do ambiente
 AWS_KEY = os.getenv("AWS_ACCESS_KEY_ID")
 AWS_SECRET = os.getenv("AWS_SECRET_ACCESS_KEY")
@@ -11,6 +17,7 @@ REGIAO = os.getenv("AWS_REGION")
 BUCKET = os.getenv("S3_BUCKET_NAME")
 USERNAME = "UsuarioBedrock"
 POLICY_NAME = "AcessoBedRock"
+MODEL_ARN = f"arn:aws:bedrock:{REGIAO}::foundation-model/anthropic.claude-3-haiku-20240307-v1:0"
 
 def check_access_bedrock_policy():
     """Verifica se a política AcessoBedRock está anexada ao usuário"""
@@ -22,7 +29,7 @@ def check_access_bedrock_policy():
     
     # Criar cliente IAM com credenciais administrativas (se disponíveis)
     try:
-        iam = boto3.client('iam', region_name=REGIAO)
+        iam = get_client('iam')
         
         # Tentar listar políticas do usuário
         print(f"\n🔍 Tentando verificar políticas do usuário {USERNAME}...")
@@ -41,27 +48,13 @@ def check_access_bedrock_policy():
                     print(f"📄 Documento da política '{POLICY_NAME}':")
                     print(json.dumps(policy_doc['PolicyDocument'], indent=2))
                     
-                    # Verificar se tem as permissões necessárias
-                    doc = policy_doc['PolicyDocument']
-                    has_s3_put = False
-                    has_s3_get = False
-                    has_s3_list = False
-                    has_bedrock = False
-                    
-                    for statement in doc.get('Statement', []):
-                        actions = statement.get('Action', [])
-                        if isinstance(actions, str):
-                            actions = [actions]
-                        
-                        for action in actions:
-                            if 's3:PutObject' in action:
-                                has_s3_put = True
-                            if 's3:GetObject' in action:
-                                has_s3_get = True
-                            if 's3:ListBucket' in action:
-                                has_s3_list = True
-                            if 'bedrock:' in action:
-                                has_bedrock = True
+                    # Avaliar a política com curingas, Deny e Condition (sem chamadas à AWS)
+                    evaluator = PolicyEvaluator([(POLICY_NAME, policy_doc['PolicyDocument'])])
+                    bucket_arn = f"arn:aws:s3:::{BUCKET}"
+                    has_s3_put = evaluator.is_allowed('s3:PutObject', f"{bucket_arn}/bedrock/outputs/teste.json")
+                    has_s3_get = evaluator.is_allowed('s3:GetObject', f"{bucket_arn}/bedrock/outputs/teste.json")
+                    has_s3_list = evaluator.is_allowed('s3:ListBucket', bucket_arn, {'s3:prefix': 'bedrock/outputs/'})
+                    has_bedrock = evaluator.is_allowed('bedrock:InvokeModel', MODEL_ARN)
                     
                     print(f"\n🔍 Análise das permissões:")
                     print(f"  {'✅' if has_s3_put else '❌'} s3:PutObject")
@@ -103,12 +96,7 @@ def check_access_bedrock_policy():
     # Método alternativo: Testar diretamente as operações
     print(f"\n🧪 Testando operações específicas...")
     
-    s3 = boto3.client(
-        's3',
-        aws_access_key_id=AWS_KEY,
-        aws_secret_access_key=AWS_SECRET,
-        region_name=REGIAO
-    )
+    s3 = get_client('s3')
     
     test_results = []
     
@@ -156,7 +144,7 @@ def check_access_bedrock_policy():
     # Teste 5: Bedrock
     print(f"5. Testando Bedrock...")
     try:
-        bedrock = boto3.client('bedrock-runtime', region_name=REGIAO)
+        bedrock = get_client('bedrock-runtime')
         bedrock.invoke_model(
             modelId='anthropic.claude-3-haiku-20240307-v1:0',
             body=json.dumps({
@@ -192,4 +180,4 @@ def check_access_bedrock_policy():
     return success_count == total_count
 
 if __name__ == "__main__":
-    check_access_bedrock_policy()
\ No newline at end of file
+    simulation_main("Verifica a política AcessoBedRock do usuário", BUCKET, REGIAO, check_access_bedrock_policy)
\ No newline at end of file
@@ -1,9 +1,13 @@
 #!/usr/bin/env python3
-import boto3
 import os
+import sys
 import json
 import uuid
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from config.aws_clients import get_client  # noqa: E402
+
 # Carregar configs do ambiente
 AWS_KEY = os.getenv("AWS_ACCESS_KEY_ID")
 AWS_SECRET = os.getenv("AWS_SECRET_ACCESS_KEY")
@@ -34,12 +38,7 @@ def check_aws_secrets():
     if AWS_KEY and AWS_SECRET:
         try:
             # Teste básico com STS
-            sts = boto3.client(
-                'sts',
-                aws_access_key_id=AWS_KEY,
-                aws_secret_access_key=AWS_SECRET,
-                region_name=REGIAO or 'us-east-1'
-            )
+            sts = get_client('sts')
             
             identity = sts.get_caller_identity()
             print(f"\n✅ Conexão AWS bem-sucedida:")
@@ -48,12 +47,7 @@ def check_aws_secrets():
             print(f"User ID: {identity['UserId']}")
             
             # Testar S3
-            s3 = boto3.client(
-                's3',
-                aws_access_key_id=AWS_KEY,
-                aws_secret_access_key=AWS_SECRET,
-                region_name=REGIAO or 'us-east-1'
-            )
+            s3 = get_client('s3')
             
             # Listar buckets disponíveis
             buckets = s3.list_buckets()
@@ -3,12 +3,15 @@
 Script para criar e configurar bucket S3 para o sistema IAverse
 """
 
-import boto3
 import json
 import sys
 import os
 from datetime import datetime
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from config.aws_clients import get_client  # noqa: E402
+
 def create_s3_bucket():
     """Cria e configura o bucket S3 para o sistema IAverse"""
     
@@ -23,12 +26,7 @@ def create_s3_bucket():
         return False
     
     # Configurar cliente S3
-    s3_client = boto3.client(
-        's3',
-        aws_access_key_id=aws_access_key,
-        aws_secret_access_key=aws_secret_key,
-        region_name=aws_region
-    )
+    s3_client = get_client('s3')
     
     bucket_name = 'iaprender-files-2025'
     
@@ -156,7 +154,7 @@ def create_s3_bucket():
 def get_account_id():
     """Obtém o ID da conta AWS"""
     try:
-        sts_client = boto3.client('sts')
+        sts_client = get_client('sts')
         response = sts_client.get_caller_identity()
         return response['Account']
     except:
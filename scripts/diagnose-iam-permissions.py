@@ -1,9 +1,15 @@
 #!/usr/bin/env python3
-import boto3
 import json
 import os
+import sys
+import time
 from datetime import datetime
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from config.aws_clients import get_client  # noqa: E402
+from iaprender_ops.iam_collector import PolicyCollector  # noqa: E402
+
 # Carregar configs do ambiente
 AWS_KEY = os.getenv("AWS_ACCESS_KEY_ID")
 AWS_SECRET = os.getenv("AWS_SECRET_ACCESS_KEY")
@@ -21,20 +27,10 @@ def diagnose_iam_permissions():
     print(f"⏰ Timestamp: {datetime.now()}")
     
     # Cliente IAM
-    iam = boto3.client(
-        'iam',
-        aws_access_key_id=AWS_KEY,
-        aws_secret_access_key=AWS_SECRET,
-        region_name=REGIAO
-    )
+    iam = get_client('iam')
     
     # Cliente STS para verificar identidade atual
-    sts = boto3.client(
-        'sts',
-        aws_access_key_id=AWS_KEY,
-        aws_secret_access_key=AWS_SECRET,
-        region_name=REGIAO
-    )
+    sts = get_client('sts')
     
     print(f"\n🔐 Verificando identidade atual...")
     try:
@@ -53,57 +49,44 @@ def diagnose_iam_permissions():
         print(f"❌ Erro ao verificar identidade: {str(e)}")
         return False
     
-    # Listar políticas anexadas ao usuário
+    # Listar políticas anexadas ao usuário (coleta concorrente com cache por versão)
     print(f"\n📋 Políticas anexadas ao usuário {USERNAME}...")
     try:
-        # Políticas gerenciadas
-        attached_policies = iam.list_attached_user_policies(UserName=USERNAME)
-        print(f"📄 Políticas gerenciadas anexadas: {len(attached_policies['AttachedPolicies'])}")
+        collector = PolicyCollector(iam)
+        started = time.perf_counter()
+        policies = collector.collect(USERNAME)
+        elapsed = time.perf_counter() - started
         
-        for policy in attached_policies['AttachedPolicies']:
-            print(f"  - {policy['PolicyName']} (ARN: {policy['PolicyArn']})")
-            
-            # Obter detalhes da política
-            try:
-                policy_details = iam.get_policy(PolicyArn=policy['PolicyArn'])
-                policy_version = iam.get_policy_version(
-                    PolicyArn=policy['PolicyArn'],
-                    VersionId=policy_details['Policy']['DefaultVersionId']
-                )
-                
-                document = policy_version['PolicyVersion']['Document']
-                print(f"    📋 Documento da política:")
-                print(f"    {json.dumps(document, indent=6)}")
-                
-            except Exception as e:
-                print(f"    ❌ Erro ao obter detalhes: {str(e)}")
+        # Políticas gerenciadas
+        print(f"📄 Políticas gerenciadas anexadas: {len(policies.attached)}")
+        for policy in policies.attached:
+            origem = " (cache)" if policy.cached else ""
+            print(f"  - {policy.name} (ARN: {policy.arn}, versão {policy.version}{origem})")
+            print(f"    📋 Documento da política:")
+            print(f"    {json.dumps(policy.document, indent=6)}")
         
         # Políticas inline
-        inline_policies = iam.list_user_policies(UserName=USERNAME)
-        print(f"📄 Políticas inline: {len(inline_policies['PolicyNames'])}")
-        
-        for policy_name in inline_policies['PolicyNames']:
+        print(f"📄 Políticas inline: {len(policies.inline)}")
+        for policy_name, document in policies.inline.items():
             print(f"  - {policy_name}")
-            
-            try:
-                policy_doc = iam.get_user_policy(UserName=USERNAME, PolicyName=policy_name)
-                print(f"    📋 Documento da política inline:")
-                print(f"    {json.dumps(policy_doc['PolicyDocument'], indent=6)}")
-                
-            except Exception as e:
-                print(f"    ❌ Erro ao obter política inline: {str(e)}")
+            print(f"    📋 Documento da política inline:")
+            print(f"    {json.dumps(document, indent=6)}")
         
         # Grupos do usuário
-        user_groups = iam.get_groups_for_user(UserName=USERNAME)
-        print(f"👥 Grupos do usuário: {len(user_groups['Groups'])}")
+        print(f"👥 Grupos do usuário: {len(policies.groups)}")
+        for group in policies.groups:
+            print(f"  - Grupo: {group.name}")
+            for policy_name in group.inline:
+                print(f"    📄 Política inline do grupo: {policy_name}")
+            for policy in group.attached:
+                print(f"    📄 Política do grupo: {policy.name}")
         
-        for group in user_groups['Groups']:
-            print(f"  - Grupo: {group['GroupName']}")
-            
-            # Políticas do grupo
-            group_policies = iam.list_attached_group_policies(GroupName=group['GroupName'])
-            for policy in group_policies['AttachedPolicies']:
-                print(f"    📄 Política do grupo: {policy['PolicyName']}")
+        for error in policies.errors:
+            print(f"    ❌ Erro ao obter detalhes: {error}")
+        
+        stats = collector.stats
+        print(f"⏱️ Coleta em {elapsed:.2f}s: {stats['calls']} chamadas IAM, "
+              f"{stats['cache_hits']} documento(s) do cache, {stats['cache_misses']} baixado(s)")
                 
     except Exception as e:
         print(f"❌ Erro ao listar políticas: {str(e)}")
@@ -111,12 +94,7 @@ def diagnose_iam_permissions():
     # Testar permissões específicas
     print(f"\n🧪 Testando permissões específicas...")
     
-    s3 = boto3.client(
-        's3',
-        aws_access_key_id=AWS_KEY,
-        aws_secret_access_key=AWS_SECRET,
-        region_name=REGIAO
-    )
+    s3 = get_client('s3')
     
     # Testar s3:ListBucket
     print(f"🔍 Testando s3:ListBucket...")
@@ -187,7 +165,10 @@ def diagnose_iam_permissions():
                 "Resource": [
                     f"arn:aws:s3:::{BUCKET}/bedrock/outputs/*",
                     f"arn:aws:s3:::{BUCKET}/bedrock/inputs/*",
-                    f"arn:aws:s3:::{BUCKET}/bedrock/logs/*"
+                    f"arn:aws:s3:::{BUCKET}/bedrock/logs/*",
+                    f"arn:aws:s3:::{BUCKET}/bedrock/cache/*",
+                    f"arn:aws:s3:::{BUCKET}/bedrock/prompts/*",
+                    f"arn:aws:s3:::{BUCKET}/bedrock/segments/*"
                 ]
             },
             {
@@ -199,7 +180,10 @@ def diagnose_iam_permissions():
                         "s3:prefix": [
                             "bedrock/outputs/*",
                             "bedrock/inputs/*",
-                            "bedrock/logs/*"
+                            "bedrock/logs/*",
+                            "bedrock/cache/*",
+                            "bedrock/prompts/*",
+                            "bedrock/segments/*"
                         ]
                     }
                 }
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Avaliação local de políticas IAM
+
+Exemplos:
+    python scripts/iam-policy-eval.py check s3:PutObject arn:aws:s3:::iaprender-bucket/bedrock/outputs/a.json
+    python scripts/iam-policy-eval.py check s3:ListBucket arn:aws:s3:::iaprender-bucket --context s3:prefix=bedrock/outputs/
+    python scripts/iam-policy-eval.py check bedrock:InvokeModel '*' --policy scripts/iaprender-s3-bedrock-policy.json
+    python scripts/iam-policy-eval.py validate
+    python scripts/iam-policy-eval.py bench --queries 200000
+    python scripts/iam-policy-eval.py capture --user UsuarioBedrock
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from config.aws_clients import get_client  # noqa: E402
+from iaprender_ops.iam_policy import (  # noqa: E402
+    PolicyEvaluator, collect_user_policies, compare_simulation, context_from_entries, load_fixture, simulate
+)
+
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'iaprender_ops', 'fixtures',
+                       'simulate-principal-policy.json')
+USERNAME = "UsuarioBedrock"
+ANONYMOUS_ACCOUNT = "111122223333"
+
+
+def parse_context(pairs):
+    context = {}
+    for pair in pairs or []:
+        key, _, value = pair.partition('=')
+        context.setdefault(key, []).append(value)
+    return context
+
+
+def build_evaluator(args):
+    if args.policy:
+        policies = []
+        for path in args.policy:
+            with open(path, 'r', encoding='utf-8') as f:
+                policies.append((os.path.basename(path), json.load(f)))
+        return PolicyEvaluator(policies)
+    if args.user:
+        return PolicyEvaluator(collect_user_policies(get_client('iam'), args.user))
+    return load_fixture(args.fixture)[0]
+
+
+def check(args):
+    evaluator = build_evaluator(args)
+    decision = evaluator.evaluate(args.action, args.resource, parse_context(args.context))
+    print(f"{'✅' if decision.allowed else '❌'} {decision.action} em {decision.resource}: {decision.decision}")
+    for statement in decision.matched:
+        print(f"    📄 {statement}")
+    return 0 if decision.allowed else 1
+
+
+def validate(args):
+    evaluator, cases = load_fixture(args.fixture)
+    with open(args.fixture, 'r', encoding='utf-8') as f:
+        origin = json.load(f).get('origin', 'simulate_principal_policy')
+    total = sum(len(case['EvaluationResults']) for case in cases)
+    mismatches = compare_simulation(evaluator, cases)
+    print(f"🔍 {total - len(mismatches)}/{total} decisões iguais às esperadas (fixture: {origin})")
+    if origin == 'manual':
+        print(f"  ⚠️ Decisões escritas à mão; regrave com 'capture' para conferir com o simulador da AWS")
+    for mismatch in mismatches:
+        print(f"  ❌ {mismatch['action']} {mismatch['resource']} {mismatch['context']}: "
+              f"esperado {mismatch['expected']}, obtido {mismatch['actual']}")
+    return 1 if mismatches else 0
+
+
+def bench(args):
+    evaluator, cases = load_fixture(args.fixture)
+    queries = [
+        (result['EvalActionName'], result['EvalResourceName'], context_from_entries(case['ContextEntries']))
+        for case in cases for result in case['EvaluationResults']
+    ]
+    print(f"⏱️ {args.queries} consultas sobre {len(evaluator.statements)} statements")
+    for label, memo in (("sem contexto (memoizadas)", True), ("com contexto (avaliação completa)", False)):
+        started = time.perf_counter()
+        for i in range(args.queries):
+            action, resource, context = queries[i % len(queries)]
+            evaluator.evaluate(action, resource, None if memo else context)
+        elapsed = time.perf_counter() - started
+        print(f"  📊 {label}: {args.queries / elapsed:,.0f} consultas/s")
+    return 0
+
+
+def capture(args):
+    """
+    Regrava a fixture com as políticas reais do usuário e as respostas do simulador
+
+    Os casos (ações, recursos e contexto) vêm da fixture atual. O ID da conta
+    é trocado por ANONYMOUS_ACCOUNT em todo o arquivo, de modo que a fixture
+    capturada pode ser versionada.
+    """
+    with open(args.fixture, 'r', encoding='utf-8') as f:
+        fixture = json.load(f)
+    iam = get_client('iam')
+    principal = iam.get_user(UserName=args.user)['User']['Arn']
+    policies = collect_user_policies(iam, args.user)
+
+    cases = []
+    for case in fixture['cases']:
+        actions = sorted({result['EvalActionName'] for result in case['EvaluationResults']})
+        resources = sorted({result['EvalResourceName'] for result in case['EvaluationResults']})
+        context = context_from_entries(case['ContextEntries'])
+        wanted = {(result['EvalActionName'], result['EvalResourceName']) for result in case['EvaluationResults']}
+        results = [
+            {key: result.get(key) for key in ('EvalActionName', 'EvalResourceName', 'EvalDecision',
+                                              'MatchedStatements', 'MissingContextValues')}
+            for result in simulate(iam, principal, actions, resources, context)
+            if (result['EvalActionName'], result.get('EvalResourceName')) in wanted
+        ]
+        cases.append({'ContextEntries': case['ContextEntries'], 'EvaluationResults': results})
+
+    fixture = {
+        'origin': 'simulate_principal_policy',
+        'principal': principal,
+        'policies': [{'source': source, 'document': document} for source, document in policies],
+        'cases': cases
+    }
+    text = json.dumps(fixture, indent=2, ensure_ascii=False, default=str)
+    account = principal.split(':')[4]
+    with open(args.output or args.fixture, 'w', encoding='utf-8') as f:
+        f.write(text.replace(account, ANONYMOUS_ACCOUNT) + '\n')
+    print(f"💾 {sum(len(c['EvaluationResults']) for c in cases)} resultados do simulador salvos em {args.output or args.fixture}")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Avaliação local de políticas IAM")
+    parser.add_argument('--fixture', default=FIXTURE, help="Fixture com políticas e resultados do simulador")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    check_parser = subparsers.add_parser('check', help="Decisão para uma ação e um recurso")
+    check_parser.add_argument('action')
+    check_parser.add_argument('resource', nargs='?', default='*')
+    check_parser.add_argument('--context', action='append', metavar='CHAVE=VALOR')
+    check_parser.add_argument('--policy', action='append', help="Documento de política (JSON); repetível")
+    check_parser.add_argument('--user', help="Carrega as políticas do usuário IAM")
+
+    subparsers.add_parser('validate', help="Confere o avaliador contra a fixture do simulador")
+
+    bench_parser = subparsers.add_parser('bench', help="Consultas por segundo")
+    bench_parser.add_argument('--queries', type=int, default=100000)
+
+    capture_parser = subparsers.add_parser('capture', help="Regrava a fixture a partir do simulate_principal_policy")
+    capture_parser.add_argument('--user', default=USERNAME)
+    capture_parser.add_argument('--output')
+
+    args = parser.parse_args()
+    handlers = {'check': check, 'validate': validate, 'bench': bench, 'capture': capture}
+    sys.exit(handlers[args.command](args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,25 @@
+#!/usr/bin/env python3
+"""
+iaprender-ops: CLI unificada de operação (provision, verify, diagnose, generate, reap, bench)
+
+Exemplos:
+    python scripts/iaprender-ops.py verify
+    python scripts/iaprender-ops.py --json verify --no-probe > verify.json
+    python scripts/iaprender-ops.py diagnose --user UsuarioBedrock
+    python scripts/iaprender-ops.py generate plano_aula --var disciplina=matemática --var "ano=5º ano" \\
+        --var tema=frações --var "duracao=50 minutos" --save
+    python scripts/iaprender-ops.py reap --execute --min-age 6
+    python scripts/iaprender-ops.py --json bench --stub --time-scale 0.01
+
+Códigos de saída: 0 ok, 1 falha, 2 uso incorreto, 3 configuração ausente, 4 permissão negada.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from iaprender_ops.cli import main  # noqa: E402
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,6 @@
+"""
+Ferramentas compartilhadas de operação do IAprender (Bedrock, S3, IAM)
+
+Os módulos deste pacote importam config.*; os scripts que os utilizam
+devem colocar a raiz do repositório no sys.path antes de importá-los.
+"""
@@ -0,0 +1,272 @@
+"""
+Verificação de permissões por simulação (simulate_principal_policy)
+
+A matriz ação × recurso (prefixos do bucket, ARNs de modelos Bedrock) é
+agrupada por serviço e por contexto de condição e cada grupo vira uma
+única chamada ao simulador, que avalia o produto cartesiano de
+ActionNames × ResourceArns. Ações de objeto S3 de todos os prefixos cabem
+em uma chamada; s3:ListBucket precisa de uma chamada por prefixo, porque
+o prefixo vai no contexto (s3:prefix); todas as ações Bedrock de todos os
+modelos em outra.
+
+Uma célula fica indecisa quando o simulador aponta MissingContextValues
+ou quando a simulação falha (ex. sem iam:SimulatePrincipalPolicy, ou
+principal que não é um usuário/role IAM). Só essas células são
+verificadas com sondas reais, que evitam gravar dados: DELETE de uma
+chave inexistente, list_objects_v2 com MaxKeys=1 e invoke_model com
+max_tokens=1; s3:PutObject é a única sonda que grava, e o objeto gravado
+é o alvo do HEAD da sonda de s3:GetObject do mesmo prefixo antes de ser
+apagado. Sem esse objeto, o HEAD vai para uma chave inexistente, e um 403
+deixa a célula indecisa: sem s3:ListBucket irrestrito o S3 responde 403
+também para chaves que não existem.
+"""
+
+import argparse
+import json
+import sys
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from iaprender_ops.iam_policy import ALLOWED, EXPLICIT_DENY, IMPLICIT_DENY, simulate
+
+S3_OBJECT_ACTIONS = ('s3:PutObject', 's3:GetObject', 's3:DeleteObject')
+BEDROCK_ACTIONS = ('bedrock:InvokeModel', 'bedrock:InvokeModelWithResponseStream')
+DEFAULT_PREFIXES = ('bedrock/outputs/', 'bedrock/inputs/', 'bedrock/logs/')
+DEFAULT_MODELS = ('anthropic.claude-3-haiku-20240307-v1:0',)
+UNDECIDED = 'undecided'
+MAX_RESOURCES_PER_CALL = 50
+_ACCESS_DENIED = ('AccessDenied', 'AccessDeniedException', 'Forbidden', '403')
+_NOT_FOUND = ('404', 'NoSuchKey', 'NotFound')
+
+
+@dataclass
+class Cell:
+    row: str
+    action: str
+    resource: str
+    context: Dict[str, str] = field(default_factory=dict)
+    decision: str = UNDECIDED
+    source: str = ''
+    detail: str = ''
+
+    @property
+    def allowed(self) -> bool:
+        return self.decision == ALLOWED
+
+
+def build_matrix(bucket: str, prefixes=DEFAULT_PREFIXES, models=DEFAULT_MODELS, region: str = 'us-east-1',
+                 object_actions=S3_OBJECT_ACTIONS, bedrock_actions=BEDROCK_ACTIONS) -> List[Cell]:
+    """Células (linha, ação, recurso) para os prefixos do bucket e os modelos"""
+    cells = []
+    for prefix in prefixes:
+        cells.extend(Cell(prefix, action, f"arn:aws:s3:::{bucket}/{prefix}*") for action in object_actions)
+        cells.append(Cell(prefix, 's3:ListBucket', f"arn:aws:s3:::{bucket}", {'s3:prefix': prefix}))
+    for model in models:
+        arn = f"arn:aws:bedrock:{region}::foundation-model/{model}"
+        cells.extend(Cell(model, action, arn) for action in bedrock_actions)
+    return cells
+
+
+def _error_code(e: Exception) -> str:
+    return getattr(e, 'response', {}).get('Error', {}).get('Code') or type(e).__name__
+
+
+class AccessVerifier:
+    """
+    Uso:
+        verifier = AccessVerifier(get_client('iam'), principal_arn, s3=..., bedrock_runtime=...)
+        cells = verifier.verify(build_matrix(BUCKET, region=REGIAO))
+        print(format_matrix(cells))
+    """
+
+    def __init__(self, iam, principal_arn: str, bucket: Optional[str] = None, s3=None, bedrock_runtime=None,
+                 probe: bool = True):
+        self.iam = iam
+        self.principal_arn = principal_arn
+        self.bucket = bucket
+        self.s3 = s3
+        self.bedrock_runtime = bedrock_runtime
+        self.probe_enabled = probe
+        self.stats = {'simulate_calls': 0, 'simulated': 0, 'probes': 0}
+        self._written: Dict[str, Tuple[str, Cell]] = {}
+
+    def _groups(self, cells: List[Cell]) -> Dict[Tuple[str, str], List[Cell]]:
+        """Células agrupadas por (serviço, contexto) — cada grupo é um produto ações × recursos"""
+        groups: Dict[Tuple[str, str], List[Cell]] = OrderedDict()
+        for cell in cells:
+            key = (cell.action.split(':')[0], json.dumps(cell.context, sort_keys=True))
+            groups.setdefault(key, []).append(cell)
+        return groups
+
+    def simulate(self, cells: List[Cell]) -> None:
+        for (_, context_json), group in self._groups(cells).items():
+            actions = sorted({cell.action for cell in group})
+            resources = sorted({cell.resource for cell in group})
+            context = json.loads(context_json)
+            for start in range(0, len(resources), MAX_RESOURCES_PER_CALL):
+                chunk = resources[start:start + MAX_RESOURCES_PER_CALL]
+                try:
+                    self.stats['simulate_calls'] += 1
+                    results = simulate(self.iam, self.principal_arn, actions, chunk, context or None)
+                except Exception as e:
+                    for cell in group:
+                        if cell.resource in chunk:
+                            cell.detail = f"simulação falhou: {_error_code(e)}"
+                    continue
+                by_pair = {(r['EvalActionName'], r.get('EvalResourceName')): r for r in results}
+                for cell in group:
+                    result = by_pair.get((cell.action, cell.resource))
+                    if result is None:
+                        continue
+                    if result.get('MissingContextValues'):
+                        cell.detail = f"contexto ausente: {', '.join(result['MissingContextValues'])}"
+                        continue
+                    cell.decision = result['EvalDecision']
+                    cell.source = 'simulação'
+                    self.stats['simulated'] += 1
+
+    def probe(self, cell: Cell) -> None:
+        """Sonda real para uma célula indecisa"""
+        self.stats['probes'] += 1
+        key = f"{cell.row}test-probe-{uuid.uuid4()}.json"
+        try:
+            if cell.action == 's3:ListBucket':
+                self.s3.list_objects_v2(Bucket=self.bucket, Prefix=cell.row, MaxKeys=1)
+            elif cell.action == 's3:GetObject':
+                written = self._written.get(cell.row)
+                try:
+                    self.s3.head_object(Bucket=self.bucket, Key=written[0] if written else key)
+                except Exception as e:
+                    code = _error_code(e)
+                    if written is not None:
+                        raise
+                    if code in _ACCESS_DENIED:
+                        cell.detail = "HEAD de chave inexistente retornou 403 (negado ou ausente sem s3:ListBucket)"
+                        return
+                    # 404 significa que a leitura foi autorizada e a chave não existe
+                    if code not in _NOT_FOUND:
+                        raise
+            elif cell.action == 's3:DeleteObject':
+                self.s3.delete_object(Bucket=self.bucket, Key=key)
+            elif cell.action == 's3:PutObject':
+                self.s3.put_object(Bucket=self.bucket, Key=key, Body=b'{}', ContentType='application/json')
+                self._written[cell.row] = (key, cell)
+            elif cell.action in BEDROCK_ACTIONS:
+                body = json.dumps({
+                    "anthropic_version": "bedrock-2023-05-31",
+                    "max_tokens": 1,
+                    "messages": [{"role": "user", "content": "ok"}]
+                })
+                if cell.action == 'bedrock:InvokeModel':
+                    self.bedrock_runtime.invoke_model(modelId=cell.row, body=body)
+                else:
+                    stream = self.bedrock_runtime.invoke_model_with_response_stream(modelId=cell.row, body=body)
+                    for _ in stream['body']:
+                        pass
+            else:
+                cell.detail = cell.detail or "sem sonda para esta ação"
+                return
+            cell.decision = ALLOWED
+        except Exception as e:
+            code = _error_code(e)
+            if code in _ACCESS_DENIED:
+                cell.decision = IMPLICIT_DENY
+            else:
+                cell.detail = f"sonda falhou: {code}"
+                return
+        cell.source = 'sonda'
+
+    def _remove_written(self) -> None:
+        """Apaga os objetos gravados pelas sondas de s3:PutObject"""
+        for key, cell in self._written.values():
+            try:
+                self.s3.delete_object(Bucket=self.bucket, Key=key)
+            except Exception as e:
+                cell.detail = f"sonda não removida ({key}): {_error_code(e)}"
+        self._written.clear()
+
+    def verify(self, cells: List[Cell]) -> List[Cell]:
+        """Simula tudo e sonda só o que ficou indeciso (PutObject antes de GetObject)"""
+        self.simulate(cells)
+        if self.probe_enabled:
+            undecided = [cell for cell in cells if cell.decision == UNDECIDED]
+            undecided.sort(key=lambda cell: cell.action != 's3:PutObject')
+            try:
+                for cell in undecided:
+                    self.probe(cell)
+            finally:
+                self._remove_written()
+        return cells
+
+
+_SYMBOLS = {ALLOWED: '✅', EXPLICIT_DENY: '⛔', IMPLICIT_DENY: '❌', UNDECIDED: '❓'}
+
+
+def format_matrix(cells: List[Cell]) -> str:
+    """Tabela linha × ação (✅ permitido, ❌ negado, ⛔ Deny explícito, ❓ indeciso; * = sonda)"""
+    actions = list(OrderedDict.fromkeys(cell.action for cell in cells))
+    rows = list(OrderedDict.fromkeys(cell.row for cell in cells))
+    grid = {(cell.row, cell.action): cell for cell in cells}
+    width = max(len(row) for row in rows) + 2
+    headers = [action.split(':')[1] for action in actions]
+    lines = [' ' * width + ' '.join(f"{header:>{max(len(header), 4)}}" for header in headers)]
+    for row in rows:
+        marks = []
+        for action, header in zip(actions, headers):
+            cell = grid.get((row, action))
+            mark = '' if cell is None else _SYMBOLS[cell.decision] + ('*' if cell.source == 'sonda' else ' ')
+            marks.append(f"{mark:>{max(len(header), 4)}}")
+        lines.append(f"{row:<{width}}" + ' '.join(marks))
+    notes = [f"  ℹ️ {cell.row} {cell.action}: {cell.detail}" for cell in cells if cell.detail]
+    return '\n'.join(lines + notes)
+
+
+def verify_access(iam, sts, bucket: str, region: str, s3=None, bedrock_runtime=None, prefixes=DEFAULT_PREFIXES,
+                  models=DEFAULT_MODELS, probe: bool = True, principal_arn: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Verificação completa com relatório impresso (usada pelos scripts de teste de permissão)
+
+    Returns:
+        Dict com cells, ok (tudo permitido) e stats
+    """
+    principal_arn = principal_arn or sts.get_caller_identity()['Arn']
+    cells = build_matrix(bucket, prefixes, models, region)
+    verifier = AccessVerifier(iam, principal_arn, bucket, s3, bedrock_runtime, probe=probe)
+
+    print(f"🧮 Simulando {len(cells)} permissões para {principal_arn}...")
+    verifier.verify(cells)
+    print(format_matrix(cells))
+    stats = verifier.stats
+    print(f"\n📊 {stats['simulated']} decididas em {stats['simulate_calls']} chamada(s) ao simulador, "
+          f"{stats['probes']} sonda(s) real(is)")
+    return {'cells': cells, 'ok': all(cell.allowed for cell in cells), 'stats': stats}
+
+
+def verify_by_simulation(bucket: str, region: str, probe: bool = True) -> bool:
+    """verify_access com os clientes padrão; True se todas as células estão permitidas"""
+    from config.aws_clients import get_client
+
+    result = verify_access(
+        get_client('iam'), get_client('sts'), bucket, region,
+        s3=get_client('s3'), bedrock_runtime=get_client('bedrock-runtime'), probe=probe
+    )
+    return result['ok']
+
+
+def simulation_main(description: str, bucket: str, region: str, legacy: Callable[[], Any]) -> None:
+    """
+    Ponto de entrada dos scripts de teste de permissão
+
+    Com --simulate verifica por simulação (e --no-probe dispensa as sondas
+    reais) e sai com 0/1; sem a opção, executa o teste original `legacy`.
+    """
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument('--simulate', action='store_true',
+                        help="Usa simulate_principal_policy em vez de gravar objetos de teste")
+    parser.add_argument('--no-probe', action='store_true', help="Com --simulate, não faz sondas reais")
+    args = parser.parse_args()
+    if args.simulate:
+        sys.exit(0 if verify_by_simulation(bucket, region, probe=not args.no_probe) else 1)
+    legacy()
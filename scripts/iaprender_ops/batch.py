@@ -0,0 +1,317 @@
+"""
+Modo em lote (Bedrock batch inference) para jobs curriculares grandes
+
+Os pedidos são gravados como JSONL em bedrock/inputs/, um job de
+inferência em lote é submetido e acompanhado por polling, e o JSONL de
+saída em bedrock/outputs/batch/ é lido em streaming e convertido em um
+artefato por registro. O preço por token do modo em lote é menor que o
+do invoke_model síncrono, o que o torna adequado para jobs noturnos.
+
+A API de jobs é abstraída em BatchJobApi; LocalBatchJobApi executa o job
+localmente (com MemoryS3) para testes offline.
+"""
+
+import json
+import os
+import re
+import time
+import uuid
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, List, Mapping, Optional, Tuple
+
+from config.aws_clients import get_client
+from iaprender_ops.generation import GenerationRequest, GenerationResult, build_body, default_artifact, extract_text
+from iaprender_ops.usage import extract_usage
+
+INPUT_PREFIX = 'bedrock/inputs/'
+OUTPUT_PREFIX = 'bedrock/outputs/batch/'
+TERMINAL_STATUSES = {'Completed', 'PartiallyCompleted', 'Failed', 'Stopped', 'Expired'}
+SUCCESS_STATUSES = {'Completed', 'PartiallyCompleted'}
+MIN_RECORDS_PER_JOB = 100
+
+
+@dataclass
+class BatchRecord:
+    """Um registro do JSONL de saída do job"""
+    record_id: str
+    text: Optional[str]
+    response: Optional[Dict[str, Any]]
+    error: Optional[str] = None
+
+
+def _split_s3_uri(uri: str) -> Tuple[str, str]:
+    bucket, _, key = uri.replace('s3://', '', 1).partition('/')
+    return bucket, key
+
+
+class BatchJobApi(ABC):
+    """Interface mínima da API de jobs de inferência em lote"""
+
+    @abstractmethod
+    def submit(self, job_name: str, model_id: str, input_uri: str, output_uri: str) -> str:
+        """Cria o job e retorna seu identificador"""
+
+    @abstractmethod
+    def status(self, job_id: str) -> Tuple[str, Optional[str]]:
+        """Status atual do job e a mensagem associada, se houver"""
+
+
+class BedrockBatchJobApi(BatchJobApi):
+    """create_model_invocation_job / get_model_invocation_job do Bedrock"""
+
+    def __init__(self, role_arn: Optional[str] = None, client=None):
+        self.role_arn = role_arn or os.environ.get('BEDROCK_BATCH_ROLE_ARN')
+        if not self.role_arn:
+            raise ValueError("BEDROCK_BATCH_ROLE_ARN não configurado")
+        self.client = client or get_client('bedrock')
+
+    def submit(self, job_name: str, model_id: str, input_uri: str, output_uri: str) -> str:
+        response = self.client.create_model_invocation_job(
+            jobName=job_name,
+            roleArn=self.role_arn,
+            modelId=model_id,
+            inputDataConfig={'s3InputDataConfig': {'s3Uri': input_uri, 's3InputFormat': 'JSONL'}},
+            outputDataConfig={'s3OutputDataConfig': {'s3Uri': output_uri}}
+        )
+        return response['jobArn']
+
+    def status(self, job_id: str) -> Tuple[str, Optional[str]]:
+        response = self.client.get_model_invocation_job(jobIdentifier=job_id)
+        return response['status'], response.get('message')
+
+
+class LocalBatchJobApi(BatchJobApi):
+    """
+    Substituto local da API de jobs
+
+    Lê o JSONL de entrada do cliente S3 informado, aplica `responder` a cada
+    modelInput e grava o JSONL de saída no mesmo layout do Bedrock
+    ({output_uri}{job_id}/{arquivo}.jsonl.out). O status avança de
+    Submitted para InProgress e Completed a cada consulta.
+    """
+
+    PROGRESSION = ['Submitted', 'InProgress', 'Completed']
+
+    def __init__(self, s3, responder: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None):
+        self.s3 = s3
+        self.responder = responder or _echo_responder
+        self.jobs: Dict[str, Dict[str, Any]] = {}
+
+    def submit(self, job_name: str, model_id: str, input_uri: str, output_uri: str) -> str:
+        job_id = f"local-{job_name}"
+        self.jobs[job_id] = {'input': input_uri, 'output': output_uri, 'step': 0}
+        return job_id
+
+    def status(self, job_id: str) -> Tuple[str, Optional[str]]:
+        job = self.jobs[job_id]
+        job['step'] = min(job['step'] + 1, len(self.PROGRESSION) - 1)
+        status = self.PROGRESSION[job['step']]
+        if status == 'Completed' and not job.get('done'):
+            self._execute(job_id, job)
+        return status, None
+
+    def _execute(self, job_id: str, job: Dict[str, Any]) -> None:
+        in_bucket, in_key = _split_s3_uri(job['input'])
+        out_bucket, out_prefix = _split_s3_uri(job['output'])
+        body = self.s3.get_object(Bucket=in_bucket, Key=in_key)['Body']
+
+        lines = []
+        for line in body.iter_lines():
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            try:
+                record['modelOutput'] = self.responder(record['modelInput'])
+            except Exception as e:
+                record['error'] = {'errorCode': 500, 'errorMessage': str(e)}
+            lines.append(json.dumps(record, ensure_ascii=False))
+
+        out_key = f"{out_prefix.rstrip('/')}/{job_id}/{in_key.rsplit('/', 1)[-1]}.out"
+        self.s3.put_object(Bucket=out_bucket, Key=out_key, Body='\n'.join(lines).encode('utf-8'))
+        job['done'] = True
+
+
+def _echo_responder(model_input: Dict[str, Any]) -> Dict[str, Any]:
+    prompt = model_input['messages'][0]['content']
+    text = f"[resposta local] {prompt.strip()[:80]}"
+    return {
+        'content': [{'type': 'text', 'text': text}],
+        'usage': {'input_tokens': len(prompt) // 4, 'output_tokens': len(text) // 4}
+    }
+
+
+@dataclass
+class BatchJob:
+    """Um job submetido: um por modelo, com nome único por submissão"""
+    name: str
+    model_id: str
+    job_id: str
+    record_ids: List[str]
+
+
+class BatchRunner:
+    """
+    Orquestra um job em lote: grava entradas, submete, acompanha e coleta saídas
+
+    Um job do Bedrock atende um único modelo, então os pedidos são agrupados
+    por `request.model_id` e cada grupo vira um job. Cada submissão recebe
+    um sufixo único, de modo que reexecutar o mesmo `job_name` não mistura
+    saídas de execuções anteriores.
+
+    O Bedrock rejeita jobs com menos de MIN_RECORDS_PER_JOB registros; grupos
+    menores levantam ValueError antes de qualquer gravação, e cabe a quem
+    chama gerar esses pedidos pelo GenerationEngine (sob demanda).
+
+    Uso:
+        runner = BatchRunner(bucket=BUCKET)
+        results = runner.run('planos-2025-03', {'plano-001': GenerationRequest(...), ...})
+    """
+
+    def __init__(self, bucket: str, api: Optional[BatchJobApi] = None, s3=None,
+                 poll_interval: float = 60.0, codec=None, min_records: int = MIN_RECORDS_PER_JOB):
+        self.bucket = bucket
+        self.s3 = s3 or get_client('s3')
+        self.codec = codec
+        self.api = api or BedrockBatchJobApi()
+        self.poll_interval = poll_interval
+        self.min_records = min_records
+
+    def write_inputs(self, job_name: str, requests: Mapping[str, GenerationRequest]) -> str:
+        """Grava os pedidos como JSONL em bedrock/inputs/ e retorna a URI S3"""
+        self._check_size(job_name, len(requests))
+        lines = (
+            json.dumps({'recordId': record_id, 'modelInput': json.loads(build_body(request))}, ensure_ascii=False)
+            for record_id, request in requests.items()
+        )
+        key = f"{INPUT_PREFIX}{job_name}.jsonl"
+        self.s3.put_object(
+            Bucket=self.bucket,
+            Key=key,
+            Body='\n'.join(lines).encode('utf-8'),
+            ContentType='application/jsonl'
+        )
+        return f"s3://{self.bucket}/{key}"
+
+    def submit(self, job_name: str, requests: Mapping[str, GenerationRequest]) -> List[BatchJob]:
+        """Submete um job por modelo e retorna os jobs criados"""
+        if not re.fullmatch(r'[a-zA-Z0-9](-*[a-zA-Z0-9+\-.])*', job_name):
+            raise ValueError(f"Nome de job inválido para o Bedrock: {job_name!r}")
+        by_model: Dict[str, Dict[str, GenerationRequest]] = {}
+        for record_id, request in requests.items():
+            by_model.setdefault(request.model_id, {})[record_id] = request
+        for model_id, group in by_model.items():
+            self._check_size(f"{job_name} ({model_id})", len(group))
+
+        # Nomes de job do Bedrock têm no máximo 63 caracteres
+        run_id = f"{time.strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:6]}"
+        jobs = []
+        for index, (model_id, group) in enumerate(sorted(by_model.items())):
+            suffix = f"-{run_id}" + (f"-{index + 1}" if len(by_model) > 1 else '')
+            name = f"{job_name[:63 - len(suffix)]}{suffix}"
+            input_uri = self.write_inputs(name, group)
+            job_id = self.api.submit(name, model_id, input_uri, self.output_uri(name))
+            jobs.append(BatchJob(name=name, model_id=model_id, job_id=job_id, record_ids=list(group)))
+        return jobs
+
+    def _check_size(self, job_name: str, count: int) -> None:
+        if count < self.min_records:
+            raise ValueError(
+                f"Job {job_name} tem {count} registros; o Bedrock exige no mínimo {self.min_records} "
+                f"(gere esses pedidos sob demanda)"
+            )
+
+    def output_uri(self, job_name: str) -> str:
+        return f"s3://{self.bucket}/{OUTPUT_PREFIX}{job_name}/"
+
+    def wait(self, job_id: str, timeout: Optional[float] = None) -> str:
+        """Faz polling até o job terminar e retorna o status final"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            status, message = self.api.status(job_id)
+            if status in TERMINAL_STATUSES:
+                if status not in SUCCESS_STATUSES:
+                    raise RuntimeError(f"Job {job_id} terminou com status {status}: {message or ''}")
+                return status
+            if deadline is not None and time.monotonic() >= deadline:
+                raise TimeoutError(f"Job {job_id} ainda em {status} após {timeout:.0f}s")
+            time.sleep(self.poll_interval)
+
+    def iter_results(self, job_name: str) -> Iterator[BatchRecord]:
+        """Lê em streaming todos os arquivos .jsonl.out de uma submissão (BatchJob.name)"""
+        prefix = f"{OUTPUT_PREFIX}{job_name}/"
+        paginator = self.s3.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=prefix):
+            for obj in page.get('Contents', []):
+                if not obj['Key'].endswith('.jsonl.out'):
+                    continue
+                body = self.s3.get_object(Bucket=self.bucket, Key=obj['Key'])['Body']
+                for line in body.iter_lines():
+                    if line.strip():
+                        yield _parse_record(json.loads(line))
+
+    def run(self, job_name: str, requests: Mapping[str, GenerationRequest],
+            timeout: Optional[float] = None) -> Dict[str, GenerationResult]:
+        """
+        Executa os jobs (um por modelo) e salva um artefato por registro em `request.key`
+
+        Returns:
+            Dict record_id -> GenerationResult
+        """
+        jobs = self.submit(job_name, requests)
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        results: Dict[str, GenerationResult] = {}
+        for job in jobs:
+            remaining = None if deadline is None else max(deadline - time.monotonic(), 0.0)
+            try:
+                self.wait(job.job_id, timeout=remaining)
+            except (RuntimeError, TimeoutError) as e:
+                for record_id in job.record_ids:
+                    results[record_id] = GenerationResult(request=requests[record_id], error=str(e))
+                continue
+            expected = set(job.record_ids)
+            for record in self.iter_results(job.name):
+                if record.record_id not in expected or record.record_id in results:
+                    continue
+                results[record.record_id] = self._collect(requests[record.record_id], record)
+
+        return {
+            record_id: results.get(record_id) or GenerationResult(request=request, error='Registro ausente na saída do job')
+            for record_id, request in requests.items()
+        }
+
+    def _collect(self, request: GenerationRequest, record: BatchRecord) -> GenerationResult:
+        result = GenerationResult(
+            request=request,
+            text=record.text,
+            response=record.response,
+            error=record.error,
+            usage=extract_usage(record.response) if record.response else {}
+        )
+        if result.ok and request.key:
+            # Uma falha de gravação fica no registro; os demais continuam sendo coletados
+            try:
+                if self.codec is not None:
+                    self.codec.put(request.key, default_artifact(result))
+                else:
+                    self.s3.put_object(
+                        Bucket=self.bucket,
+                        Key=request.key,
+                        Body=json.dumps(default_artifact(result), indent=2, ensure_ascii=False).encode('utf-8'),
+                        ContentType='application/json; charset=utf-8'
+                    )
+            except Exception as e:
+                result.error = f"Falha ao gravar {request.key}: {str(e)}"
+                return result
+            result.s3_key = request.key
+        return result
+
+
+def _parse_record(record: Dict[str, Any]) -> BatchRecord:
+    error = record.get('error')
+    if error:
+        message = error.get('errorMessage') if isinstance(error, dict) else str(error)
+        return BatchRecord(record_id=record['recordId'], text=None, response=None, error=message)
+    output = record.get('modelOutput') or {}
+    return BatchRecord(record_id=record['recordId'], text=extract_text(output), response=output)
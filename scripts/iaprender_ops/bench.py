@@ -0,0 +1,177 @@
+"""
+Benchmark de latência e vazão do Bedrock com varredura de concorrência
+
+Um corpus fixo de prompts (planos de aula, atividades e perguntas curtas)
+é reexecutado em níveis crescentes de concorrência, por modelo, usando
+invoke_model_with_response_stream para medir também o TTFT. Cada nível
+gera p50/p95/p99 de latência e TTFT, tokens de saída por segundo e taxa
+de throttling; o resultado completo é um JSON que pode ser comparado com
+o de uma execução anterior.
+"""
+
+import json
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence
+
+from iaprender_ops.generation import GenerationRequest, is_throttling
+from iaprender_ops.streaming import StreamingGeneration
+
+CORPUS: List[Dict[str, Any]] = [
+    {'tipo': 'plano_aula', 'max_tokens': 800,
+     'prompt': "Crie um plano de aula de matemática para o 5º ano sobre frações equivalentes, "
+               "com objetivos, conteúdos, metodologia, recursos e avaliação alinhados à BNCC."},
+    {'tipo': 'plano_aula', 'max_tokens': 800,
+     'prompt': "Crie um plano de aula de ciências para o 7º ano sobre o ciclo da água, "
+               "com objetivos, conteúdos, metodologia, recursos e avaliação alinhados à BNCC."},
+    {'tipo': 'atividade', 'max_tokens': 600,
+     'prompt': "Crie uma atividade prática de língua portuguesa para o 4º ano sobre substantivos "
+               "próprios e comuns, com 5 exercícios e gabarito."},
+    {'tipo': 'atividade', 'max_tokens': 600,
+     'prompt': "Crie uma atividade de história para o 8º ano sobre a Independência do Brasil, "
+               "com 5 questões de diferentes níveis e gabarito comentado."},
+    {'tipo': 'resposta_curta', 'max_tokens': 150,
+     'prompt': "Explique em uma frase o que é uma fração imprópria."},
+    {'tipo': 'resposta_curta', 'max_tokens': 150,
+     'prompt': "Qual a diferença entre clima e tempo? Responda em duas frases."}
+]
+
+
+@dataclass
+class Sample:
+    """Medição de uma chamada; tempos em segundos"""
+    tipo: str
+    latency: float
+    ttft: Optional[float] = None
+    output_tokens: int = 0
+    throttled: bool = False
+    error: Optional[str] = None
+
+
+def percentile(values: Sequence[float], quantile: float) -> Optional[float]:
+    """Percentil por posição mais próxima (nearest-rank)"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(quantile * len(ordered)) - 1)]
+
+
+def _ms(value: Optional[float]) -> Optional[float]:
+    return None if value is None else round(value * 1000, 1)
+
+
+def summarize(samples: List[Sample], wall_time: float) -> Dict[str, Any]:
+    """Resume as amostras de um nível de concorrência"""
+    ok = [s for s in samples if s.error is None]
+    latencies = [s.latency for s in ok]
+    ttfts = [s.ttft for s in ok if s.ttft is not None]
+    rates = [s.output_tokens / (s.latency - (s.ttft or 0)) for s in ok if s.latency > (s.ttft or 0)]
+    output_tokens = sum(s.output_tokens for s in ok)
+    throttled = sum(1 for s in samples if s.throttled)
+    return {
+        'requests': len(samples),
+        'succeeded': len(ok),
+        'throttle_rate': round(throttled / len(samples), 4) if samples else 0.0,
+        'error_rate': round((len(samples) - len(ok) - throttled) / len(samples), 4) if samples else 0.0,
+        'latency_ms': {f"p{q}": _ms(percentile(latencies, q / 100)) for q in (50, 95, 99)},
+        'ttft_ms': {f"p{q}": _ms(percentile(ttfts, q / 100)) for q in (50, 95, 99)},
+        'output_tokens_per_second': {
+            'per_request_p50': round(percentile(rates, 0.5) or 0.0, 1),
+            'aggregate': round(output_tokens / wall_time, 1) if wall_time else 0.0
+        },
+        'requests_per_second': round(len(ok) / wall_time, 2) if wall_time else 0.0,
+        'wall_time_s': round(wall_time, 3)
+    }
+
+
+class BedrockBenchmark:
+    """
+    Varredura de concorrência sobre o corpus, por modelo
+
+    Uso:
+        bench = BedrockBenchmark(bedrock=bedrock_client())
+        report = bench.run(['anthropic.claude-3-haiku-20240307-v1:0'], levels=[1, 4, 16])
+        bench.write(report, 'bench-bedrock.json')
+
+    Use um cliente sem retries do botocore (generation.bedrock_client): com
+    retries adaptativos os throttles não aparecem como erro e a espera das
+    novas tentativas infla os percentis de latência.
+
+    Com `bedrock=StubBedrock(...)` o benchmark roda sem rede (CI).
+    """
+
+    def __init__(self, bedrock, corpus: Optional[List[Dict[str, Any]]] = None, requests_per_level: int = 24):
+        self.bedrock = bedrock
+        self.corpus = corpus or CORPUS
+        self.requests_per_level = requests_per_level
+
+    def _one(self, model_id: str, item: Dict[str, Any]) -> Sample:
+        request = GenerationRequest(prompt=item['prompt'], max_tokens=item['max_tokens'], model_id=model_id)
+        stream = StreamingGeneration(request, bedrock=self.bedrock)
+        started = time.perf_counter()
+        try:
+            for _ in stream:
+                pass
+        except Exception as e:
+            throttled = is_throttling(e)
+            return Sample(item['tipo'], time.perf_counter() - started, throttled=throttled, error=str(e))
+        return Sample(item['tipo'], stream.metrics.total, stream.metrics.ttft, stream.metrics.output_tokens)
+
+    def run_level(self, model_id: str, concurrency: int) -> Dict[str, Any]:
+        items = [self.corpus[i % len(self.corpus)] for i in range(self.requests_per_level)]
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='bench') as executor:
+            samples = list(executor.map(lambda item: self._one(model_id, item), items))
+        summary = summarize(samples, time.perf_counter() - started)
+        summary['by_type'] = {
+            tipo: summarize([s for s in samples if s.tipo == tipo], 0.0)['latency_ms']
+            for tipo in sorted({s.tipo for s in samples})
+        }
+        return summary
+
+    def run(self, models: Sequence[str], levels: Sequence[int], backend: str = 'bedrock') -> Dict[str, Any]:
+        report: Dict[str, Any] = {
+            'started_at': datetime.now(timezone.utc).isoformat(),
+            'backend': backend,
+            'requests_per_level': self.requests_per_level,
+            'corpus_size': len(self.corpus),
+            'models': {}
+        }
+        for model_id in models:
+            report['models'][model_id] = {}
+            for level in levels:
+                summary = self.run_level(model_id, level)
+                report['models'][model_id][str(level)] = summary
+                print(f"  {model_id} c={level:<3} p50={summary['latency_ms']['p50']}ms "
+                      f"p95={summary['latency_ms']['p95']}ms ttft50={summary['ttft_ms']['p50']}ms "
+                      f"tok/s={summary['output_tokens_per_second']['aggregate']} "
+                      f"throttle={summary['throttle_rate']:.0%}")
+        return report
+
+    @staticmethod
+    def write(report: Dict[str, Any], path: str) -> None:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Variação relativa de p95 e vazão agregada entre duas execuções (mesmo modelo e nível)"""
+    rows = []
+    for model_id, levels in current['models'].items():
+        for level, summary in levels.items():
+            before = baseline.get('models', {}).get(model_id, {}).get(level)
+            if not before:
+                continue
+            row = {'model_id': model_id, 'concurrency': int(level)}
+            for name, old, new in (
+                ('p95_ms', before['latency_ms']['p95'], summary['latency_ms']['p95']),
+                ('tokens_per_second', before['output_tokens_per_second']['aggregate'],
+                 summary['output_tokens_per_second']['aggregate'])
+            ):
+                row[name] = {'before': old, 'after': new,
+                             'change': round((new - old) / old, 3) if old and new is not None else None}
+            rows.append(row)
+    return rows
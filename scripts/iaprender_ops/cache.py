@@ -0,0 +1,210 @@
+"""
+Cache exato de prompt/resposta para gerações do Bedrock
+
+A chave é o SHA-256 de (modelId, prompt normalizado, max_tokens, parâmetros).
+O primeiro nível é um LRU em memória com limite de tamanho e TTL; o segundo
+é persistente, em disco local ou sob um prefixo do S3. Os dois níveis
+expõem métricas de acertos e falhas.
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import unicodedata
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+CACHE_PREFIX = 'bedrock/cache/'
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Normaliza Unicode (NFC) e colapsa espaços em branco"""
+    return _WHITESPACE_RE.sub(' ', unicodedata.normalize('NFC', prompt)).strip()
+
+
+def cache_key(model_id: str, prompt: str, max_tokens: int, params: Optional[Dict[str, Any]] = None) -> str:
+    """Chave determinística do cache para um pedido de geração"""
+    canonical = json.dumps(
+        {
+            'model_id': model_id,
+            'prompt': normalize_prompt(prompt),
+            'max_tokens': max_tokens,
+            'params': {k: v for k, v in (params or {}).items() if v is not None}
+        },
+        sort_keys=True,
+        ensure_ascii=False,
+        separators=(',', ':')
+    )
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+class CacheTier(ABC):
+    """Nível de cache; entradas são dicts serializáveis em JSON"""
+
+    name = 'base'
+
+    def __init__(self, ttl: Optional[float] = None):
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    def _expired(self, entry: Dict[str, Any]) -> bool:
+        return self.ttl is not None and time.time() - entry.get('created_at', 0) > self.ttl
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._load(key)
+        if entry is None or self._expired(entry):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry
+
+    @abstractmethod
+    def set(self, key: str, entry: Dict[str, Any]) -> None:
+        """Grava (ou substitui) a entrada da chave"""
+
+    @abstractmethod
+    def _load(self, key: str) -> Optional[Dict[str, Any]]:
+        """Entrada da chave sem verificar o TTL, ou None"""
+
+    def metrics(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {'hits': self.hits, 'misses': self.misses, 'hit_rate': round(self.hits / total, 3) if total else 0.0}
+
+
+class MemoryTier(CacheTier):
+    """LRU em memória limitado por número de entradas e TTL"""
+
+    name = 'memory'
+
+    def __init__(self, max_entries: int = 1024, ttl: Optional[float] = 3600.0):
+        super().__init__(ttl)
+        self.max_entries = max_entries
+        self.evictions = 0
+        self._entries: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _load(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if self._expired(entry):
+                    del self._entries[key]
+                    return None
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: str, entry: Dict[str, Any]) -> None:
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def metrics(self) -> Dict[str, Any]:
+        return {**super().metrics(), 'entries': len(self._entries), 'evictions': self.evictions}
+
+
+class DiskTier(CacheTier):
+    """Nível persistente em disco: um arquivo JSON por chave"""
+
+    name = 'disk'
+
+    def __init__(self, directory: str, ttl: Optional[float] = None):
+        super().__init__(ttl)
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def _load(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._path(key), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def set(self, key: str, entry: Dict[str, Any]) -> None:
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+
+class S3Tier(CacheTier):
+    """
+    Nível persistente no S3 sob `prefix` (padrão bedrock/cache/)
+
+    Sem s3:ListBucket incondicional o S3 responde 403 (não 404) para uma
+    chave inexistente; por isso AccessDenied na leitura conta como falha do
+    cache. Uma falta real de permissão aparece na gravação (PutObject).
+    """
+
+    name = 's3'
+
+    def __init__(self, s3, bucket: str, prefix: str = CACHE_PREFIX, ttl: Optional[float] = None):
+        super().__init__(ttl)
+        self.s3 = s3
+        self.bucket = bucket
+        self.prefix = prefix
+
+    def _load(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            response = self.s3.get_object(Bucket=self.bucket, Key=f"{self.prefix}{key}.json")
+        except Exception as e:
+            if getattr(e, 'response', {}).get('Error', {}).get('Code') in ('NoSuchKey', '404', 'AccessDenied', '403'):
+                return None
+            raise
+        return json.loads(response['Body'].read())
+
+    def set(self, key: str, entry: Dict[str, Any]) -> None:
+        self.s3.put_object(
+            Bucket=self.bucket,
+            Key=f"{self.prefix}{key}.json",
+            Body=json.dumps(entry, ensure_ascii=False).encode('utf-8'),
+            ContentType='application/json; charset=utf-8'
+        )
+
+
+class GenerationCache:
+    """
+    Cache de dois níveis; acertos no nível persistente são promovidos à memória
+
+    Uso:
+        cache = GenerationCache(MemoryTier(), DiskTier('.cache/bedrock'))
+        engine = GenerationEngine(bucket=BUCKET, cache=cache)
+    """
+
+    def __init__(self, memory: Optional[MemoryTier] = None, persistent: Optional[CacheTier] = None):
+        self.memory = memory if memory is not None else MemoryTier()
+        self.persistent = persistent
+        self.bypassed = 0
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self.memory.get(key)
+        if entry is None and self.persistent is not None:
+            entry = self.persistent.get(key)
+            if entry is not None:
+                self.memory.set(key, entry)
+        return entry
+
+    def set(self, key: str, entry: Dict[str, Any]) -> None:
+        entry.setdefault('created_at', time.time())
+        self.memory.set(key, entry)
+        if self.persistent is not None:
+            self.persistent.set(key, entry)
+
+    def metrics(self) -> Dict[str, Any]:
+        metrics = {'memory': self.memory.metrics(), 'bypassed': self.bypassed}
+        if self.persistent is not None:
+            metrics[self.persistent.name] = self.persistent.metrics()
+        return metrics
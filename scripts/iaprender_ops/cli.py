@@ -0,0 +1,462 @@
+"""
+CLI unificada de operação (iaprender-ops)
+
+Subcomandos: provision, verify, diagnose, generate, reap e bench. Todos
+usam a mesma configuração (SecretsManager, com --bucket/--region por cima)
+e os mesmos clientes compartilhados de config.aws_clients. Cada
+subcomando monta uma lista de passos com dependências, executada como DAG
+(iaprender_ops.dag): verificações independentes rodam em paralelo.
+
+Saída: texto por padrão; com --json, um único documento JSON no stdout com
+status, tempo e resultado de cada passo (mensagens de progresso vão para o
+stderr). Códigos de saída:
+
+    0  tudo certo
+    1  algum passo falhou
+    2  uso incorreto (argparse, variáveis do template)
+    3  configuração ausente ou inválida (ex. bucket)
+    4  permissão negada em alguma verificação
+"""
+
+import argparse
+import contextlib
+import json
+import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, replace
+from datetime import timedelta
+from typing import Any, Dict, List, Optional
+
+from iaprender_ops.dag import FAILED, OK, SKIPPED, Step, StepFailed, run_dag
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_USAGE = 2
+EXIT_CONFIG = 3
+EXIT_DENIED = 4
+
+FOLDERS = (
+    'documentos/', 'imagens/', 'videos/', 'audios/', 'planos-aula/', 'atividades/', 'temp/',
+    'bedrock/outputs/', 'bedrock/inputs/', 'bedrock/logs/',
+    'bedrock/outputs/planos-aula/', 'bedrock/outputs/atividades/', 'bedrock/outputs/analises/'
+)
+DEFAULT_USER = 'UsuarioBedrock'
+
+
+class OpsContext:
+    """Configuração e clientes compartilhados entre os passos de um subcomando"""
+
+    def __init__(self, bucket: Optional[str], region: str, workers: int = 8):
+        self.bucket = bucket
+        self.region = region
+        self.workers = workers
+
+    @classmethod
+    def from_args(cls, args) -> 'OpsContext':
+        """
+        Contexto a partir dos argumentos e do snapshot de configuração
+
+        Falhas ao montar o snapshot viram ConfigError; com --stub (sem rede)
+        o subcomando segue só com os argumentos.
+        """
+        try:
+            from config.secrets import SecretsManager
+
+            aws = SecretsManager.snapshot().aws
+        except Exception as e:
+            if getattr(args, 'stub', False):
+                return cls(args.bucket, args.region or 'us-east-1', args.workers)
+            raise ConfigError(f"Configuração inválida: {str(e)}") from e
+        return cls(args.bucket or aws.s3_bucket, args.region or aws.region, args.workers)
+
+    def client(self, service: str):
+        from config.aws_clients import get_client
+
+        return get_client(service, self.region)
+
+    def preload(self, services) -> None:
+        from config.aws_clients import preload
+
+        preload(services, self.region)
+
+    def require_bucket(self) -> str:
+        if not self.bucket:
+            raise ConfigError("Bucket não configurado (S3_BUCKET_NAME ou --bucket)")
+        return self.bucket
+
+
+class ConfigError(Exception):
+    """Configuração insuficiente para executar o subcomando"""
+
+
+class UsageError(Exception):
+    """Argumentos válidos para o argparse, mas insuficientes para o subcomando"""
+
+
+def _error_code(e: Exception) -> Optional[str]:
+    return getattr(e, 'response', {}).get('Error', {}).get('Code')
+
+
+# Passos compartilhados
+
+def step_identity(ctx: OpsContext) -> Step:
+    def run(_):
+        identity = ctx.client('sts').get_caller_identity()
+        return {'account': identity['Account'], 'arn': identity['Arn']}
+    return Step('identity', run)
+
+
+def step_bucket(ctx: OpsContext) -> Step:
+    def run(_):
+        ctx.client('s3').head_bucket(Bucket=ctx.bucket)
+        return {'bucket': ctx.bucket}
+    return Step('bucket', run)
+
+
+# Subcomandos
+
+def provision_steps(ctx: OpsContext, args) -> List[Step]:
+    bucket = ctx.require_bucket()
+
+    def ensure_bucket(_):
+        s3 = ctx.client('s3')
+        try:
+            s3.head_bucket(Bucket=bucket)
+            return {'bucket': bucket, 'created': False}
+        except Exception as e:
+            if _error_code(e) not in ('404', 'NoSuchBucket', 'NotFound'):
+                raise
+        if ctx.region == 'us-east-1':
+            s3.create_bucket(Bucket=bucket)
+        else:
+            s3.create_bucket(Bucket=bucket, CreateBucketConfiguration={'LocationConstraint': ctx.region})
+        return {'bucket': bucket, 'created': True}
+
+    def versioning(_):
+        ctx.client('s3').put_bucket_versioning(Bucket=bucket, VersioningConfiguration={'Status': 'Enabled'})
+        return {'status': 'Enabled'}
+
+    def folders(_):
+        s3 = ctx.client('s3')
+
+        def put(folder):
+            s3.put_object(Bucket=bucket, Key=folder, Body=b'', ContentType='application/x-directory')
+        with ThreadPoolExecutor(max_workers=ctx.workers) as executor:
+            list(executor.map(put, FOLDERS))
+        return {'folders': len(FOLDERS)}
+
+    return [
+        step_identity(ctx),
+        Step('bucket', ensure_bucket),
+        Step('versioning', versioning, after=('bucket',)),
+        Step('folders', folders, after=('bucket',)),
+    ]
+
+
+def _matrix_result(cells) -> Dict[str, Any]:
+    return {
+        'allowed': sum(1 for cell in cells if cell.allowed),
+        'total': len(cells),
+        'cells': [asdict(cell) for cell in cells]
+    }
+
+
+def verify_steps(ctx: OpsContext, args) -> List[Step]:
+    from iaprender_ops.access_matrix import DEFAULT_PREFIXES, AccessVerifier, build_matrix
+
+    ctx.require_bucket()
+    prefixes = args.prefix or list(DEFAULT_PREFIXES)
+
+    def models(_):
+        response = ctx.client('bedrock').list_foundation_models(byOutputModality='TEXT')
+        return {'models': len(response.get('modelSummaries', []))}
+
+    def access(inputs):
+        verifier = AccessVerifier(ctx.client('iam'), inputs['identity']['arn'], ctx.bucket, ctx.client('s3'),
+                                  ctx.client('bedrock-runtime'), probe=not args.no_probe)
+        cells = verifier.verify(build_matrix(ctx.bucket, prefixes, region=ctx.region))
+        result = dict(_matrix_result(cells), stats=verifier.stats)
+        if result['allowed'] < result['total']:
+            raise StepFailed(f"{result['total'] - result['allowed']} permissão(ões) negada(s) ou indecisa(s)",
+                             result, EXIT_DENIED)
+        return result
+
+    def listing(prefix):
+        def run(_):
+            response = ctx.client('s3').list_objects_v2(Bucket=ctx.bucket, Prefix=prefix, MaxKeys=1)
+            return {'prefix': prefix, 'has_objects': response.get('KeyCount', 0) > 0}
+        return run
+
+    steps = [step_identity(ctx), step_bucket(ctx), Step('bedrock-models', models),
+             Step('access-matrix', access, after=('identity',))]
+    steps.extend(Step(f"list:{prefix}", listing(prefix), after=('bucket',)) for prefix in prefixes)
+    return steps
+
+
+def diagnose_steps(ctx: OpsContext, args) -> List[Step]:
+    from iaprender_ops.access_matrix import DEFAULT_PREFIXES, build_matrix
+    from iaprender_ops.iam_collector import PolicyCollector
+    from iaprender_ops.iam_policy import PolicyEvaluator
+
+    ctx.require_bucket()
+
+    def policies(_):
+        collector = PolicyCollector(ctx.client('iam'), workers=ctx.workers)
+        collected = collector.collect(args.user)
+        return {
+            'documents': collected.documents(),
+            'inline': sorted(collected.inline),
+            'attached': [policy.arn for policy in collected.attached],
+            'groups': [group.name for group in collected.groups],
+            'errors': collected.errors,
+            'stats': collector.stats
+        }
+
+    def evaluation(inputs):
+        evaluator = PolicyEvaluator(inputs['policies']['documents'])
+        cells = build_matrix(ctx.bucket, args.prefix or DEFAULT_PREFIXES, region=ctx.region)
+        for cell in cells:
+            decision = evaluator.evaluate(cell.action, cell.resource, cell.context)
+            cell.decision, cell.source, cell.detail = decision.decision, 'local', ', '.join(decision.matched)
+        result = _matrix_result(cells)
+        if result['allowed'] < result['total']:
+            raise StepFailed(f"{result['total'] - result['allowed']} permissão(ões) não concedida(s) pelas políticas",
+                             result, EXIT_DENIED)
+        return result
+
+    return [step_identity(ctx), step_bucket(ctx), Step('policies', policies),
+            Step('evaluation', evaluation, after=('policies',))]
+
+
+def generate_steps(ctx: OpsContext, args) -> List[Step]:
+    import asyncio
+
+    from iaprender_ops.cache import DiskTier, GenerationCache, MemoryTier
+    from iaprender_ops.codec import ArtifactCodec
+    from iaprender_ops.converse import ATIVIDADE, PLANO_AULA
+    from iaprender_ops.generation import GenerationEngine, GenerationRequest, bedrock_client
+    from iaprender_ops.router import ModelRouter
+    from iaprender_ops.semantic_cache import TitanEmbedder, create_semantic_cache
+    from iaprender_ops.usage import S3LedgerSink, TokenLedger
+
+    templates = {'plano_aula': (PLANO_AULA, 'planos-aula'), 'atividade': (ATIVIDADE, 'atividades')}
+    template, folder = templates[args.template]
+    malformed = [pair for pair in args.var or [] if '=' not in pair]
+    if malformed:
+        raise UsageError(f"--var espera NOME=VALOR: {', '.join(malformed)}")
+    variables = dict(pair.partition('=')[::2] for pair in args.var or [])
+    missing = [name for name in template.variables if name not in variables]
+    if missing:
+        raise UsageError(f"Variáveis ausentes para {args.template}: {', '.join(missing)} (use --var nome=valor)")
+    if args.save or args.ledger:
+        ctx.require_bucket()
+
+    def generate(_):
+        bedrock = bedrock_client(ctx.region)
+        s3 = ctx.client('s3') if args.save or args.ledger else None
+        kwargs = {'max_tokens': args.max_tokens, 'artifact': dict(variables)}
+        if args.model:
+            kwargs['model_id'] = args.model
+        if args.escola:
+            kwargs['escola_id'] = args.escola
+        if args.usuario:
+            kwargs['usuario_id'] = args.usuario
+        if args.save:
+            kwargs['key'] = f"bedrock/outputs/{folder}/{args.template}-{uuid.uuid4()}.json"
+        request = GenerationRequest.from_template(template, variables, **kwargs)
+        cache = GenerationCache(MemoryTier(), DiskTier(args.cache)) if args.cache else None
+        semantic_cache = (create_semantic_cache(TitanEmbedder(bedrock=bedrock), args.semantic_cache)
+                          if args.semantic_cache else None)
+        ledger = TokenLedger(S3LedgerSink(s3, ctx.bucket).write) if args.ledger else None
+        router = ModelRouter() if args.route else None
+        engine = GenerationEngine(bucket=ctx.bucket, bedrock=bedrock, s3=s3,
+                                  codec=ArtifactCodec(s3, ctx.bucket) if args.save else None,
+                                  cache=cache, semantic_cache=semantic_cache, ledger=ledger, router=router)
+        try:
+            result, = asyncio.run(engine.run_many([request]))
+        finally:
+            engine.close()
+            if ledger is not None:
+                ledger.flush()
+        if not result.ok:
+            raise StepFailed(result.error)
+        output = {'model': result.request.model_id, 'text': result.text, 'latency_s': round(result.latency, 3),
+                  'cached': result.cached, 's3_key': result.s3_key, 'usage': result.usage}
+        if cache is not None:
+            output['cache'] = cache.metrics()
+        if semantic_cache is not None:
+            output['semantic_cache'] = semantic_cache.metrics()
+        if router is not None:
+            output['route'] = router.decisions[-1].reason if router.decisions else None
+        return output
+
+    return [Step('generate', generate)]
+
+
+def reap_steps(ctx: OpsContext, args) -> List[Step]:
+    from iaprender_ops.reaper import DEFAULT_RULES, Reaper
+
+    ctx.require_bucket()
+    rules = [rule for rule in DEFAULT_RULES if not args.rule or rule.name in args.rule]
+    if args.min_age is not None:
+        rules = [replace(rule, min_age=timedelta(hours=args.min_age)) for rule in rules]
+
+    def reap(_):
+        summary = Reaper(ctx.client('s3'), ctx.bucket, rules, workers=ctx.workers, dry_run=not args.execute).run()
+        errors = sum(len(report['errors']) for report in summary['rules'].values())
+        if errors:
+            raise StepFailed(f"{errors} objeto(s) não apagado(s)", summary)
+        return summary
+
+    return [Step('reap', reap)]
+
+
+def bench_steps(ctx: OpsContext, args) -> List[Step]:
+    from iaprender_ops.bench import BedrockBenchmark
+    from iaprender_ops.generation import DEFAULT_MODEL_ID, bedrock_client
+
+    def bench(_):
+        if args.stub:
+            from iaprender_ops.stubs import StubBedrock
+
+            bedrock, backend = StubBedrock(time_scale=args.time_scale), 'stub'
+        else:
+            bedrock, backend = bedrock_client(ctx.region), 'bedrock'
+        runner = BedrockBenchmark(bedrock, requests_per_level=args.requests)
+        models = (args.models or DEFAULT_MODEL_ID).split(',')
+        return runner.run(models, [int(level) for level in args.levels.split(',')], backend=backend)
+
+    return [Step('bench', bench)]
+
+
+# Serviços de cada subcomando: só os modelos deles são carregados, em segundo plano
+SERVICES = {
+    'provision': ('s3', 'sts'),
+    'verify': ('sts', 's3', 'iam', 'bedrock', 'bedrock-runtime'),
+    'diagnose': ('sts', 'iam', 's3'),
+    'generate': ('bedrock-runtime', 's3'),
+    'reap': ('s3',),
+    'bench': ('bedrock-runtime',),
+}
+
+COMMANDS = {
+    'provision': provision_steps,
+    'verify': verify_steps,
+    'diagnose': diagnose_steps,
+    'generate': generate_steps,
+    'reap': reap_steps,
+    'bench': bench_steps,
+}
+
+
+def build_parser() -> argparse.ArgumentParser:
+    from iaprender_ops.reaper import DEFAULT_RULES
+
+    parser = argparse.ArgumentParser(prog='iaprender-ops', description="Operação do IAprender (S3, Bedrock, IAM)")
+    parser.add_argument('--bucket', help="Bucket (padrão: S3_BUCKET_NAME)")
+    parser.add_argument('--region', help="Região (padrão: AWS_REGION)")
+    parser.add_argument('--json', action='store_true', help="Saída JSON no stdout")
+    parser.add_argument('--workers', type=int, default=8, help="Passos/chamadas em paralelo")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    subparsers.add_parser('provision', help="Cria/configura o bucket e a estrutura de pastas")
+
+    verify = subparsers.add_parser('verify', help="Verifica acesso a S3, Bedrock e a matriz de permissões")
+    verify.add_argument('--prefix', action='append', help="Prefixo a verificar; repetível")
+    verify.add_argument('--no-probe', action='store_true', help="Não faz sondas reais para células indecisas")
+
+    diagnose = subparsers.add_parser('diagnose', help="Coleta e avalia localmente as políticas IAM do usuário")
+    diagnose.add_argument('--user', default=DEFAULT_USER)
+    diagnose.add_argument('--prefix', action='append', help="Prefixo a avaliar; repetível")
+
+    generate = subparsers.add_parser('generate', help="Gera um plano de aula ou atividade")
+    generate.add_argument('template', choices=['plano_aula', 'atividade'])
+    generate.add_argument('--var', action='append', metavar='NOME=VALOR', help="Variável do template; repetível")
+    model = generate.add_mutually_exclusive_group()
+    model.add_argument('--model')
+    model.add_argument('--route', action='store_true', help="Escolhe o modelo pelo roteador (latência e custo)")
+    generate.add_argument('--max-tokens', type=int, default=800)
+    generate.add_argument('--save', action='store_true', help="Salva o artefato em bedrock/outputs/")
+    generate.add_argument('--cache', nargs='?', const='.cache/bedrock', metavar='DIR',
+                          help="Cache exato de respostas em disco (padrão: .cache/bedrock)")
+    generate.add_argument('--semantic-cache', nargs='?', const='.cache/semantic', metavar='DIR',
+                          help="Cache semântico (requer numpy; padrão: .cache/semantic)")
+    generate.add_argument('--ledger', action='store_true', help="Registra o consumo de tokens em bedrock/logs/usage/")
+    generate.add_argument('--escola', help="escola_id registrado no ledger")
+    generate.add_argument('--usuario', help="usuario_id registrado no ledger")
+
+    reap = subparsers.add_parser('reap', help="Remove objetos de teste e temp/ (dry-run por padrão)")
+    reap.add_argument('--execute', action='store_true')
+    reap.add_argument('--rule', action='append', choices=[rule.name for rule in DEFAULT_RULES],
+                      help="Aplica só a(s) regra(s) indicada(s)")
+    reap.add_argument('--min-age', type=float, help="Idade mínima em horas")
+
+    bench = subparsers.add_parser('bench', help="Benchmark de latência/vazão do Bedrock")
+    bench.add_argument('--models', help="IDs de modelo separados por vírgula")
+    bench.add_argument('--levels', default='1,4,16')
+    bench.add_argument('--requests', type=int, default=24)
+    bench.add_argument('--stub', action='store_true', help="Bedrock simulado (sem rede)")
+    bench.add_argument('--time-scale', type=float, default=1.0)
+    return parser
+
+
+def exit_code(steps: Dict[str, Dict[str, Any]]) -> int:
+    codes = [entry.get('exit_code', EXIT_FAILED) for entry in steps.values() if entry['status'] == FAILED]
+    return max(codes) if codes else EXIT_OK
+
+
+def _brief(result: Any) -> str:
+    if not isinstance(result, dict):
+        return ''
+    scalars = [f"{key}={value}" for key, value in result.items() if isinstance(value, (str, int, float, bool))]
+    return ', '.join(scalars[:5])
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    symbols = {OK: '✅', FAILED: '❌', SKIPPED: '⏭️'}
+    print(f"🔧 iaprender-ops {report['command']} ({report['bucket'] or '-'}, {report['region']})")
+    for name, entry in report['steps'].items():
+        line = f"  {symbols[entry['status']]} {name} ({entry['seconds']:.2f}s)"
+        detail = entry.get('error') or _brief(entry.get('result'))
+        print(f"{line}: {detail}" if detail else line)
+    print(f"\n📊 {report['seconds']:.2f}s, código de saída {report['exit_code']}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    started = time.perf_counter()
+    try:
+        ctx = OpsContext.from_args(args)
+        steps = COMMANDS[args.command](ctx, args)
+        if not getattr(args, 'stub', False):
+            ctx.preload(SERVICES[args.command])
+    except (ConfigError, UsageError) as e:
+        code = EXIT_USAGE if isinstance(e, UsageError) else EXIT_CONFIG
+        if args.json:
+            print(json.dumps({'command': args.command, 'ok': False, 'exit_code': code, 'error': str(e)}))
+        else:
+            print(f"❌ {str(e)}", file=sys.stderr)
+        return code
+
+    # Com --json o stdout é reservado ao documento final
+    progress = contextlib.redirect_stdout(sys.stderr) if args.json else contextlib.nullcontext()
+    with progress:
+        results = run_dag(steps, workers=args.workers)
+
+    code = exit_code(results)
+    report = {
+        'command': args.command,
+        'ok': code == EXIT_OK,
+        'exit_code': code,
+        'bucket': ctx.bucket,
+        'region': ctx.region,
+        'seconds': round(time.perf_counter() - started, 3),
+        'steps': results
+    }
+    if args.json:
+        print(json.dumps(report, indent=2, ensure_ascii=False, default=str))
+    else:
+        print_report(report)
+    return code
@@ -0,0 +1,254 @@
+"""
+Codec de armazenamento dos artefatos JSON no S3
+
+- JSON compacto (orjson quando disponível, senão json sem indentação)
+- compressão zstd (se o pacote zstandard estiver instalado) ou gzip, com o
+  Content-Encoding correspondente
+- prompts gerados por um PromptTemplate conhecido não são gravados: o
+  artefato já traz `prompt_template` (nome, hash do sistema e variáveis)
+  e o prompt é renderizado de novo na leitura
+- os demais prompts longos são gravados uma única vez em
+  bedrock/prompts/{sha256}.txt e referenciados no artefato por `prompt_ref`
+
+A leitura por ArtifactCodec.get() é transparente: descomprime pelo
+Content-Encoding, decodifica e reconstrói `prompt` a partir de
+`prompt_template` ou `prompt_ref`. Objetos antigos (JSON indentado, sem metadado `codec`) são lidos
+normalmente e, com migrate=True, regravados no formato novo na primeira
+leitura, condicionados ao ETag lido.
+"""
+
+import gzip
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+from iaprender_ops.converse import TEMPLATES, PromptTemplate
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+PROMPTS_PREFIX = 'bedrock/prompts/'
+CODEC_VERSION = 'json1'
+CONTENT_TYPE = 'application/json; charset=utf-8'
+REF_FIELDS = ('prompt',)
+MISSING_CODES = ('404', 'NoSuchKey', 'NotFound', '403', 'AccessDenied')
+
+
+def dumps(doc: Any) -> bytes:
+    """JSON compacto em UTF-8"""
+    if orjson is not None:
+        return orjson.dumps(doc, default=str)
+    return json.dumps(doc, ensure_ascii=False, separators=(',', ':'), default=str).encode('utf-8')
+
+
+def loads(data: bytes) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def compress(data: bytes, encoding: Optional[str], level: Optional[int] = None) -> bytes:
+    if encoding == 'zstd':
+        return zstandard.ZstdCompressor(level=level or 6).compress(data)
+    if encoding == 'gzip':
+        return gzip.compress(data, compresslevel=level or 6, mtime=0)
+    return data
+
+
+def decompress(data: bytes, encoding: Optional[str]) -> bytes:
+    if encoding == 'zstd':
+        if zstandard is None:
+            raise RuntimeError("Objeto comprimido com zstd, mas o pacote zstandard não está instalado")
+        return zstandard.ZstdDecompressor().decompressobj().decompress(data)
+    if encoding == 'gzip':
+        return gzip.decompress(data)
+    return data
+
+
+def prompt_hash(prompt: str) -> str:
+    return hashlib.sha256(prompt.encode('utf-8')).hexdigest()
+
+
+class PromptStore:
+    """Prompts gravados uma vez por hash; leituras com cache LRU em memória"""
+
+    def __init__(self, s3, bucket: str, prefix: str = PROMPTS_PREFIX, max_entries: int = 256):
+        self.s3 = s3
+        self.bucket = bucket
+        self.prefix = prefix
+        self.max_entries = max_entries
+        self._known: set = set()
+        self._cache: 'OrderedDict[str, str]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def key(self, digest: str) -> str:
+        return f"{self.prefix}{digest}.txt"
+
+    def ref(self, prompt: str) -> str:
+        """
+        Garante que o prompt está gravado e retorna seu hash
+
+        Sem s3:ListBucket irrestrito o S3 responde 403 (e não 404) ao HEAD de
+        uma chave inexistente; o 403 é tratado como ausência e o prompt é
+        gravado (a chave é o hash do conteúdo, então regravar é inócuo).
+        """
+        digest = prompt_hash(prompt)
+        if digest in self._known:
+            return digest
+        try:
+            self.s3.head_object(Bucket=self.bucket, Key=self.key(digest))
+        except Exception as e:
+            if getattr(e, 'response', {}).get('Error', {}).get('Code') not in MISSING_CODES:
+                raise
+            self.s3.put_object(
+                Bucket=self.bucket,
+                Key=self.key(digest),
+                Body=prompt.encode('utf-8'),
+                ContentType='text/plain; charset=utf-8'
+            )
+        with self._lock:
+            self._known.add(digest)
+            self._remember(digest, prompt)
+        return digest
+
+    def resolve(self, digest: str) -> str:
+        with self._lock:
+            prompt = self._cache.get(digest)
+            if prompt is not None:
+                self._cache.move_to_end(digest)
+                return prompt
+        prompt = self.s3.get_object(Bucket=self.bucket, Key=self.key(digest))['Body'].read().decode('utf-8')
+        with self._lock:
+            self._remember(digest, prompt)
+        return prompt
+
+    def _remember(self, digest: str, prompt: str) -> None:
+        self._cache[digest] = prompt
+        self._cache.move_to_end(digest)
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+
+
+class ArtifactCodec:
+    """
+    Grava e lê artefatos JSON no formato compacto/comprimido
+
+    Uso:
+        codec = ArtifactCodec(s3, BUCKET)
+        codec.put('bedrock/outputs/planos-aula/plano.json', documento)
+        documento = codec.get('bedrock/outputs/planos-aula/plano.json', migrate=True)
+
+    Args:
+        encoding: 'zstd', 'gzip' ou None; padrão zstd se disponível, senão gzip
+        min_size: corpos menores que isso não são comprimidos
+        prompt_min_chars: prompts menores que isso ficam no próprio artefato
+        templates: modelos cujos prompts são reconstruídos de `prompt_template`
+    """
+
+    def __init__(self, s3, bucket: str, encoding: Optional[str] = 'auto', level: Optional[int] = None,
+                 min_size: int = 512, prompt_min_chars: int = 200, prompts: Optional[PromptStore] = None,
+                 templates: Mapping[str, PromptTemplate] = TEMPLATES):
+        if encoding == 'auto':
+            encoding = 'zstd' if zstandard is not None else 'gzip'
+        if encoding == 'zstd' and zstandard is None:
+            raise RuntimeError("encoding='zstd' requer o pacote zstandard")
+        self.s3 = s3
+        self.bucket = bucket
+        self.encoding = encoding
+        self.level = level
+        self.min_size = min_size
+        self.prompt_min_chars = prompt_min_chars
+        self.prompts = prompts or PromptStore(s3, bucket)
+        self.templates = templates
+        self.stats = {'written': 0, 'read': 0, 'migrated': 0, 'bytes_raw': 0, 'bytes_stored': 0}
+
+    def encode(self, doc: Dict[str, Any]) -> Tuple[bytes, Dict[str, Any]]:
+        """Retorna (corpo, argumentos extras do put_object)"""
+        doc = dict(doc)
+        metadata = {'codec': CODEC_VERSION}
+        if 'prompt' in doc and self._render(doc) == doc['prompt']:
+            del doc['prompt']
+            metadata['prompt-template'] = doc['prompt_template']['name']
+        for name in REF_FIELDS:
+            value = doc.get(name)
+            if isinstance(value, str) and len(value) >= self.prompt_min_chars:
+                digest = self.prompts.ref(value)
+                del doc[name]
+                doc[f"{name}_ref"] = digest
+                metadata[f"{name}-ref"] = digest
+
+        raw = dumps(doc)
+        encoding = self.encoding if len(raw) >= self.min_size else None
+        body = compress(raw, encoding, self.level)
+        extra: Dict[str, Any] = {'ContentType': CONTENT_TYPE, 'Metadata': metadata}
+        if encoding:
+            extra['ContentEncoding'] = encoding
+        self.stats['bytes_raw'] += len(raw)
+        self.stats['bytes_stored'] += len(body)
+        return body, extra
+
+    def decode(self, body: bytes, content_encoding: Optional[str] = None) -> Dict[str, Any]:
+        doc = loads(decompress(body, content_encoding))
+        if not isinstance(doc, dict):
+            return doc
+        for name in REF_FIELDS:
+            digest = doc.pop(f"{name}_ref", None)
+            if digest is not None:
+                doc[name] = self.prompts.resolve(digest)
+        if 'prompt' not in doc:
+            prompt = self._render(doc)
+            if prompt is not None:
+                doc['prompt'] = prompt
+        return doc
+
+    def _render(self, doc: Dict[str, Any]) -> Optional[str]:
+        """Prompt do modelo referenciado em `prompt_template`, se ele for conhecido e igual"""
+        reference = doc.get('prompt_template')
+        if not isinstance(reference, dict):
+            return None
+        template = self.templates.get(reference.get('name'))
+        if template is None or template.system_hash != reference.get('system_hash'):
+            return None
+        try:
+            return template.render(**reference.get('variables', {}))
+        except (KeyError, IndexError, ValueError):
+            return None
+
+    def put(self, key: str, doc: Dict[str, Any], **extra) -> Dict[str, Any]:
+        body, codec_extra = self.encode(doc)
+        response = self.s3.put_object(Bucket=self.bucket, Key=key, Body=body, **codec_extra, **extra)
+        self.stats['written'] += 1
+        return response
+
+    def get(self, key: str, migrate: bool = False) -> Dict[str, Any]:
+        """
+        Lê um artefato em qualquer formato (novo ou legado)
+
+        Args:
+            migrate: regrava objetos legados no formato novo (If-Match no ETag lido)
+        """
+        response = self.s3.get_object(Bucket=self.bucket, Key=key)
+        body = response['Body'].read()
+        doc = self.decode(body, response.get('ContentEncoding'))
+        self.stats['read'] += 1
+
+        if migrate and response.get('Metadata', {}).get('codec') != CODEC_VERSION:
+            try:
+                self.put(key, doc, IfMatch=response['ETag'])
+                self.stats['migrated'] += 1
+            except Exception as e:
+                if getattr(e, 'response', {}).get('Error', {}).get('Code') not in ('PreconditionFailed', 'ConditionalRequestConflict'):
+                    logger.warning("Falha ao migrar %s: %s", key, e)
+        return doc
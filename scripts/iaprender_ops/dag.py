@@ -0,0 +1,90 @@
+"""
+Execução de passos independentes em paralelo (DAG)
+
+Cada passo declara de quais outros depende e recebe os resultados deles.
+Passos sem dependência pendente rodam ao mesmo tempo em um pool de
+threads; se uma dependência falha, os dependentes são marcados como
+'skipped' sem executar. O relatório traz status, tempo e resultado (ou
+erro) de cada passo, na ordem de declaração.
+"""
+
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Sequence
+
+OK = 'ok'
+FAILED = 'failed'
+SKIPPED = 'skipped'
+
+
+class StepFailed(Exception):
+    """Falha esperada de um passo (ex. permissão negada), com resultado parcial para o relatório"""
+
+    def __init__(self, message: str, result: Any = None, exit_code: int = 1):
+        super().__init__(message)
+        self.result = result
+        self.exit_code = exit_code
+
+
+@dataclass
+class Step:
+    name: str
+    run: Callable[[Dict[str, Any]], Any]
+    after: Sequence[str] = field(default_factory=tuple)
+
+
+def run_dag(steps: List[Step], workers: int = 8) -> Dict[str, Dict[str, Any]]:
+    """
+    Executa os passos respeitando as dependências
+
+    Returns:
+        {nome: {'status', 'seconds', 'result' | 'error', 'exit_code'}}
+    """
+    names = {step.name for step in steps}
+    for step in steps:
+        unknown = set(step.after) - names
+        if unknown:
+            raise ValueError(f"Passo {step.name} depende de passos inexistentes: {', '.join(sorted(unknown))}")
+
+    report: Dict[str, Dict[str, Any]] = {}
+    results: Dict[str, Any] = {}
+    pending = list(steps)
+    running: Dict[Future, Step] = {}
+
+    def timed(step: Step, inputs: Dict[str, Any]) -> Dict[str, Any]:
+        started = time.perf_counter()
+        try:
+            entry = {'status': OK, 'result': step.run(inputs)}
+        except StepFailed as e:
+            entry = {'status': FAILED, 'error': str(e), 'result': e.result, 'exit_code': e.exit_code}
+        except Exception as e:
+            entry = {'status': FAILED, 'error': f"{type(e).__name__}: {str(e)}", 'exit_code': 1}
+        entry['seconds'] = round(time.perf_counter() - started, 3)
+        return entry
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='dag') as executor:
+        while pending or running:
+            for step in list(pending):
+                states = [report.get(name, {}).get('status') for name in step.after]
+                if any(state in (FAILED, SKIPPED) for state in states):
+                    report[step.name] = {'status': SKIPPED, 'seconds': 0.0,
+                                         'error': f"dependência falhou: {', '.join(step.after)}"}
+                    pending.remove(step)
+                elif all(state == OK for state in states):
+                    inputs = {name: results[name] for name in step.after}
+                    running[executor.submit(timed, step, inputs)] = step
+                    pending.remove(step)
+            if not running:
+                # Nada em execução e nada pronto: o que sobrou depende de um ciclo
+                for step in pending:
+                    report[step.name] = {'status': SKIPPED, 'seconds': 0.0, 'error': "dependência circular"}
+                pending.clear()
+                continue
+            done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+            for future in done:
+                step = running.pop(future)
+                report[step.name] = future.result()
+                results[step.name] = report[step.name].get('result')
+
+    return {step.name: report[step.name] for step in steps}
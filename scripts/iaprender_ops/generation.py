@@ -0,0 +1,534 @@
+"""
+Motor assíncrono de geração com concorrência limitada (Bedrock + S3)
+
+As chamadas boto3 rodam em um pool de threads sob asyncio. O número de
+gerações simultâneas é controlado por um limitador AIMD: cresce uma
+unidade a cada janela de sucessos e cai pela metade a cada
+ThrottlingException. A persistência no S3 acontece fora do limite de
+geração, sobrepondo o upload de um item com a geração do próximo.
+
+Pedidos com prompt de sistema (`system`) usam a Converse API com cache de
+prompt; os demais usam invoke_model.
+
+Pedidos idênticos em andamento ao mesmo tempo (mesma chave de cache) são
+coalescidos: só o primeiro chama o Bedrock e grava o artefato, e os demais
+recebem uma cópia do resultado, com o `s3_key` do artefato gravado pelo líder.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, replace
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from config.aws_clients import get_client
+from iaprender_ops.cache import GenerationCache, cache_key
+from iaprender_ops.converse import (
+    DEFAULT_TEMPLATE_MODEL_ID, build_converse_kwargs, extract_converse_text, extract_converse_usage
+)
+from iaprender_ops.usage import TokenLedger, extract_usage
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL_ID = 'anthropic.claude-3-haiku-20240307-v1:0'
+ANTHROPIC_VERSION = 'bedrock-2023-05-31'
+THROTTLING_CODES = {'ThrottlingException', 'TooManyRequestsException', 'ServiceUnavailableException'}
+# Erros do modelo que não se resolvem repetindo no mesmo modelo: modelo
+# inexistente na região, e ValidationException/AccessDeniedException só com
+# as mensagens de ID que exige perfil de inferência ou de acesso não
+# liberado (as demais são erros do próprio pedido)
+MODEL_UNAVAILABLE_CODES = {'ResourceNotFoundException'}
+MODEL_UNAVAILABLE_MESSAGES = {
+    'ValidationException': ("on-demand throughput isn't supported", 'model identifier is invalid'),
+    'AccessDeniedException': ("don't have access to the model",)
+}
+NO_RETRIES = {'mode': 'standard', 'total_max_attempts': 1}
+
+
+def bedrock_client(region: Optional[str] = None):
+    """
+    Cliente bedrock-runtime sem retries do botocore
+
+    Com o retry adaptativo padrão o botocore absorve a maior parte dos
+    ThrottlingException e suas tentativas se multiplicam com as do motor;
+    sem ele, cada throttling chega ao limitador AIMD, que controla o backoff.
+    """
+    return get_client('bedrock-runtime', region, retries=dict(NO_RETRIES))
+
+
+@dataclass
+class GenerationRequest:
+    """
+    Pedido de geração; se `key` for definido o resultado é salvo no S3
+
+    Com roteador no motor, pedidos com `request_type` têm o modelo escolhido
+    por ele, exceto se `pinned` (modelo escolhido explicitamente).
+    """
+    prompt: str
+    max_tokens: int = 800
+    model_id: str = DEFAULT_MODEL_ID
+    temperature: Optional[float] = None
+    key: Optional[str] = None
+    artifact: Dict[str, Any] = field(default_factory=dict)
+    bypass_cache: bool = False
+    usuario_id: Optional[str] = None
+    escola_id: Optional[str] = None
+    request_type: Optional[str] = None
+    system: Optional[str] = None
+    template: Optional[Dict[str, Any]] = None
+    pinned: bool = False
+
+    @classmethod
+    def from_template(cls, template, variables: Dict[str, Any], **kwargs) -> 'GenerationRequest':
+        """
+        Pedido a partir de um PromptTemplate: sistema estático + variáveis do usuário
+
+        Sem `model_id`, usa DEFAULT_TEMPLATE_MODEL_ID, que tem cache de prompt;
+        um `model_id` informado fixa o modelo (`pinned`).
+        O artefato guarda a referência ao modelo (nome, hash do sistema e
+        variáveis), da qual o ArtifactCodec reconstrói o prompt.
+        """
+        kwargs.setdefault('request_type', template.name)
+        kwargs.setdefault('pinned', 'model_id' in kwargs)
+        kwargs.setdefault('model_id', DEFAULT_TEMPLATE_MODEL_ID)
+        reference = {'name': template.name, 'system_hash': template.system_hash,
+                     'variables': {name: variables[name] for name in template.variables}}
+        return cls(prompt=template.render(**variables), system=template.system, template=reference, **kwargs)
+
+    @property
+    def system_hash(self) -> Optional[str]:
+        return hashlib.sha256(self.system.encode('utf-8')).hexdigest() if self.system else None
+
+    def cache_key(self) -> str:
+        return cache_key(self.model_id, self.prompt, self.max_tokens,
+                         {'temperature': self.temperature, 'system': self.system_hash})
+
+
+@dataclass
+class GenerationResult:
+    """Resultado de uma geração (texto, resposta bruta e tempos medidos)"""
+    request: GenerationRequest
+    text: Optional[str] = None
+    response: Optional[Dict[str, Any]] = None
+    latency: float = 0.0
+    attempts: int = 0
+    s3_key: Optional[str] = None
+    error: Optional[str] = None
+    cached: bool = False
+    coalesced: bool = False
+    usage: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def build_body(request: GenerationRequest) -> str:
+    """Monta o corpo Messages API da Anthropic no formato do invoke_model"""
+    body: Dict[str, Any] = {
+        'anthropic_version': ANTHROPIC_VERSION,
+        'max_tokens': request.max_tokens,
+        'messages': [{'role': 'user', 'content': request.prompt}]
+    }
+    if request.system:
+        body['system'] = request.system
+    if request.temperature is not None:
+        body['temperature'] = request.temperature
+    return json.dumps(body)
+
+
+def extract_text(response: Dict[str, Any]) -> str:
+    return ''.join(block.get('text', '') for block in response.get('content', []) if block.get('type', 'text') == 'text')
+
+
+def is_throttling(error: BaseException) -> bool:
+    code = getattr(error, 'response', {}).get('Error', {}).get('Code')
+    return code in THROTTLING_CODES
+
+
+def is_model_unavailable(error: BaseException) -> bool:
+    details = getattr(error, 'response', {}).get('Error', {})
+    code = details.get('Code')
+    if code in MODEL_UNAVAILABLE_CODES:
+        return True
+    message = str(details.get('Message') or '').lower()
+    return any(fragment in message for fragment in MODEL_UNAVAILABLE_MESSAGES.get(code, ()))
+
+
+def default_artifact(result: GenerationResult) -> Dict[str, Any]:
+    """Documento salvo no S3: campos de `artifact` + prompt, modelo e conteúdo"""
+    request = result.request
+    doc = {
+        'id': str(uuid.uuid4()),
+        'timestamp': datetime.now().isoformat(),
+        'prompt': request.prompt,
+        'model': request.model_id,
+        **request.artifact,
+        'conteudo': result.text,
+        'usage': result.usage,
+        'latency_ms': round(result.latency * 1000, 1),
+        'cached': result.cached
+    }
+    if request.template is not None:
+        doc['prompt_template'] = request.template
+    return doc
+
+
+class LeaderCancelled(Exception):
+    """O líder de um pedido coalescido foi cancelado; os seguidores tentam de novo"""
+
+
+class AimdLimiter:
+    """Semáforo assíncrono com limite ajustável por AIMD"""
+
+    def __init__(self, initial: int = 4, minimum: int = 1, maximum: int = 32):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.limit = float(max(minimum, min(initial, maximum)))
+        self.in_flight = 0
+        self._condition = asyncio.Condition()
+
+    async def acquire(self) -> None:
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+
+    async def release(self) -> None:
+        async with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    def on_success(self) -> None:
+        self.limit = min(self.maximum, self.limit + 1.0 / max(self.limit, 1.0))
+
+    def on_throttle(self) -> None:
+        self.limit = max(self.minimum, self.limit / 2)
+
+
+class GenerationEngine:
+    """
+    Executa muitas gerações em paralelo respeitando o limite de concorrência
+
+    Uso:
+        engine = GenerationEngine(bucket='iaprender-files-2025', max_concurrency=16)
+        results = asyncio.run(engine.run_many(requests))
+    """
+
+    def __init__(
+        self,
+        bucket: Optional[str] = None,
+        initial_concurrency: int = 4,
+        max_concurrency: int = 16,
+        max_attempts: int = 6,
+        bedrock=None,
+        s3=None,
+        serialize: Optional[Callable[[Dict[str, Any]], bytes]] = None,
+        build_artifact: Callable[[GenerationResult], Dict[str, Any]] = default_artifact,
+        cache: Optional[GenerationCache] = None,
+        semantic_cache=None,
+        ledger: Optional[TokenLedger] = None,
+        router=None,
+        coalesce: bool = True,
+        codec=None,
+        segments=None
+    ):
+        self.bucket = bucket
+        self.initial_concurrency = initial_concurrency
+        self.max_concurrency = max_concurrency
+        self.max_attempts = max_attempts
+        self.bedrock = bedrock or bedrock_client()
+        self._s3 = s3
+        self.serialize = serialize or (lambda doc: json.dumps(doc, indent=2, ensure_ascii=False).encode('utf-8'))
+        self.build_artifact = build_artifact
+        self.cache = cache
+        self.semantic_cache = semantic_cache
+        self.ledger = ledger
+        self.router = router
+        self.coalesce = coalesce
+        self.codec = codec
+        self.segments = segments
+        self.limiter: Optional[AimdLimiter] = None
+        self.stats = {'completed': 0, 'failed': 0, 'throttled': 0, 'persisted': 0, 'cache_hits': 0, 'semantic_hits': 0,
+                      'prompt_cache_read_tokens': 0, 'prompt_cache_write_tokens': 0, 'coalesced': 0,
+                      'cache_errors': 0}
+        self._inflight: Dict[str, asyncio.Future] = {}
+        # Cópias entregues a seguidores antes de o segmento do líder ser gravado
+        self._awaiting_segment: Dict[int, List[GenerationResult]] = {}
+        self._segment_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency * 2, thread_name_prefix='bedrock')
+
+    @property
+    def s3(self):
+        if self._s3 is None:
+            self._s3 = get_client('s3')
+        return self._s3
+
+    async def _call(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, lambda: func(*args, **kwargs))
+
+    async def invoke(self, request: GenerationRequest) -> GenerationResult:
+        """Gera uma resposta respeitando o limitador, com backoff em throttling"""
+        if self.limiter is None:
+            self.limiter = AimdLimiter(self.initial_concurrency, maximum=self.max_concurrency)
+        routed = self.router is not None and bool(request.request_type) and not request.pinned
+        if routed:
+            request = replace(request, model_id=self.router.choose(request.request_type, request.prompt).model_id)
+        result = GenerationResult(request=request)
+
+        key = None
+        if self.cache is not None:
+            key = request.cache_key()
+            if request.bypass_cache:
+                self.cache.bypassed += 1
+            else:
+                try:
+                    entry = await self._call(self.cache.get, key)
+                except Exception as e:
+                    logger.warning("Falha ao ler o cache: %s", e)
+                    self.stats['cache_errors'] += 1
+                    entry = None
+                if entry is not None:
+                    result.text = entry['text']
+                    result.response = entry['response']
+                    result.cached = True
+                    self.stats['cache_hits'] += 1
+                    self._record_usage(result)
+                    return result
+
+        vector = None
+        if self.semantic_cache is not None and not request.bypass_cache:
+            try:
+                vector = await self._call(self.semantic_cache.embed, request.prompt)
+                entry = await self._call(
+                    self.semantic_cache.lookup, request.prompt, request.model_id, request.max_tokens, vector,
+                    system_hash=request.system_hash, temperature=request.temperature, template=request.template
+                )
+            except Exception as e:
+                logger.warning("Falha no cache semântico: %s", e)
+                self.stats['cache_errors'] += 1
+                entry = None
+            if entry is not None:
+                result.text = entry['text']
+                result.cached = True
+                self.stats['semantic_hits'] += 1
+                self._record_usage(result)
+                return result
+
+        tried: List[str] = []
+        while True:
+            result.attempts += 1
+            await self.limiter.acquire()
+            started = time.perf_counter()
+            try:
+                if request.system:
+                    response = await self._call(
+                        self.bedrock.converse,
+                        **build_converse_kwargs(request.model_id, request.system, request.prompt,
+                                                request.max_tokens, request.temperature)
+                    )
+                    payload = {k: v for k, v in response.items() if k != 'ResponseMetadata'}
+                    result.text = extract_converse_text(payload)
+                    result.usage = extract_converse_usage(payload)
+                else:
+                    response = await self._call(
+                        self.bedrock.invoke_model,
+                        modelId=request.model_id,
+                        body=build_body(request)
+                    )
+                    payload = json.loads(await self._call(response['body'].read))
+                    result.text = extract_text(payload)
+                    result.usage = extract_usage(payload, response.get('ResponseMetadata', {}).get('HTTPHeaders'))
+                result.latency = time.perf_counter() - started
+                result.response = payload
+                self.stats['prompt_cache_read_tokens'] += result.usage.get('cache_read_input_tokens', 0)
+                self.stats['prompt_cache_write_tokens'] += result.usage.get('cache_creation_input_tokens', 0)
+                self._observe(request, latency_ms=result.latency * 1000)
+                self.limiter.on_success()
+                self.stats['completed'] += 1
+                self._record_usage(result)
+                break
+            except Exception as e:
+                throttled = is_throttling(e)
+                # Sem roteador (ou com modelo fixo) não há outro modelo a tentar: o erro não se resolve repetindo
+                failover = routed and is_model_unavailable(e)
+                self._observe(request, ok=False, throttled=throttled, unavailable=failover)
+                if (throttled or failover) and result.attempts < self.max_attempts:
+                    backoff = 0.0
+                    if throttled:
+                        self.stats['throttled'] += 1
+                        self.limiter.on_throttle()
+                        backoff = min(0.25 * 2 ** result.attempts, 8.0)
+                    if routed:
+                        tried.append(request.model_id)
+                        decision = self.router.choose(request.request_type, request.prompt, exclude=tried)
+                        if decision.model_id != request.model_id:
+                            request = result.request = replace(request, model_id=decision.model_id)
+                            key = request.cache_key() if key is not None else None
+                            backoff = 0.0
+                        elif failover:
+                            result.error = str(e)
+                            self.stats['failed'] += 1
+                            return result
+                else:
+                    result.error = str(e)
+                    self.stats['failed'] += 1
+                    return result
+            finally:
+                await self.limiter.release()
+            await asyncio.sleep(backoff)
+
+        if key is not None:
+            entry = {'text': result.text, 'response': result.response, 'model_id': request.model_id}
+            try:
+                await self._call(self.cache.set, key, entry)
+            except Exception as e:
+                logger.warning("Falha ao gravar no cache: %s", e)
+                self.stats['cache_errors'] += 1
+        if self.semantic_cache is not None:
+            try:
+                await self._call(
+                    self.semantic_cache.add, request.prompt, request.model_id, request.max_tokens, result.text, vector,
+                    system_hash=request.system_hash, temperature=request.temperature, template=request.template
+                )
+            except Exception as e:
+                logger.warning("Falha ao gravar no cache semântico: %s", e)
+                self.stats['cache_errors'] += 1
+        return result
+
+    def _observe(self, request: GenerationRequest, latency_ms: Optional[float] = None, ok: bool = True,
+                 throttled: bool = False, unavailable: bool = False) -> None:
+        if self.router is not None:
+            self.router.observe(request.model_id, latency_ms=latency_ms, ok=ok, throttled=throttled,
+                                unavailable=unavailable)
+
+    def _record_usage(self, result: GenerationResult) -> None:
+        if self.ledger is None:
+            return
+        request = result.request
+        reused = result.cached or result.coalesced
+        self.ledger.record(
+            request.escola_id,
+            request.usuario_id,
+            request.model_id,
+            input_tokens=0 if reused else result.usage.get('input_tokens', 0),
+            output_tokens=0 if reused else result.usage.get('output_tokens', 0),
+            cached=reused
+        )
+
+    async def persist(self, result: GenerationResult) -> GenerationResult:
+        """
+        Salva o artefato no S3 em `request.key` (fora do limite de geração)
+
+        Com `segments` (SegmentWriter) o artefato é acumulado em um segmento
+        JSONL sob a chave lógica `request.key`; `s3_key` e stats['persisted']
+        só são definidos quando o segmento é gravado (pelo próprio writer, ao
+        fim de run_many ou em close()); se a gravação ao fim de run_many
+        falhar, o erro marcado no resultado é limpo quando a linha for
+        gravada depois. Com `codec` (ArtifactCodec) é gravado
+        compacto e comprimido; sem nenhum dos dois, com `serialize`.
+        """
+        if not result.ok or not result.request.key:
+            return result
+        try:
+            if self.segments is not None:
+                written = await self._call(self.segments.append, result.request.key, self.build_artifact(result))
+                written.add_done_callback(lambda _: self._segment_written(result))
+                return result
+            elif self.codec is not None:
+                await self._call(self.codec.put, result.request.key, self.build_artifact(result))
+            else:
+                await self._call(
+                    self.s3.put_object,
+                    Bucket=self.bucket,
+                    Key=result.request.key,
+                    Body=self.serialize(self.build_artifact(result)),
+                    ContentType='application/json; charset=utf-8'
+                )
+            result.s3_key = result.request.key
+            self.stats['persisted'] += 1
+        except Exception as e:
+            result.error = f"Falha ao salvar no S3: {str(e)}"
+        return result
+
+    def _segment_written(self, result: GenerationResult) -> None:
+        # Um flush anterior pode ter falhado (erro marcado em run_many); a linha chegou agora
+        with self._segment_lock:
+            result.s3_key = result.request.key
+            result.error = None
+            copies = self._awaiting_segment.pop(id(result), [])
+        for copy in copies:
+            copy.s3_key = result.s3_key
+            copy.error = None
+        self.stats['persisted'] += 1
+
+    def _share(self, shared: GenerationResult, request: GenerationRequest) -> GenerationResult:
+        """Cópia do resultado do líder para um seguidor; com segmentos, `s3_key` chega quando o do líder chegar"""
+        with self._segment_lock:
+            result = replace(shared, request=replace(request, model_id=shared.request.model_id), coalesced=True)
+            if self.segments is not None and shared.ok and shared.request.key and shared.s3_key is None:
+                self._awaiting_segment.setdefault(id(shared), []).append(result)
+        return result
+
+    async def generate(self, request: GenerationRequest) -> GenerationResult:
+        """Gera e persiste; pedidos idênticos em andamento compartilham uma única execução"""
+        if not self.coalesce or request.bypass_cache:
+            return await self.persist(await self.invoke(request))
+
+        key = request.cache_key()
+        leader = self._inflight.get(key)
+        while leader is not None:
+            try:
+                shared = await asyncio.shield(leader)
+            except LeaderCancelled:
+                # O primeiro seguidor a acordar encontra a chave livre e vira líder
+                leader = self._inflight.get(key)
+                continue
+            self.stats['coalesced'] += 1
+            result = self._share(shared, request)
+            self._record_usage(result)
+            return result
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await self.persist(await self.invoke(request))
+            future.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            # Cancelar o futuro propagaria o cancelamento aos seguidores
+            future.set_exception(LeaderCancelled(key))
+            future.exception()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()
+            raise
+        finally:
+            del self._inflight[key]
+
+    async def run_many(self, requests: Iterable[GenerationRequest]) -> List[GenerationResult]:
+        """Executa todas as gerações (e persistências) concorrentemente, na ordem de entrada"""
+        results = list(await asyncio.gather(*(self.generate(request) for request in requests)))
+        if self.segments is not None:
+            try:
+                await self._call(self.segments.flush)
+            except Exception as e:
+                for result in results:
+                    if result.ok and result.request.key and result.s3_key is None:
+                        result.error = f"Falha ao salvar no S3: {str(e)}"
+        return results
+
+    def close(self) -> None:
+        """Grava o segmento pendente (se houver) e encerra o executor"""
+        try:
+            if self.segments is not None:
+                self.segments.stop()
+        finally:
+            self._executor.shutdown(wait=False)
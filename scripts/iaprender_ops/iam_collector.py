@@ -0,0 +1,201 @@
+"""
+Coleta concorrente das políticas IAM de um usuário
+
+Em vez da cadeia serial get_policy → get_policy_version → get_user_policy
+→ list_attached_group_policies, a coleta roda em três fases, cada uma com
+todas as chamadas independentes em paralelo (no máximo `workers` por vez):
+
+1. listagens do usuário: políticas inline, gerenciadas anexadas e grupos;
+2. documentos inline do usuário e listagens de cada grupo;
+3. documentos inline dos grupos e, para cada política gerenciada distinta,
+   get_policy (DefaultVersionId) + get_policy_version.
+
+Todas as listagens seguem Marker/IsTruncated. Os documentos gerenciados
+ficam em cache por (ARN, DefaultVersionId), em memória e em um arquivo
+JSON: diagnósticos repetidos, inclusive de outros usuários com as mesmas
+políticas, só chamam get_policy_version quando a versão padrão muda.
+"""
+
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+DEFAULT_CACHE_PATH = '.cache/iam-policies.json'
+
+
+@dataclass
+class ManagedPolicy:
+    name: str
+    arn: str
+    version: str
+    document: Dict[str, Any]
+    cached: bool = False
+
+
+@dataclass
+class GroupPolicies:
+    name: str
+    inline: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    attached: List[ManagedPolicy] = field(default_factory=list)
+
+
+@dataclass
+class PrincipalPolicies:
+    user: str
+    inline: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    attached: List[ManagedPolicy] = field(default_factory=list)
+    groups: List[GroupPolicies] = field(default_factory=list)
+    errors: List[str] = field(default_factory=list)
+
+    def documents(self) -> List[Tuple[str, Dict[str, Any]]]:
+        """(origem, documento) de todas as políticas, no formato do PolicyEvaluator"""
+        documents = [(f"user/{self.user}/{name}", doc) for name, doc in self.inline.items()]
+        documents.extend((policy.arn, policy.document) for policy in self.attached)
+        for group in self.groups:
+            documents.extend((f"group/{group.name}/{name}", doc) for name, doc in group.inline.items())
+            documents.extend((policy.arn, policy.document) for policy in group.attached)
+        return documents
+
+
+class PolicyCollector:
+    """
+    Uso:
+        collector = PolicyCollector(get_client('iam'))
+        policies = collector.collect('UsuarioBedrock')
+        PolicyEvaluator(policies.documents())
+    """
+
+    def __init__(self, iam, workers: int = 8, cache_path: Optional[str] = DEFAULT_CACHE_PATH):
+        self.iam = iam
+        self.workers = workers
+        self.cache_path = cache_path
+        self._cache: Dict[str, Dict[str, Any]] = self._load_cache()
+        self._lock = threading.Lock()
+        self.stats = {'calls': 0, 'cache_hits': 0, 'cache_misses': 0}
+
+    def _load_cache(self) -> Dict[str, Dict[str, Any]]:
+        if not self.cache_path:
+            return {}
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def save_cache(self) -> None:
+        if not self.cache_path:
+            return
+        if os.path.dirname(self.cache_path):
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+        with self._lock:
+            snapshot = dict(self._cache)
+        with open(self.cache_path, 'w', encoding='utf-8') as f:
+            json.dump(snapshot, f, ensure_ascii=False, default=str)
+
+    def _call(self, operation: str, **kwargs) -> Dict[str, Any]:
+        with self._lock:
+            self.stats['calls'] += 1
+        return getattr(self.iam, operation)(**kwargs)
+
+    def _paginate(self, operation: str, result_key: str, **kwargs) -> List[Any]:
+        """Todas as páginas de uma listagem IAM (Marker/IsTruncated)"""
+        items: List[Any] = []
+        while True:
+            response = self._call(operation, **kwargs)
+            items.extend(response.get(result_key, []))
+            if not response.get('IsTruncated'):
+                return items
+            kwargs['Marker'] = response['Marker']
+
+    def _managed(self, attached: Dict[str, str]) -> ManagedPolicy:
+        arn = attached['PolicyArn']
+        version = self._call('get_policy', PolicyArn=arn)['Policy']['DefaultVersionId']
+        cache_key = f"{arn}@{version}"
+        with self._lock:
+            document = self._cache.get(cache_key)
+            self.stats['cache_hits' if document is not None else 'cache_misses'] += 1
+        if document is not None:
+            return ManagedPolicy(attached['PolicyName'], arn, version, document, cached=True)
+
+        document = self._call('get_policy_version', PolicyArn=arn, VersionId=version)['PolicyVersion']['Document']
+        with self._lock:
+            # Versões antigas da mesma política deixam de ser úteis
+            for stale in [key for key in self._cache if key.startswith(f"{arn}@")]:
+                del self._cache[stale]
+            self._cache[cache_key] = document
+        return ManagedPolicy(attached['PolicyName'], arn, version, document)
+
+    def collect(self, username: str) -> PrincipalPolicies:
+        """
+        Políticas inline, gerenciadas e de grupos do usuário
+
+        Falhas de chamadas individuais (ex. AccessDenied em um grupo) vão para
+        `errors` sem interromper a coleta; falhas nas listagens do usuário
+        são propagadas.
+        """
+        result = PrincipalPolicies(username)
+
+        def attempt(label: str, function: Callable[[], Any]) -> Any:
+            try:
+                return function()
+            except Exception as e:
+                with self._lock:
+                    result.errors.append(f"{label}: {str(e)}")
+                return None
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='iam') as executor:
+            # Fase 1: listagens do usuário
+            inline_names, attached, groups = [future.result() for future in [
+                executor.submit(self._paginate, 'list_user_policies', 'PolicyNames', UserName=username),
+                executor.submit(self._paginate, 'list_attached_user_policies', 'AttachedPolicies', UserName=username),
+                executor.submit(self._paginate, 'get_groups_for_user', 'Groups', UserName=username),
+            ]]
+            result.groups = [GroupPolicies(group['GroupName']) for group in groups]
+
+            # Fase 2: documentos inline do usuário e listagens dos grupos
+            user_inline = {
+                name: executor.submit(attempt, f"get_user_policy {name}", lambda name=name: self._call(
+                    'get_user_policy', UserName=username, PolicyName=name)['PolicyDocument'])
+                for name in inline_names
+            }
+            group_listings = [
+                (group,
+                 executor.submit(attempt, f"list_group_policies {group.name}", lambda group=group: self._paginate(
+                     'list_group_policies', 'PolicyNames', GroupName=group.name)),
+                 executor.submit(attempt, f"list_attached_group_policies {group.name}", lambda group=group: self._paginate(
+                     'list_attached_group_policies', 'AttachedPolicies', GroupName=group.name)))
+                for group in result.groups
+            ]
+            group_attached: List[Tuple[GroupPolicies, List[Dict[str, str]]]] = []
+            group_inline = []
+            for group, names, attachments in group_listings:
+                for name in names.result() or []:
+                    group_inline.append((group, name, executor.submit(
+                        attempt, f"get_group_policy {group.name}/{name}",
+                        lambda group=group, name=name: self._call(
+                            'get_group_policy', GroupName=group.name, PolicyName=name)['PolicyDocument'])))
+                group_attached.append((group, attachments.result() or []))
+
+            # Fase 3: políticas gerenciadas distintas (uma vez cada, mesmo se anexadas a vários grupos)
+            distinct = {policy['PolicyArn']: policy for policy in attached}
+            for _, policies in group_attached:
+                distinct.update((policy['PolicyArn'], policy) for policy in policies)
+            managed = {
+                arn: executor.submit(attempt, f"get_policy {arn}", lambda policy=policy: self._managed(policy))
+                for arn, policy in distinct.items()
+            }
+
+            result.inline = {name: future.result() for name, future in user_inline.items() if future.result() is not None}
+            for group, name, future in group_inline:
+                if future.result() is not None:
+                    group.inline[name] = future.result()
+            resolved = {arn: future.result() for arn, future in managed.items()}
+            result.attached = [resolved[p['PolicyArn']] for p in attached if resolved[p['PolicyArn']]]
+            for group, policies in group_attached:
+                group.attached = [resolved[p['PolicyArn']] for p in policies if resolved[p['PolicyArn']]]
+
+        self.save_cache()
+        return result
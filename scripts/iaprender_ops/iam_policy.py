@@ -0,0 +1,376 @@
+"""
+Avaliação local de políticas IAM (sem chamadas à AWS)
+
+As políticas do usuário (inline, gerenciadas e de grupos) são compiladas
+uma única vez: cada statement vira uma regex para as ações (sem
+diferenciar maiúsculas) e outra para os recursos, com `*` e `?` como
+curingas e variáveis como ${aws:username} resolvidas pelo contexto. Os
+statements ficam indexados pelo serviço da ação (s3, bedrock, ...), de
+modo que cada consulta só testa os que podem casar.
+
+A decisão segue a lógica do IAM para políticas de identidade: um Deny que
+casa vence; sem Deny, basta um Allow; sem nenhum dos dois, implicitDeny.
+Os valores são os mesmos de `EvalDecision` do simulate_principal_policy
+('allowed', 'explicitDeny', 'implicitDeny'), e `compare_simulation` confere
+o avaliador contra resultados do simulador gravados em fixture.
+
+Limitações: SCPs, permission boundaries e políticas de recurso (bucket
+policy) não são consideradas; operadores de Condition desconhecidos fazem
+o statement não casar.
+"""
+
+import ipaddress
+import json
+import re
+from dataclasses import dataclass, field
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Pattern, Tuple
+
+from iaprender_ops.iam_collector import PolicyCollector
+
+ALLOWED = 'allowed'
+EXPLICIT_DENY = 'explicitDeny'
+IMPLICIT_DENY = 'implicitDeny'
+
+_VARIABLE = re.compile(r'\$\{([^}]+)\}')
+
+
+def _as_list(value: Any) -> List[Any]:
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
+
+
+def _glob(pattern: str) -> str:
+    return ''.join('.*' if c == '*' else '.' if c == '?' else re.escape(c) for c in pattern)
+
+
+def glob_regex(patterns: Iterable[str], ignore_case: bool = False) -> Pattern:
+    """Uma única regex que casa com qualquer um dos padrões (só `*` e `?` são curingas)"""
+    alternatives = '|'.join(_glob(pattern) for pattern in patterns) or '(?!)'
+    return re.compile(f"(?s:{alternatives})\\Z", re.IGNORECASE if ignore_case else 0)
+
+
+def _service(action: str) -> str:
+    """Serviço da ação para o índice; '*' se o padrão cobre vários serviços"""
+    prefix, separator, _ = action.partition(':')
+    return '*' if not separator or any(c in prefix for c in '*?') else prefix.lower()
+
+
+def context_from_entries(entries: Iterable[Dict[str, Any]]) -> Dict[str, List[str]]:
+    """ContextEntries do simulate_principal_policy → {chave em minúsculas: [valores]}"""
+    return {entry['ContextKeyName'].lower(): [str(v) for v in entry['ContextKeyValues']] for entry in entries}
+
+
+def context_entries(context: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """{chave: valor ou [valores]} → ContextEntries do simulate_principal_policy"""
+    return [
+        {'ContextKeyName': key, 'ContextKeyValues': [str(v) for v in _as_list(values)], 'ContextKeyType': 'stringList'}
+        for key, values in context.items()
+    ]
+
+
+# Condition
+
+@lru_cache(maxsize=4096)
+def _like(pattern: str) -> Pattern:
+    return glob_regex([pattern])
+
+
+def _string_like(pattern: str, value: str) -> bool:
+    return _like(pattern).match(value) is not None
+
+
+def _number(value: str) -> float:
+    return float(value)
+
+
+def _date(value: str) -> float:
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+
+
+def _ip(pattern: str, value: str) -> bool:
+    return ipaddress.ip_address(value) in ipaddress.ip_network(pattern, strict=False)
+
+
+_COMPARATORS = {
+    'StringEquals': lambda p, v: v == p,
+    'StringEqualsIgnoreCase': lambda p, v: v.lower() == p.lower(),
+    'StringLike': _string_like,
+    'ArnEquals': lambda p, v: v == p,
+    'ArnLike': _string_like,
+    'NumericEquals': lambda p, v: _number(v) == _number(p),
+    'NumericLessThan': lambda p, v: _number(v) < _number(p),
+    'NumericLessThanEquals': lambda p, v: _number(v) <= _number(p),
+    'NumericGreaterThan': lambda p, v: _number(v) > _number(p),
+    'NumericGreaterThanEquals': lambda p, v: _number(v) >= _number(p),
+    'DateEquals': lambda p, v: _date(v) == _date(p),
+    'DateLessThan': lambda p, v: _date(v) < _date(p),
+    'DateLessThanEquals': lambda p, v: _date(v) <= _date(p),
+    'DateGreaterThan': lambda p, v: _date(v) > _date(p),
+    'DateGreaterThanEquals': lambda p, v: _date(v) >= _date(p),
+    'Bool': lambda p, v: v.lower() == p.lower(),
+    'IpAddress': _ip,
+}
+_NEGATED = {
+    'StringNotEquals': 'StringEquals',
+    'StringNotEqualsIgnoreCase': 'StringEqualsIgnoreCase',
+    'StringNotLike': 'StringLike',
+    'ArnNotEquals': 'ArnEquals',
+    'ArnNotLike': 'ArnLike',
+    'NumericNotEquals': 'NumericEquals',
+    'DateNotEquals': 'DateEquals',
+    'NotIpAddress': 'IpAddress',
+}
+
+
+def _resolve(text: str, context: Dict[str, List[str]]) -> Optional[str]:
+    """Substitui ${chave} pelo valor do contexto; None se a chave não existir"""
+    if '${' not in text:
+        return text
+    missing = False
+
+    def replace(match) -> str:
+        nonlocal missing
+        name = match.group(1)
+        if name in ('*', '?', '$'):
+            return name
+        values = context.get(name.lower())
+        if not values:
+            missing = True
+            return ''
+        return values[0]
+
+    resolved = _VARIABLE.sub(replace, text)
+    return None if missing else resolved
+
+
+def _condition_matches(operator: str, key: str, patterns: List[str], context: Dict[str, List[str]]) -> bool:
+    qualifier, _, name = operator.rpartition(':')
+    if_exists = name.endswith('IfExists')
+    if if_exists:
+        name = name[:-len('IfExists')]
+    negated = name in _NEGATED
+    compare = _COMPARATORS.get(_NEGATED.get(name, name))
+    if name == 'Null':
+        return (key.lower() not in context) == (str(patterns[0]).lower() == 'true')
+    if compare is None:
+        return False
+
+    values = context.get(key.lower())
+    if not values:
+        # Chave ausente: IfExists e ForAllValues casam, ForAnyValue não; sem
+        # qualificador, só os operadores negados casam
+        if if_exists or qualifier == 'ForAllValues':
+            return True
+        return negated and qualifier != 'ForAnyValue'
+    resolved = [p for p in (_resolve(str(pattern), context) for pattern in patterns) if p is not None]
+
+    def value_matches(value: str) -> bool:
+        # Operadores negados valem por valor: "nenhum padrão casa com este valor"
+        try:
+            result = any(compare(pattern, value) for pattern in resolved)
+        except ValueError:
+            return False
+        return not result if negated else result
+
+    if qualifier == 'ForAllValues':
+        return all(value_matches(value) for value in values)
+    return any(value_matches(value) for value in values)
+
+
+# Statements
+
+@dataclass
+class CompiledStatement:
+    source: str
+    index: int
+    sid: Optional[str]
+    effect: str
+    actions: Pattern
+    not_action: bool
+    resources: List[str]
+    resource_regex: Optional[Pattern]
+    not_resource: bool
+    conditions: List[Tuple[str, str, List[str]]]
+    services: List[str] = field(default_factory=list)
+
+    @property
+    def id(self) -> str:
+        return f"{self.source}#{self.sid or self.index}"
+
+    def matches(self, action: str, resource: str, context: Dict[str, List[str]]) -> bool:
+        if (self.actions.match(action) is None) != self.not_action:
+            return False
+        if not self._resource_matches(resource, context):
+            return False
+        return all(_condition_matches(op, key, values, context) for op, key, values in self.conditions)
+
+    def _resource_matches(self, resource: str, context: Dict[str, List[str]]) -> bool:
+        if self.resource_regex is not None:
+            matched = self.resource_regex.match(resource) is not None
+        else:
+            # Recursos com ${variáveis}: resolvidos a cada consulta
+            patterns = [p for p in (_resolve(r, context) for r in self.resources) if p is not None]
+            matched = glob_regex(patterns).match(resource) is not None
+        return matched != self.not_resource
+
+
+def compile_statement(source: str, index: int, statement: Dict[str, Any]) -> CompiledStatement:
+    not_action = 'NotAction' in statement
+    actions = [str(a) for a in _as_list(statement.get('NotAction' if not_action else 'Action'))]
+    not_resource = 'NotResource' in statement
+    resources = [str(r) for r in _as_list(statement.get('NotResource' if not_resource else 'Resource', '*'))]
+    conditions = [
+        (operator, key, [str(v) for v in _as_list(values)])
+        for operator, block in (statement.get('Condition') or {}).items()
+        for key, values in block.items()
+    ]
+    return CompiledStatement(
+        source=source,
+        index=index,
+        sid=statement.get('Sid'),
+        effect=statement.get('Effect', 'Allow'),
+        actions=glob_regex(actions, ignore_case=True),
+        not_action=not_action,
+        resources=resources,
+        resource_regex=None if any('${' in r for r in resources) else glob_regex(resources),
+        not_resource=not_resource,
+        conditions=conditions,
+        services=['*'] if not_action else sorted({_service(a) for a in actions})
+    )
+
+
+@dataclass
+class Decision:
+    action: str
+    resource: str
+    decision: str
+    matched: List[str] = field(default_factory=list)
+
+    @property
+    def allowed(self) -> bool:
+        return self.decision == ALLOWED
+
+
+class PolicyEvaluator:
+    """
+    Avaliador de políticas de identidade compiladas
+
+    Uso:
+        evaluator = PolicyEvaluator([('AcessoBedRock', documento)])
+        evaluator.evaluate('s3:PutObject', f'arn:aws:s3:::{BUCKET}/bedrock/outputs/x.json').decision
+        evaluator.is_allowed('s3:ListBucket', f'arn:aws:s3:::{BUCKET}', {'s3:prefix': 'bedrock/outputs/'})
+    """
+
+    def __init__(self, policies: Iterable[Tuple[str, Any]]):
+        self.statements: List[CompiledStatement] = []
+        self._by_service: Dict[str, List[CompiledStatement]] = {}
+        self._memo: Dict[Tuple[str, str], Decision] = {}
+        for source, document in policies:
+            self.add_policy(source, document)
+
+    def add_policy(self, source: str, document: Any) -> None:
+        if isinstance(document, str):
+            document = json.loads(document)
+        for index, statement in enumerate(_as_list(document.get('Statement'))):
+            compiled = compile_statement(source, index, statement)
+            self.statements.append(compiled)
+            for service in compiled.services:
+                self._by_service.setdefault(service, []).append(compiled)
+        self._memo.clear()
+
+    def _candidates(self, action: str) -> List[CompiledStatement]:
+        service = action.partition(':')[0].lower()
+        return self._by_service.get(service, []) + self._by_service.get('*', [])
+
+    def evaluate(self, action: str, resource: str = '*', context: Optional[Dict[str, Any]] = None) -> Decision:
+        """
+        Decisão para (ação, recurso) com chaves de contexto opcionais
+
+        Args:
+            context: {chave de condição: valor ou [valores]}, ex. {'s3:prefix': 'bedrock/outputs/'}
+        """
+        if not context:
+            memo = self._memo.get((action, resource))
+            if memo is not None:
+                return memo
+        values = {key.lower(): [str(v) for v in _as_list(value)] for key, value in (context or {}).items()}
+
+        allows, denies = [], []
+        for statement in self._candidates(action):
+            if statement.matches(action, resource, values):
+                (denies if statement.effect == 'Deny' else allows).append(statement.id)
+        if denies:
+            decision = Decision(action, resource, EXPLICIT_DENY, denies)
+        elif allows:
+            decision = Decision(action, resource, ALLOWED, allows)
+        else:
+            decision = Decision(action, resource, IMPLICIT_DENY)
+
+        if not context:
+            self._memo[(action, resource)] = decision
+        return decision
+
+    def is_allowed(self, action: str, resource: str = '*', context: Optional[Dict[str, Any]] = None) -> bool:
+        return self.evaluate(action, resource, context).allowed
+
+
+def collect_user_policies(iam, username: str) -> List[Tuple[str, Dict[str, Any]]]:
+    """(origem, documento) das políticas inline, gerenciadas e de grupos do usuário"""
+    return PolicyCollector(iam).collect(username).documents()
+
+
+# Validação contra o simulate_principal_policy
+
+def simulate(iam, policy_source_arn: str, actions: List[str], resources: List[str],
+             context: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    """EvaluationResults do simulate_principal_policy (todas as páginas)"""
+    kwargs: Dict[str, Any] = {'PolicySourceArn': policy_source_arn, 'ActionNames': actions, 'ResourceArns': resources}
+    if context:
+        kwargs['ContextEntries'] = context_entries(context)
+    results = []
+    while True:
+        response = iam.simulate_principal_policy(**kwargs)
+        results.extend(response.get('EvaluationResults', []))
+        if not response.get('IsTruncated'):
+            return results
+        kwargs['Marker'] = response['Marker']
+
+
+def compare_simulation(evaluator: PolicyEvaluator, cases: List[Dict[str, Any]]) -> List[Dict[str, str]]:
+    """
+    Confere o avaliador contra resultados gravados do simulador
+
+    Args:
+        cases: [{'ContextEntries': [...], 'EvaluationResults': [...]}], no formato da resposta da AWS
+
+    Returns:
+        Lista de divergências (vazia se tudo confere)
+    """
+    mismatches = []
+    for case in cases:
+        context = context_from_entries(case.get('ContextEntries', []))
+        for result in case['EvaluationResults']:
+            local = evaluator.evaluate(result['EvalActionName'], result.get('EvalResourceName', '*'), context)
+            if local.decision != result['EvalDecision']:
+                mismatches.append({
+                    'action': result['EvalActionName'],
+                    'resource': result.get('EvalResourceName', '*'),
+                    'context': json.dumps(context, ensure_ascii=False),
+                    'expected': result['EvalDecision'],
+                    'actual': local.decision
+                })
+    return mismatches
+
+
+def load_fixture(path: str) -> Tuple[PolicyEvaluator, List[Dict[str, Any]]]:
+    """Fixture {'policies': [{'source', 'document'}], 'cases': [...]} → (avaliador, casos)"""
+    with open(path, 'r', encoding='utf-8') as f:
+        fixture = json.load(f)
+    evaluator = PolicyEvaluator((policy['source'], policy['document']) for policy in fixture['policies'])
+    return evaluator, fixture['cases']
@@ -0,0 +1,320 @@
+"""
+Índice local (SQLite) dos artefatos em bedrock/outputs/
+
+O prefixo raiz é dividido em shards pelos subprefixos ('/') e cada shard
+é listado em paralelo com list_objects_v2. Chave, tamanho, ETag e os
+metadados disciplina/ano/tema/tipo de cada artefato vão para uma tabela
+SQLite; consultas como "todas as atividades de matemática do 5º ano"
+respondem localmente, sem tocar no S3.
+
+A sincronização é incremental: só os objetos novos ou com ETag diferente
+são baixados para extrair metadados, e chaves que sumiram da listagem
+são removidas. Em prefixos com chaves em ordem cronológica (logs),
+sync(since_last_key=True) lista apenas o que vem depois da última chave
+vista em cada shard.
+
+Artefatos gravados em segmentos JSONL (SegmentWriter, bedrock/segments/)
+não aparecem como objetos em bedrock/outputs/: cada segmento novo é lido
+uma vez (um GET) e suas linhas entram no índice sob a chave lógica, com o
+segmento como shard.
+"""
+
+import logging
+import os
+import sqlite3
+import time
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from iaprender_ops.codec import decompress, loads
+from iaprender_ops.segments import INDEX_SUFFIX, SEGMENTS_PREFIX
+
+logger = logging.getLogger(__name__)
+
+OUTPUTS_PREFIX = 'bedrock/outputs/'
+TIPOS_POR_PASTA = {'planos-aula': 'plano_aula', 'atividades': 'atividade', 'analises': 'analise'}
+# Valores de `tipo` gravados nos artefatos → vocabulário das pastas
+TIPO_ALIASES = {'atividade_pratica': 'atividade', 'plano_de_aula': 'plano_aula', 'analise_desempenho': 'analise'}
+FIELDS = ('disciplina', 'ano', 'tema', 'tipo')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS objects (
+    key TEXT PRIMARY KEY,
+    shard TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    etag TEXT NOT NULL,
+    last_modified TEXT,
+    disciplina TEXT, ano TEXT, tema TEXT, tipo TEXT,
+    disciplina_n TEXT, ano_n TEXT, tema_n TEXT, tipo_n TEXT
+);
+CREATE INDEX IF NOT EXISTS objects_filtros ON objects (tipo_n, ano_n, disciplina_n);
+CREATE INDEX IF NOT EXISTS objects_shard ON objects (shard);
+CREATE TABLE IF NOT EXISTS shards (
+    shard TEXT PRIMARY KEY,
+    last_key TEXT,
+    synced_at REAL
+);
+CREATE TABLE IF NOT EXISTS segments (
+    segment TEXT PRIMARY KEY,
+    etag TEXT NOT NULL,
+    synced_at REAL
+);
+"""
+
+
+def normalize(value: Optional[str]) -> Optional[str]:
+    """Minúsculas, sem acentos e com 'º'/'o' unificados, para comparação"""
+    if value is None:
+        return None
+    text = unicodedata.normalize('NFKD', str(value).replace('º', 'o').replace('ª', 'a').lower())
+    return ' '.join(''.join(c for c in text if not unicodedata.combining(c)).split())
+
+
+def tipo_from_key(key: str) -> Optional[str]:
+    for part in key.split('/'):
+        if part in TIPOS_POR_PASTA:
+            return TIPOS_POR_PASTA[part]
+    return None
+
+
+def canonical_tipo(value: Optional[str]) -> Optional[str]:
+    """`tipo` normalizado e traduzido para o vocabulário de TIPOS_POR_PASTA"""
+    tipo = normalize(value)
+    return TIPO_ALIASES.get(tipo, tipo)
+
+
+def extract_fields(key: str, doc: Dict[str, Any]) -> Dict[str, Optional[str]]:
+    """
+    disciplina/ano/tema/tipo do artefato
+
+    O tipo vem da pasta quando a chave está em uma pasta conhecida; senão,
+    do próprio artefato (ou de metadata), traduzido por canonical_tipo.
+    """
+    metadata = doc.get('metadata') if isinstance(doc.get('metadata'), dict) else {}
+    fields = {name: doc.get(name) or metadata.get(name) for name in FIELDS}
+    fields['tipo'] = tipo_from_key(key) or canonical_tipo(fields['tipo'])
+    return {name: (str(value) if value is not None else None) for name, value in fields.items()}
+
+
+class ManifestIndex:
+    """
+    Manifesto local dos artefatos do bucket
+
+    Uso:
+        index = ManifestIndex(s3, BUCKET, '.cache/manifest.sqlite')
+        index.sync()
+        index.query(ano='5º ano', disciplina='matemática', tipo='atividade')
+    """
+
+    def __init__(self, s3, bucket: str, path: str = '.cache/manifest.sqlite', prefix: str = OUTPUTS_PREFIX,
+                 workers: int = 16, segments_prefix: Optional[str] = SEGMENTS_PREFIX):
+        self.s3 = s3
+        self.bucket = bucket
+        self.prefix = prefix
+        self.segments_prefix = segments_prefix
+        self.workers = workers
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.db = sqlite3.connect(path)
+        self.db.row_factory = sqlite3.Row
+        self.db.executescript(SCHEMA)
+        self._canonicalize_tipos()
+
+    def close(self) -> None:
+        self.db.close()
+
+    def _canonicalize_tipos(self) -> None:
+        """Corrige `tipo` de linhas gravadas antes de canonical_tipo (o ETag não muda)"""
+        known = tuple(TIPOS_POR_PASTA.values())
+        rows = self.db.execute(
+            f"SELECT key, tipo FROM objects WHERE tipo_n NOT IN ({', '.join('?' * len(known))})", known
+        ).fetchall()
+        with self.db:
+            for row in rows:
+                tipo = tipo_from_key(row['key']) or canonical_tipo(row['tipo'])
+                self.db.execute("UPDATE objects SET tipo = ?, tipo_n = ? WHERE key = ?", (tipo, tipo, row['key']))
+
+    def shards(self, max_depth: int = 2) -> List[str]:
+        """Subprefixos até `max_depth` níveis abaixo do prefixo raiz (folhas da árvore)"""
+        level = [self.prefix]
+        for _ in range(max_depth):
+            children: List[str] = []
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                for prefix, found in zip(level, executor.map(self._child_prefixes, level)):
+                    children.extend(found or [prefix])
+            if children == level:
+                break
+            level = children
+        return level
+
+    def _child_prefixes(self, prefix: str) -> List[str]:
+        children = []
+        paginator = self.s3.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=prefix, Delimiter='/'):
+            children.extend(p['Prefix'] for p in page.get('CommonPrefixes', []))
+        return children
+
+    def _list_shard(self, shard: str, start_after: Optional[str], recursive: bool) -> List[Dict[str, Any]]:
+        kwargs: Dict[str, Any] = {'Bucket': self.bucket, 'Prefix': shard}
+        if start_after:
+            kwargs['StartAfter'] = start_after
+        if not recursive:
+            kwargs['Delimiter'] = '/'
+        objects = []
+        for page in self.s3.get_paginator('list_objects_v2').paginate(**kwargs):
+            objects.extend(page.get('Contents', []))
+        return objects
+
+    def _fetch_fields(self, key: str) -> Dict[str, Optional[str]]:
+        if not key.endswith('.json'):
+            return extract_fields(key, {})
+        try:
+            response = self.s3.get_object(Bucket=self.bucket, Key=key)
+            doc = loads(decompress(response['Body'].read(), response.get('ContentEncoding')))
+        except Exception as e:
+            logger.warning("Não foi possível ler %s: %s", key, e)
+            doc = {}
+        return extract_fields(key, doc if isinstance(doc, dict) else {})
+
+    def _segment_rows(self, segment: str) -> List[Tuple[str, int, Dict[str, Optional[str]]]]:
+        """(chave lógica, tamanho da linha, campos) dos artefatos de um segmento sob o prefixo raiz"""
+        try:
+            body = self.s3.get_object(Bucket=self.bucket, Key=segment)['Body']
+            rows = []
+            for line in body.iter_lines():
+                if not line.strip():
+                    continue
+                record = loads(line)
+                if record['key'].startswith(self.prefix):
+                    doc = record['doc'] if isinstance(record['doc'], dict) else {}
+                    rows.append((record['key'], len(line) + 1, extract_fields(record['key'], doc)))
+            return rows
+        except Exception as e:
+            logger.warning("Não foi possível ler %s: %s", segment, e)
+            return []
+
+    def _sync_segments(self, executor: ThreadPoolExecutor) -> Dict[str, int]:
+        """Indexa os segmentos novos e remove as linhas dos que sumiram"""
+        known = {row['segment']: row['etag'] for row in self.db.execute("SELECT segment, etag FROM segments")}
+        listed = {obj['Key']: obj for obj in self._list_shard(self.segments_prefix, None, True)
+                  if not obj['Key'].endswith(INDEX_SUFFIX)}
+        changed = [obj for key, obj in listed.items() if known.get(key) != obj['ETag']]
+        rows = list(executor.map(lambda obj: self._segment_rows(obj['Key']), changed))
+        gone = [segment for segment in known if segment not in listed]
+
+        with self.db:
+            for segment in gone + [obj['Key'] for obj in changed]:
+                self.db.execute("DELETE FROM objects WHERE shard = ?", (segment,))
+            self.db.executemany("DELETE FROM segments WHERE segment = ?", ((segment,) for segment in gone))
+            for obj, entries in zip(changed, rows):
+                for key, size, values in entries:
+                    self.db.execute(
+                        "INSERT OR REPLACE INTO objects VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        (key, obj['Key'], size, obj['ETag'], str(obj.get('LastModified') or ''),
+                         *(values[name] for name in FIELDS), *(normalize(values[name]) for name in FIELDS))
+                    )
+                self.db.execute(
+                    "INSERT OR REPLACE INTO segments VALUES (?, ?, ?)", (obj['Key'], obj['ETag'], time.time())
+                )
+        return {'segments': len(listed), 'segments_fetched': len(changed), 'segments_removed': len(gone)}
+
+    def sync(self, since_last_key: bool = False, max_depth: int = 2) -> Dict[str, Any]:
+        """
+        Atualiza o índice a partir do S3
+
+        Returns:
+            Dict com shards, objetos listados, baixados, removidos, segmentos
+            (com `segments_prefix`) e tempo total
+        """
+        started = time.perf_counter()
+        shards = self.shards(max_depth)
+        state = {row['shard']: row['last_key'] for row in self.db.execute("SELECT shard, last_key FROM shards")}
+        known = {row['key']: row['etag'] for row in self.db.execute(
+            "SELECT key, etag FROM objects WHERE shard NOT IN (SELECT segment FROM segments)"
+        )}
+
+        # Shards "folha" cobrem tudo abaixo deles; o prefixo raiz (se for um shard
+        # por não ter subpastas) ou prefixos intermediários listam só o próprio nível.
+        jobs: List[Tuple[str, Optional[str], bool]] = [
+            (shard, state.get(shard) if since_last_key else None, True) for shard in shards
+        ]
+        parents = {self.prefix} | {p for s in shards for p in _ancestors(s, self.prefix)}
+        jobs.extend((parent, None, False) for parent in parents if parent not in shards)
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            listings = list(executor.map(lambda job: self._list_shard(*job), jobs))
+
+            changed: List[Tuple[str, Dict[str, Any]]] = []
+            listed: Dict[str, str] = {}
+            for (shard, _, _), objects in zip(jobs, listings):
+                for obj in objects:
+                    listed[obj['Key']] = shard
+                    if known.get(obj['Key']) != obj['ETag']:
+                        changed.append((shard, obj))
+            fields = list(executor.map(lambda item: self._fetch_fields(item[1]['Key']), changed))
+            segments = self._sync_segments(executor) if self.segments_prefix else {}
+
+        with self.db:
+            for (shard, obj), values in zip(changed, fields):
+                self.db.execute(
+                    "INSERT OR REPLACE INTO objects VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (obj['Key'], shard, obj['Size'], obj['ETag'], str(obj.get('LastModified') or ''),
+                     *(values[name] for name in FIELDS), *(normalize(values[name]) for name in FIELDS))
+                )
+            removed = 0
+            if not since_last_key:
+                missing = [key for key in known if key not in listed]
+                self.db.executemany("DELETE FROM objects WHERE key = ?", ((key,) for key in missing))
+                removed = len(missing)
+            for (shard, _, _), objects in zip(jobs, listings):
+                last_key = max((obj['Key'] for obj in objects), default=state.get(shard))
+                self.db.execute(
+                    "INSERT OR REPLACE INTO shards VALUES (?, ?, ?)", (shard, last_key, time.time())
+                )
+
+        return {
+            'shards': len(shards),
+            'listed': len(listed),
+            'fetched': len(changed),
+            'removed': removed,
+            **segments,
+            'elapsed_s': round(time.perf_counter() - started, 3)
+        }
+
+    def query(self, limit: Optional[int] = None, prefix: Optional[str] = None,
+              **filters: Optional[str]) -> List[Dict[str, Any]]:
+        """
+        Consulta o índice local (comparação sem acentos e sem diferenciar maiúsculas)
+
+        Args:
+            filters: disciplina, ano, tema e/ou tipo
+            prefix: restringe a chaves com esse prefixo
+        """
+        unknown = set(filters) - set(FIELDS)
+        if unknown:
+            raise ValueError(f"Filtros desconhecidos: {', '.join(sorted(unknown))}")
+        clauses, params = [], []
+        for name, value in filters.items():
+            if value is not None:
+                clauses.append(f"{name}_n = ?")
+                params.append(canonical_tipo(value) if name == 'tipo' else normalize(value))
+        if prefix:
+            clauses.append("key >= ? AND key < ?")
+            params.extend([prefix, prefix + '\U0010ffff'])
+        sql = "SELECT key, size, etag, last_modified, disciplina, ano, tema, tipo FROM objects"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY key"
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+        return [dict(row) for row in self.db.execute(sql, params)]
+
+    def count(self) -> int:
+        return self.db.execute("SELECT COUNT(*) FROM objects").fetchone()[0]
+
+
+def _ancestors(prefix: str, root: str) -> Iterable[str]:
+    parts = prefix[len(root):].rstrip('/').split('/')
+    for depth in range(1, len(parts)):
+        yield root + '/'.join(parts[:depth]) + '/'
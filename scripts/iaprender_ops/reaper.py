@@ -0,0 +1,198 @@
+"""
+Limpeza em massa de objetos de teste e temporários
+
+Os scripts de diagnóstico deixam objetos `test-{uuid}.json` no primeiro
+nível de bedrock/outputs/, bedrock/inputs/ e bedrock/logs/, e `temp/`
+nunca é limpo. O Reaper lista os prefixos das regras em paralelo: regras
+não recursivas listam só o nível do prefixo; as recursivas dividem o
+prefixo em subprefixos, nível a nível, até cerca de `fan_out` shards.
+As chaves são selecionadas pelo padrão e pela idade mínima de cada regra
+e apagadas em lotes de 1000 com delete_objects, vários lotes ao mesmo
+tempo. Em dry-run nada é apagado e
+o relatório mostra o que seria removido.
+
+Em buckets versionados, delete_objects cria marcadores de exclusão; as
+versões antigas ficam para a regra de ciclo de vida do bucket.
+"""
+
+import re
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Pattern, Tuple
+
+DELETE_BATCH = 1000
+
+
+@dataclass(frozen=True)
+class ReapRule:
+    """
+    Objetos sob `prefixes` cuja chave casa com `pattern` e com pelo menos `min_age` de idade
+
+    Com recursive=False só os objetos diretamente sob cada prefixo são listados.
+    """
+    name: str
+    prefixes: Tuple[str, ...]
+    pattern: Pattern
+    min_age: timedelta = timedelta(hours=1)
+    recursive: bool = True
+
+    def matches(self, obj: Dict[str, Any], now: datetime) -> bool:
+        key = obj['Key']
+        if key.endswith('/') or not self.pattern.search(key):
+            return False
+        return now - obj['LastModified'] >= self.min_age
+
+
+DEFAULT_RULES = [
+    ReapRule(
+        'objetos-de-teste',
+        ('bedrock/outputs/', 'bedrock/inputs/', 'bedrock/logs/'),
+        re.compile(r'(^|/)(integration-)?test(-[\w.-]+)?\.json$'),
+        timedelta(hours=1),
+        recursive=False
+    ),
+    ReapRule('temp', ('temp/',), re.compile(r'.'), timedelta(days=1))
+]
+
+
+@dataclass
+class RuleReport:
+    matched: int = 0
+    bytes: int = 0
+    deleted: int = 0
+    errors: List[Dict[str, str]] = field(default_factory=list)
+    sample: List[str] = field(default_factory=list)
+
+
+class Reaper:
+    """
+    Uso:
+        reaper = Reaper(get_client('s3'), BUCKET, dry_run=False)
+        report = reaper.run()
+    """
+
+    def __init__(self, s3, bucket: str, rules: Optional[List[ReapRule]] = None, workers: int = 8,
+                 dry_run: bool = True, sample_size: int = 10, fan_out: int = 64, max_depth: int = 4):
+        self.s3 = s3
+        self.bucket = bucket
+        self.rules = rules if rules is not None else DEFAULT_RULES
+        self.workers = workers
+        self.dry_run = dry_run
+        self.sample_size = sample_size
+        self.fan_out = fan_out
+        self.max_depth = max_depth
+
+    def _child_prefixes(self, prefix: str) -> List[str]:
+        children = []
+        for page in self.s3.get_paginator('list_objects_v2').paginate(Bucket=self.bucket, Prefix=prefix, Delimiter='/'):
+            children.extend(p['Prefix'] for p in page.get('CommonPrefixes', []))
+        return children
+
+    def _shards(self, rule: ReapRule, executor: ThreadPoolExecutor) -> List[Dict[str, Any]]:
+        """
+        Listagens (argumentos de list_objects_v2) que cobrem os prefixos da regra
+
+        Cada prefixo expandido vira um shard só com seus objetos diretos
+        (Delimiter='/') e seus subprefixos passam ao nível seguinte; a
+        expansão para ao atingir `fan_out` shards ou `max_depth` níveis, e
+        os subprefixos restantes são listados recursivamente.
+        """
+        if not rule.recursive:
+            return [{'Prefix': prefix, 'Delimiter': '/'} for prefix in rule.prefixes]
+        shards: List[Dict[str, Any]] = []
+        leaves = list(rule.prefixes)
+        for _ in range(self.max_depth):
+            if not leaves or len(shards) + len(leaves) >= self.fan_out:
+                break
+            expanded: List[str] = []
+            for leaf, children in zip(leaves, executor.map(self._child_prefixes, leaves)):
+                if children:
+                    shards.append({'Prefix': leaf, 'Delimiter': '/'})
+                    expanded.extend(children)
+                else:
+                    shards.append({'Prefix': leaf})
+            leaves = expanded
+        return shards + [{'Prefix': leaf} for leaf in leaves]
+
+    def _scan(self, rule: ReapRule, shard: Dict[str, Any], now: datetime) -> Tuple[int, List[Dict[str, Any]]]:
+        """(objetos listados, objetos que casam com a regra) de um shard"""
+        listed, matched = 0, []
+        for page in self.s3.get_paginator('list_objects_v2').paginate(Bucket=self.bucket, **shard):
+            for obj in page.get('Contents', []):
+                listed += 1
+                if rule.matches(obj, now):
+                    matched.append(obj)
+        return listed, matched
+
+    def _delete(self, keys: List[str]) -> List[Dict[str, str]]:
+        """Apaga um lote (até 1000 chaves) e devolve os erros por chave"""
+        try:
+            response = self.s3.delete_objects(
+                Bucket=self.bucket,
+                Delete={'Objects': [{'Key': key} for key in keys], 'Quiet': True}
+            )
+        except Exception as e:
+            return [{'Key': key, 'Message': str(e)} for key in keys]
+        return [{'Key': e.get('Key'), 'Message': e.get('Message') or e.get('Code')} for e in response.get('Errors', [])]
+
+    def run(self) -> Dict[str, Any]:
+        """
+        Executa todas as regras
+
+        Returns:
+            Dict com dry_run, listed, matched, deleted, bytes, seconds,
+            listed_per_second, deleted_per_second e o relatório por regra
+        """
+        started = time.perf_counter()
+        now = datetime.now(timezone.utc)
+        reports = {rule.name: RuleReport() for rule in self.rules}
+        listed = 0
+        seen = set()
+        deletions: List[Tuple[RuleReport, Future]] = []
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='reaper') as executor:
+            for rule in self.rules:
+                report = reports[rule.name]
+                batch: List[str] = []
+                scans = executor.map(lambda shard, rule=rule: self._scan(rule, shard, now), self._shards(rule, executor))
+                for count, objects in scans:
+                    listed += count
+                    for obj in objects:
+                        if obj['Key'] in seen:
+                            continue
+                        seen.add(obj['Key'])
+                        report.matched += 1
+                        report.bytes += obj['Size']
+                        if len(report.sample) < self.sample_size:
+                            report.sample.append(obj['Key'])
+                        if self.dry_run:
+                            continue
+                        batch.append(obj['Key'])
+                        if len(batch) == DELETE_BATCH:
+                            deletions.append((report, executor.submit(self._delete, batch)))
+                            batch = []
+                if batch:
+                    deletions.append((report, executor.submit(self._delete, batch)))
+
+            for report, future in deletions:
+                report.errors.extend(future.result())
+
+        if not self.dry_run:
+            for report in reports.values():
+                report.deleted = report.matched - len(report.errors)
+
+        seconds = time.perf_counter() - started
+        deleted = sum(r.deleted for r in reports.values())
+        return {
+            'dry_run': self.dry_run,
+            'listed': listed,
+            'matched': sum(r.matched for r in reports.values()),
+            'deleted': deleted,
+            'bytes': sum(r.bytes for r in reports.values()),
+            'seconds': round(seconds, 3),
+            'listed_per_second': round(listed / seconds, 1) if seconds else 0.0,
+            'deleted_per_second': round(deleted / seconds, 1) if seconds else 0.0,
+            'rules': {name: vars(report) for name, report in reports.items()}
+        }
@@ -0,0 +1,309 @@
+"""
+Roteador de modelos do Bedrock sensível a latência e custo
+
+Mantém, por modelo, histogramas de latência em janela deslizante e taxas
+de erro/throttling. Para cada tipo de pedido (plano_aula, atividade,
+resposta_curta) escolhe o primeiro candidato que cabe no orçamento de
+latência (p95) e no teto de custo estimado; modelos em throttling entram
+em quarentena curta e o pedido vai para o próximo candidato. Erros que
+não se resolvem repetindo (modelo sem acesso liberado, ID que exige
+perfil de inferência) colocam o modelo em uma quarentena longa. Tipos de
+pedido sem política usam DEFAULT_POLICY. As decisões recentes e os
+histogramas usados ficam disponíveis para inspeção.
+"""
+
+import bisect
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Optional
+
+from iaprender_ops.usage import estimate_tokens
+
+# Limites superiores (ms) dos buckets do histograma; o último é aberto
+BUCKET_BOUNDS_MS = [100, 200, 400, 800, 1600, 3200, 6400, 12800, 25600, float('inf')]
+
+
+@dataclass(frozen=True)
+class ModelProfile:
+    """Modelo disponível e seu preço em USD por 1000 tokens"""
+    model_id: str
+    input_cost_per_1k: float
+    output_cost_per_1k: float
+
+    def estimate_cost(self, input_tokens: int, output_tokens: int) -> float:
+        return input_tokens / 1000 * self.input_cost_per_1k + output_tokens / 1000 * self.output_cost_per_1k
+
+
+MODELS: Dict[str, ModelProfile] = {
+    profile.model_id: profile for profile in (
+        ModelProfile('anthropic.claude-3-haiku-20240307-v1:0', 0.00025, 0.00125),
+        ModelProfile('us.anthropic.claude-3-5-haiku-20241022-v1:0', 0.0008, 0.004),
+        ModelProfile('anthropic.claude-3-sonnet-20240229-v1:0', 0.003, 0.015),
+        ModelProfile('us.anthropic.claude-3-5-sonnet-20241022-v2:0', 0.003, 0.015)
+    )
+}
+
+
+@dataclass(frozen=True)
+class RoutePolicy:
+    """Candidatos em ordem de preferência e restrições de um tipo de pedido"""
+    candidates: List[str]
+    latency_budget_ms: float
+    cost_ceiling_usd: float
+    expected_output_tokens: int
+
+
+DEFAULT_POLICIES: Dict[str, RoutePolicy] = {
+    'plano_aula': RoutePolicy(
+        candidates=[
+            'us.anthropic.claude-3-5-sonnet-20241022-v2:0',
+            'us.anthropic.claude-3-5-haiku-20241022-v1:0',
+            'anthropic.claude-3-haiku-20240307-v1:0'
+        ],
+        latency_budget_ms=20000,
+        cost_ceiling_usd=0.02,
+        expected_output_tokens=800
+    ),
+    'atividade': RoutePolicy(
+        candidates=[
+            'us.anthropic.claude-3-5-haiku-20241022-v1:0',
+            'anthropic.claude-3-haiku-20240307-v1:0'
+        ],
+        latency_budget_ms=12000,
+        cost_ceiling_usd=0.005,
+        expected_output_tokens=600
+    ),
+    'resposta_curta': RoutePolicy(
+        candidates=[
+            'anthropic.claude-3-haiku-20240307-v1:0',
+            'us.anthropic.claude-3-5-haiku-20241022-v1:0'
+        ],
+        latency_budget_ms=3000,
+        cost_ceiling_usd=0.001,
+        expected_output_tokens=100
+    )
+}
+
+
+# Política dos tipos de pedido sem entrada em `policies`
+DEFAULT_POLICY = RoutePolicy(
+    candidates=[
+        'anthropic.claude-3-haiku-20240307-v1:0',
+        'us.anthropic.claude-3-5-haiku-20241022-v1:0'
+    ],
+    latency_budget_ms=12000,
+    cost_ceiling_usd=0.01,
+    expected_output_tokens=800
+)
+
+
+class RollingHistogram:
+    """Histograma de latência em janela deslizante dividida em fatias de tempo"""
+
+    def __init__(self, window: float = 300.0, slices: int = 10):
+        self.slice_seconds = window / slices
+        self.slices = slices
+        self._ring: List[Dict[str, Any]] = [self._empty(-1) for _ in range(slices)]
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _empty(epoch: int) -> Dict[str, Any]:
+        return {'epoch': epoch, 'buckets': [0] * len(BUCKET_BOUNDS_MS), 'count': 0, 'errors': 0, 'throttles': 0}
+
+    def _slot(self, now: float) -> Dict[str, Any]:
+        epoch = int(now // self.slice_seconds)
+        slot = self._ring[epoch % self.slices]
+        if slot['epoch'] != epoch:
+            slot = self._ring[epoch % self.slices] = self._empty(epoch)
+        return slot
+
+    def observe(self, latency_ms: Optional[float], ok: bool = True, throttled: bool = False,
+                now: Optional[float] = None) -> None:
+        with self._lock:
+            slot = self._slot(time.time() if now is None else now)
+            slot['count'] += 1
+            slot['errors'] += int(not ok)
+            slot['throttles'] += int(throttled)
+            if ok and latency_ms is not None:
+                slot['buckets'][bisect.bisect_left(BUCKET_BOUNDS_MS, latency_ms)] += 1
+
+    def summary(self, now: Optional[float] = None) -> Dict[str, Any]:
+        """Agrega as fatias válidas: contagens, taxas e percentis (limite superior do bucket)"""
+        current = int((time.time() if now is None else now) // self.slice_seconds)
+        buckets = [0] * len(BUCKET_BOUNDS_MS)
+        count = errors = throttles = 0
+        with self._lock:
+            for slot in self._ring:
+                if current - slot['epoch'] >= self.slices:
+                    continue
+                count += slot['count']
+                errors += slot['errors']
+                throttles += slot['throttles']
+                buckets = [a + b for a, b in zip(buckets, slot['buckets'])]
+
+        return {
+            'count': count,
+            'error_rate': errors / count if count else 0.0,
+            'throttle_rate': throttles / count if count else 0.0,
+            'p50_ms': _percentile(buckets, 0.50),
+            'p95_ms': _percentile(buckets, 0.95),
+            'p99_ms': _percentile(buckets, 0.99),
+            'buckets': {('inf' if b == float('inf') else int(b)): n for b, n in zip(BUCKET_BOUNDS_MS, buckets)}
+        }
+
+
+def _percentile(buckets: List[int], quantile: float) -> Optional[float]:
+    total = sum(buckets)
+    if not total:
+        return None
+    target = quantile * total
+    running = 0
+    for bound, count in zip(BUCKET_BOUNDS_MS, buckets):
+        running += count
+        if running >= target:
+            return bound
+    return BUCKET_BOUNDS_MS[-1]
+
+
+@dataclass
+class RoutingDecision:
+    """Modelo escolhido e a avaliação de cada candidato"""
+    request_type: str
+    model_id: str
+    reason: str
+    evaluated: List[Dict[str, Any]] = field(default_factory=list)
+    timestamp: float = field(default_factory=time.time)
+
+
+class ModelRouter:
+    """
+    Escolhe o modelo de cada pedido com base em histogramas recentes
+
+    Uso:
+        router = ModelRouter()
+        decision = router.choose('plano_aula', prompt)
+        ... invoke_model(modelId=decision.model_id) ...
+        router.observe(decision.model_id, latency_ms=1830, ok=True)
+    """
+
+    def __init__(self, policies: Optional[Dict[str, RoutePolicy]] = None,
+                 models: Optional[Dict[str, ModelProfile]] = None, window: float = 300.0,
+                 min_samples: int = 20, max_error_rate: float = 0.2, throttle_cooldown: float = 30.0,
+                 unavailable_cooldown: float = 600.0, history: int = 200,
+                 default_policy: Optional[RoutePolicy] = DEFAULT_POLICY):
+        self.policies = dict(DEFAULT_POLICIES if policies is None else policies)
+        self.default_policy = default_policy
+        self.models = dict(MODELS if models is None else models)
+        named = list(self.policies.items()) + ([('padrão', default_policy)] if default_policy else [])
+        for name, policy in named:
+            unknown = [model_id for model_id in policy.candidates if model_id not in self.models]
+            if unknown:
+                raise ValueError(f"Política {name} tem candidatos sem perfil em `models`: {', '.join(unknown)}")
+        self.window = window
+        self.min_samples = min_samples
+        self.max_error_rate = max_error_rate
+        self.throttle_cooldown = throttle_cooldown
+        self.unavailable_cooldown = unavailable_cooldown
+        self.histograms: Dict[str, RollingHistogram] = {}
+        self.decisions: Deque[RoutingDecision] = deque(maxlen=history)
+        self._throttled_until: Dict[str, float] = {}
+        self._unavailable_until: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def _histogram(self, model_id: str) -> RollingHistogram:
+        with self._lock:
+            histogram = self.histograms.get(model_id)
+            if histogram is None:
+                histogram = self.histograms[model_id] = RollingHistogram(self.window)
+            return histogram
+
+    def observe(self, model_id: str, latency_ms: Optional[float] = None, ok: bool = True,
+                throttled: bool = False, unavailable: bool = False) -> None:
+        """
+        Registra o resultado de uma chamada
+
+        Throttling coloca o modelo em quarentena curta; `unavailable` (erro
+        não recuperável do modelo) em quarentena longa, sem esperar
+        min_samples erros.
+        """
+        self._histogram(model_id).observe(latency_ms, ok=ok, throttled=throttled)
+        if throttled:
+            self._throttled_until[model_id] = time.monotonic() + self.throttle_cooldown
+        if unavailable:
+            self._unavailable_until[model_id] = time.monotonic() + self.unavailable_cooldown
+
+    def choose(self, request_type: str, prompt: str = '', exclude: Optional[List[str]] = None) -> RoutingDecision:
+        """
+        Escolhe o modelo para um pedido
+
+        Args:
+            request_type: Chave de `policies` (plano_aula, atividade, resposta_curta);
+                tipos desconhecidos usam `default_policy`
+            prompt: Usado para estimar o custo de entrada
+            exclude: Modelos a ignorar (ex.: o que acabou de sofrer throttling)
+
+        Raises:
+            KeyError: se o tipo de pedido não tiver política e não houver default_policy
+        """
+        policy = self.policies.get(request_type) or self.default_policy
+        if policy is None:
+            raise KeyError(request_type)
+        input_tokens = estimate_tokens(prompt)
+        now = time.monotonic()
+        evaluated = []
+        chosen = None
+
+        for model_id in policy.candidates:
+            stats = self._histogram(model_id).summary()
+            cost = self.models[model_id].estimate_cost(input_tokens, policy.expected_output_tokens)
+            entry = {
+                'model_id': model_id,
+                'estimated_cost_usd': round(cost, 6),
+                'p95_ms': stats['p95_ms'],
+                'error_rate': round(stats['error_rate'], 3),
+                'samples': stats['count']
+            }
+            if exclude and model_id in exclude:
+                entry['rejected'] = 'excluído'
+            elif self._unavailable_until.get(model_id, 0) > now:
+                entry['rejected'] = 'indisponível'
+            elif self._throttled_until.get(model_id, 0) > now:
+                entry['rejected'] = 'throttling'
+            elif cost > policy.cost_ceiling_usd:
+                entry['rejected'] = 'custo'
+            elif stats['count'] >= self.min_samples and stats['p95_ms'] and stats['p95_ms'] > policy.latency_budget_ms:
+                entry['rejected'] = 'latência'
+            elif stats['count'] >= self.min_samples and stats['error_rate'] > self.max_error_rate:
+                entry['rejected'] = 'erros'
+            evaluated.append(entry)
+            if chosen is None and 'rejected' not in entry:
+                chosen = entry
+
+        if chosen is not None:
+            reason = 'primário' if chosen is evaluated[0] else f"failover ({evaluated[0].get('rejected')})"
+            if request_type not in self.policies:
+                reason = f"{reason}, política padrão"
+        else:
+            usable = [e for e in evaluated if e.get('rejected') not in ('excluído', 'throttling', 'indisponível')]
+            usable = usable or [e for e in evaluated if e.get('rejected') != 'excluído'] or evaluated
+            chosen = min(usable, key=lambda e: (e['p95_ms'] or 0, e['estimated_cost_usd']))
+            reason = 'nenhum candidato atende às restrições; menor p95'
+
+        decision = RoutingDecision(request_type, chosen['model_id'], reason, evaluated)
+        self.decisions.append(decision)
+        return decision
+
+    def inspect(self) -> Dict[str, Any]:
+        """Estado atual: histogramas por modelo, quarentenas e decisões recentes"""
+        now = time.monotonic()
+        return {
+            'models': {model_id: h.summary() for model_id, h in list(self.histograms.items())},
+            'throttled': {m: round(until - now, 1) for m, until in self._throttled_until.items() if until > now},
+            'unavailable': {m: round(until - now, 1) for m, until in self._unavailable_until.items() if until > now},
+            'decisions': [
+                {'request_type': d.request_type, 'model_id': d.model_id, 'reason': d.reason, 'evaluated': d.evaluated}
+                for d in list(self.decisions)[-20:]
+            ]
+        }
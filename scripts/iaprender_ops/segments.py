@@ -0,0 +1,231 @@
+"""
+Armazenamento em segmentos (append-log) para artefatos pequenos
+
+Em vez de um objeto S3 por plano/atividade, os artefatos são acumulados e
+gravados juntos em um segmento JSONL (uma linha por artefato), fechado ao
+atingir `max_bytes` ou `max_age` segundos. Ao lado de cada segmento fica
+um índice compacto (`.idx`) com a chave lógica, o deslocamento e o
+tamanho de cada linha:
+
+    bedrock/segments/2025/03/14/seg-20250314T102231-1a2b3c4d.jsonl
+    bedrock/segments/2025/03/14/seg-20250314T102231-1a2b3c4d.jsonl.idx
+
+Um artefato isolado é lido com um único GET com Range; um segmento
+inteiro é exportado com um único GET.
+"""
+
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from iaprender_ops.codec import dumps, loads
+
+logger = logging.getLogger(__name__)
+
+SEGMENTS_PREFIX = 'bedrock/segments/'
+INDEX_SUFFIX = '.idx'
+
+
+@dataclass(frozen=True)
+class SegmentPointer:
+    """Posição de um artefato dentro de um segmento"""
+    segment: str
+    offset: int
+    length: int
+
+    @property
+    def range(self) -> str:
+        return f"bytes={self.offset}-{self.offset + self.length - 1}"
+
+
+class SegmentWriter:
+    """
+    Acumula artefatos e grava segmentos JSONL + índice
+
+    O segmento é gravado quando o buffer passa de `max_bytes`, quando o
+    primeiro artefato pendente tem mais de `max_age` segundos (verificado
+    a cada append e, com start(), por uma thread) ou em flush()/stop().
+    append() retorna um Future resolvido com o SegmentPointer quando o
+    segmento que contém o artefato é gravado; se a gravação falhar, as
+    linhas voltam ao buffer e o Future continua pendente até a próxima.
+    Falhas de gravações disparadas por append() ou pela thread só contam
+    em stats['flush_errors']; flush() e stop() levantam a exceção.
+
+    Uso:
+        writer = SegmentWriter(s3, BUCKET)
+        gravado = writer.append('bedrock/outputs/atividades/atividade-fracoes-1.json', documento)
+        writer.stop()
+        gravado.result()    # SegmentPointer
+    """
+
+    def __init__(self, s3, bucket: str, prefix: str = SEGMENTS_PREFIX, max_bytes: int = 8 * 1024 * 1024,
+                 max_age: float = 60.0):
+        self.s3 = s3
+        self.bucket = bucket
+        self.prefix = prefix
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.index: Dict[str, SegmentPointer] = {}
+        self.stats = {'appended': 0, 'segments': 0, 'bytes': 0, 'flush_errors': 0}
+        self._lines: List[Tuple[str, bytes, Future]] = []
+        self._size = 0
+        self._opened_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def append(self, key: str, doc: Dict[str, Any]) -> Future:
+        """Enfileira um artefato sob a chave lógica `key`; o Future resolve quando ele for gravado"""
+        line = dumps({'key': key, 'doc': doc}) + b'\n'
+        written: Future = Future()
+        with self._lock:
+            if self._opened_at is None:
+                self._opened_at = time.monotonic()
+            self._lines.append((key, line, written))
+            self._size += len(line)
+            self.stats['appended'] += 1
+            due = self._size >= self.max_bytes or time.monotonic() - self._opened_at >= self.max_age
+        if due:
+            self._flush_quietly()
+        return written
+
+    def _flush_quietly(self) -> None:
+        # A falha não pertence ao artefato recém-enfileirado: as linhas voltaram
+        # ao buffer e serão gravadas na próxima tentativa
+        try:
+            self.flush()
+        except Exception as e:
+            self.stats['flush_errors'] += 1
+            logger.warning("Falha ao gravar segmento: %s", e)
+
+    def flush(self) -> Optional[str]:
+        """Grava o segmento pendente; retorna sua chave (ou None se vazio)"""
+        with self._flush_lock:
+            with self._lock:
+                lines, self._lines = self._lines, []
+                self._size = 0
+                self._opened_at = None
+            if not lines:
+                return None
+
+            now = datetime.now(timezone.utc)
+            segment = (f"{self.prefix}{now.strftime('%Y/%m/%d')}/"
+                       f"seg-{now.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}.jsonl")
+            entries = []
+            offset = 0
+            for key, line, _ in lines:
+                entries.append([key, offset, len(line)])
+                offset += len(line)
+
+            try:
+                self.s3.put_object(
+                    Bucket=self.bucket,
+                    Key=segment,
+                    Body=b''.join(line for _, line, _ in lines),
+                    ContentType='application/x-ndjson; charset=utf-8'
+                )
+                self.s3.put_object(
+                    Bucket=self.bucket,
+                    Key=segment + INDEX_SUFFIX,
+                    Body=dumps({'segment': segment, 'entries': entries}),
+                    ContentType='application/json'
+                )
+            except Exception:
+                with self._lock:
+                    self._lines[:0] = lines
+                    self._size += offset
+                    self._opened_at = self._opened_at or time.monotonic()
+                raise
+
+            pointers = [SegmentPointer(segment, start, length) for _, start, length in entries]
+            with self._lock:
+                for (key, _, _), pointer in zip(lines, pointers):
+                    self.index[key] = pointer
+            self.stats['segments'] += 1
+            self.stats['bytes'] += offset
+            for (_, _, written), pointer in zip(lines, pointers):
+                written.set_result(pointer)
+            return segment
+
+    def start(self) -> None:
+        """Inicia a verificação periódica de idade do segmento em thread daemon"""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='segment-writer', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Interrompe a thread e grava o que estiver pendente"""
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def _run(self) -> None:
+        while not self._stop.wait(min(self.max_age, 1.0)):
+            with self._lock:
+                due = self._opened_at is not None and time.monotonic() - self._opened_at >= self.max_age
+            if due:
+                self._flush_quietly()
+
+
+class SegmentStore:
+    """
+    Leitura de artefatos segmentados
+
+    Uso:
+        store = SegmentStore(s3, BUCKET)
+        store.load_index()                      # lê os .idx do prefixo
+        documento = store.get('bedrock/outputs/atividades/atividade-fracoes-1.json')
+        for chave, doc in store.export(segmento):
+            ...
+    """
+
+    def __init__(self, s3, bucket: str, prefix: str = SEGMENTS_PREFIX):
+        self.s3 = s3
+        self.bucket = bucket
+        self.prefix = prefix
+        self.index: Dict[str, SegmentPointer] = {}
+        self._loaded: set = set()
+
+    def load_index(self, prefix: Optional[str] = None) -> int:
+        """Carrega os índices ainda não lidos sob `prefix`; retorna quantos segmentos foram lidos"""
+        loaded = 0
+        paginator = self.s3.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=prefix or self.prefix):
+            for obj in page.get('Contents', []):
+                key = obj['Key']
+                if not key.endswith(INDEX_SUFFIX) or key in self._loaded:
+                    continue
+                self.add_index(loads(self.s3.get_object(Bucket=self.bucket, Key=key)['Body'].read()))
+                self._loaded.add(key)
+                loaded += 1
+        return loaded
+
+    def add_index(self, index: Dict[str, Any]) -> None:
+        for key, offset, length in index['entries']:
+            self.index[key] = SegmentPointer(index['segment'], offset, length)
+
+    def get(self, key: str) -> Dict[str, Any]:
+        """Lê um artefato com um único GET com Range"""
+        pointer = self.index.get(key)
+        if pointer is None:
+            raise KeyError(key)
+        body = self.s3.get_object(Bucket=self.bucket, Key=pointer.segment, Range=pointer.range)['Body'].read()
+        return loads(body)['doc']
+
+    def export(self, segment: str) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Todos os artefatos de um segmento, com um único GET"""
+        body = self.s3.get_object(Bucket=self.bucket, Key=segment)['Body']
+        for line in body.iter_lines():
+            if line.strip():
+                record = loads(line)
+                yield record['key'], record['doc']
@@ -0,0 +1,272 @@
+"""
+Cache semântico de gerações (quase-duplicatas com redação diferente)
+
+Cada prompt é convertido em embedding (Bedrock Titan ou, em testes, um
+embedder local por hashing de n-gramas) e comparado por similaridade de
+cosseno com um índice NumPy. Acima do limiar configurado, a geração
+anterior é reutilizada.
+
+O índice fica em disco: os vetores em um arquivo float32 memory-mapped e
+os metadados/respostas em um JSONL ao lado. Após um reinício ele é
+reaberto sem reprocessar os artefatos JSON do S3.
+
+Requer numpy (dependência opcional): sem ele, create_semantic_cache()
+retorna None e o motor de geração segue só com o cache exato.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import unicodedata
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Tuple
+
+from config.aws_clients import get_client
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+logger = logging.getLogger(__name__)
+
+TITAN_EMBED_MODEL_ID = 'amazon.titan-embed-text-v2:0'
+_TOKEN_RE = re.compile(r'\w+')
+
+
+class Embedder(ABC):
+    """Converte textos em vetores float32 normalizados (norma L2 = 1)"""
+
+    dimensions = 0
+
+    @abstractmethod
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """Matriz (len(texts), dimensions) com um vetor por texto"""
+
+
+class TitanEmbedder(Embedder):
+    """Embeddings do Amazon Titan Text Embeddings V2 via invoke_model"""
+
+    def __init__(self, model_id: str = TITAN_EMBED_MODEL_ID, dimensions: int = 512, bedrock=None):
+        self.model_id = model_id
+        self.dimensions = dimensions
+        self.bedrock = bedrock or get_client('bedrock-runtime')
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        vectors = np.empty((len(texts), self.dimensions), dtype=np.float32)
+        for row, text in enumerate(texts):
+            response = self.bedrock.invoke_model(
+                modelId=self.model_id,
+                body=json.dumps({'inputText': text, 'dimensions': self.dimensions, 'normalize': True})
+            )
+            vectors[row] = json.loads(response['body'].read())['embedding']
+        return vectors
+
+
+class HashingEmbedder(Embedder):
+    """
+    Embedder local e determinístico (feature hashing de palavras e trigramas)
+
+    Não captura sinônimos, mas reconhece reformulações com vocabulário
+    parecido; serve para testes e ambientes sem acesso ao Bedrock.
+    """
+
+    def __init__(self, dimensions: int = 512):
+        self.dimensions = dimensions
+
+    def _features(self, text: str) -> List[str]:
+        normalized = unicodedata.normalize('NFKD', text.lower())
+        normalized = ''.join(c for c in normalized if not unicodedata.combining(c))
+        words = _TOKEN_RE.findall(normalized)
+        features = [f"w:{w}" for w in words]
+        for word in words:
+            padded = f" {word} "
+            features.extend(f"c:{padded[i:i + 3]}" for i in range(len(padded) - 2))
+        return features
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dimensions), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                digest = hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest()
+                value = int.from_bytes(digest, 'little')
+                vectors[row, value % self.dimensions] += 1.0 if (value >> 63) == 0 else -1.0
+            norm = np.linalg.norm(vectors[row])
+            if norm:
+                vectors[row] /= norm
+        return vectors
+
+
+class VectorIndex:
+    """
+    Índice vetorial persistente com vetores em np.memmap
+
+    Arquivos em `directory`: vectors.f32 (capacidade x dimensões),
+    entries.jsonl (uma linha por vetor) e meta.json (contagem e dimensões).
+    """
+
+    def __init__(self, directory: str, dimensions: int, initial_capacity: int = 1024):
+        self.directory = directory
+        self.dimensions = dimensions
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+        self._vectors_path = os.path.join(directory, 'vectors.f32')
+        self._entries_path = os.path.join(directory, 'entries.jsonl')
+        self._meta_path = os.path.join(directory, 'meta.json')
+
+        meta = self._read_meta()
+        if meta and meta['dimensions'] != dimensions:
+            raise ValueError(f"Índice em {directory} tem {meta['dimensions']} dimensões, esperado {dimensions}")
+        self.count = meta['count'] if meta else 0
+        self.capacity = meta['capacity'] if meta else initial_capacity
+
+        self.entries: List[Dict[str, Any]] = []
+        if os.path.exists(self._entries_path):
+            with open(self._entries_path, 'r', encoding='utf-8') as f:
+                self.entries = [json.loads(line) for _, line in zip(range(self.count), f)]
+        self.count = min(self.count, len(self.entries))
+        self._scopes = np.array([hash(e['scope']) for e in self.entries], dtype=np.int64)
+        self._vectors = self._open(self.capacity)
+
+    def _read_meta(self) -> Optional[Dict[str, int]]:
+        try:
+            with open(self._meta_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _write_meta(self) -> None:
+        tmp_path = f"{self._meta_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'count': self.count, 'capacity': self.capacity, 'dimensions': self.dimensions}, f)
+        os.replace(tmp_path, self._meta_path)
+
+    def _open(self, capacity: int) -> np.memmap:
+        size = capacity * self.dimensions * 4
+        with open(self._vectors_path, 'ab') as f:
+            if f.tell() < size:
+                f.truncate(size)
+        return np.memmap(self._vectors_path, dtype=np.float32, mode='r+', shape=(capacity, self.dimensions))
+
+    def add(self, vector: np.ndarray, scope: str, payload: Dict[str, Any]) -> int:
+        """Adiciona um vetor normalizado e seu payload; retorna a posição"""
+        with self._lock:
+            if self.count >= self.capacity:
+                self._vectors.flush()
+                del self._vectors
+                self.capacity *= 2
+                self._vectors = self._open(self.capacity)
+
+            position = self.count
+            self._vectors[position] = vector
+            self._vectors.flush()
+
+            entry = {'scope': scope, **payload}
+            with open(self._entries_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+            self.entries.append(entry)
+            self._scopes = np.append(self._scopes, hash(scope))
+
+            self.count += 1
+            self._write_meta()
+            return position
+
+    def search(self, vector: np.ndarray, scope: str) -> Tuple[int, float]:
+        """Retorna (posição, similaridade) do vizinho mais próximo no escopo, ou (-1, 0.0)"""
+        # add() pode trocar o memmap ao crescer; a busca usa as referências
+        # lidas sob o lock (o memmap antigo continua válido enquanto referenciado)
+        with self._lock:
+            count, vectors, scopes = self.count, self._vectors, self._scopes
+        if count == 0:
+            return -1, 0.0
+        scores = vectors[:count] @ vector
+        scores = np.where(scopes[:count] == hash(scope), scores, -np.inf)
+        best = int(np.argmax(scores))
+        if not np.isfinite(scores[best]):
+            return -1, 0.0
+        return best, float(scores[best])
+
+
+class SemanticCache:
+    """
+    Reutiliza gerações anteriores cujo prompt é semanticamente próximo
+
+    O escopo de comparação é (modelId, max_tokens, hash do prompt de sistema,
+    temperatura e, em pedidos de PromptTemplate, nome e variáveis do
+    template): respostas de outro modelo, limite de tokens, modelo de prompt
+    ou temperatura nunca são reaproveitadas, nem as de outras variáveis do
+    mesmo template ("5º ano" e "6º ano" diferem em poucos caracteres e
+    ficariam acima do limiar).
+
+    Uso:
+        cache = create_semantic_cache(TitanEmbedder(), '.cache/semantic', threshold=0.92)
+        engine = GenerationEngine(bucket=BUCKET, semantic_cache=cache)  # None desativa
+    """
+
+    def __init__(self, embedder: Embedder, directory: str, threshold: float = 0.92):
+        if np is None:
+            raise RuntimeError("O cache semântico requer numpy (pip install numpy)")
+        self.embedder = embedder
+        self.threshold = threshold
+        self.index = VectorIndex(directory, embedder.dimensions)
+        self.hits = 0
+        self.misses = 0
+        self.last_score = 0.0
+
+    @staticmethod
+    def scope(model_id: str, max_tokens: int, system_hash: Optional[str] = None,
+              temperature: Optional[float] = None, template: Optional[Dict[str, Any]] = None) -> str:
+        scope = f"{model_id}|{max_tokens}|{system_hash or ''}|{'' if temperature is None else temperature}"
+        if template:
+            variables = json.dumps(template.get('variables', {}), sort_keys=True, ensure_ascii=False)
+            scope = f"{scope}|{template['name']}:{hashlib.sha256(variables.encode('utf-8')).hexdigest()[:16]}"
+        return scope
+
+    def embed(self, prompt: str) -> np.ndarray:
+        return self.embedder.embed([prompt])[0]
+
+    def lookup(self, prompt: str, model_id: str, max_tokens: int, vector: Optional[np.ndarray] = None,
+               system_hash: Optional[str] = None, temperature: Optional[float] = None,
+               template: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """Retorna o payload salvo se a similaridade atingir o limiar"""
+        vector = self.embed(prompt) if vector is None else vector
+        scope = self.scope(model_id, max_tokens, system_hash, temperature, template)
+        position, score = self.index.search(vector, scope)
+        self.last_score = score
+        if position < 0 or score < self.threshold:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return {**self.index.entries[position], 'similarity': score}
+
+    def add(self, prompt: str, model_id: str, max_tokens: int, text: str, vector: Optional[np.ndarray] = None,
+            system_hash: Optional[str] = None, temperature: Optional[float] = None,
+            template: Optional[Dict[str, Any]] = None, **extra) -> None:
+        vector = self.embed(prompt) if vector is None else vector
+        scope = self.scope(model_id, max_tokens, system_hash, temperature, template)
+        self.index.add(vector, scope, {'prompt': prompt, 'text': text, **extra})
+
+    def metrics(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total, 3) if total else 0.0,
+            'entries': self.index.count,
+            'threshold': self.threshold
+        }
+
+
+def create_semantic_cache(embedder: Optional[Embedder] = None, directory: str = '.cache/semantic',
+                          threshold: float = 0.92) -> Optional[SemanticCache]:
+    """SemanticCache pronto para o motor, ou None (com aviso) se numpy não estiver instalado"""
+    if np is None:
+        logger.warning("numpy não instalado: cache semântico desativado")
+        return None
+    return SemanticCache(embedder or TitanEmbedder(), directory, threshold)
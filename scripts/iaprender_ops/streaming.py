@@ -0,0 +1,199 @@
+"""
+Geração em streaming com persistência incremental via multipart upload
+
+Os tokens são entregues ao chamador assim que chegam do
+invoke_model_with_response_stream. Em paralelo, o artefato JSON é
+escrito em partes de um multipart upload no S3, de modo que a memória
+fica limitada ao tamanho de uma parte mesmo para respostas longas.
+TTFT e tokens/s são medidos durante o stream.
+"""
+
+import json
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+from config.aws_clients import get_client
+from iaprender_ops.generation import GenerationRequest, build_body
+
+MIN_PART_SIZE = 5 * 1024 * 1024
+
+
+@dataclass
+class StreamMetrics:
+    """Métricas do stream; tempos em segundos"""
+    ttft: Optional[float] = None
+    total: float = 0.0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    chunks: int = 0
+
+    @property
+    def tokens_per_second(self) -> float:
+        generation_time = self.total - (self.ttft or 0.0)
+        return self.output_tokens / generation_time if generation_time > 0 else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'ttft_ms': round(self.ttft * 1000, 1) if self.ttft is not None else None,
+            'total_ms': round(self.total * 1000, 1),
+            'input_tokens': self.input_tokens,
+            'output_tokens': self.output_tokens,
+            'tokens_per_second': round(self.tokens_per_second, 1)
+        }
+
+
+class MultipartWriter:
+    """Acumula bytes e envia partes de `part_size` em segundo plano"""
+
+    def __init__(self, s3, bucket: str, key: str, part_size: int = MIN_PART_SIZE,
+                 content_type: str = 'application/json; charset=utf-8'):
+        if part_size < MIN_PART_SIZE:
+            raise ValueError(f"part_size deve ser >= {MIN_PART_SIZE} bytes")
+        self.s3 = s3
+        self.bucket = bucket
+        self.key = key
+        self.part_size = part_size
+        self._buffer = bytearray()
+        self._futures: List[Future] = []
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='multipart')
+        self._finished = False
+        self.upload_id = s3.create_multipart_upload(Bucket=bucket, Key=key, ContentType=content_type)['UploadId']
+
+    def write(self, data: bytes) -> None:
+        self._buffer += data
+        while len(self._buffer) >= self.part_size:
+            self._submit(bytes(self._buffer[:self.part_size]))
+            del self._buffer[:self.part_size]
+
+    def _submit(self, data: bytes) -> None:
+        part_number = len(self._futures) + 1
+        self._futures.append(self._executor.submit(self._upload, part_number, data))
+
+    def _upload(self, part_number: int, data: bytes) -> Dict[str, Any]:
+        response = self.s3.upload_part(
+            Bucket=self.bucket, Key=self.key, UploadId=self.upload_id, PartNumber=part_number, Body=data
+        )
+        return {'PartNumber': part_number, 'ETag': response['ETag']}
+
+    def close(self) -> None:
+        """Envia o restante do buffer e conclui o upload"""
+        try:
+            if self._buffer or not self._futures:
+                self._submit(bytes(self._buffer))
+                self._buffer.clear()
+            parts = [future.result() for future in self._futures]
+            self.s3.complete_multipart_upload(
+                Bucket=self.bucket, Key=self.key, UploadId=self.upload_id, MultipartUpload={'Parts': parts}
+            )
+            self._finished = True
+        except Exception:
+            self.abort()
+            raise
+        finally:
+            self._executor.shutdown(wait=False)
+
+    def abort(self) -> None:
+        if self._finished:
+            return
+        self._finished = True
+        for future in self._futures:
+            future.cancel()
+        self.s3.abort_multipart_upload(Bucket=self.bucket, Key=self.key, UploadId=self.upload_id)
+        self._executor.shutdown(wait=False)
+
+
+class StreamingGeneration:
+    """
+    Iterador de deltas de texto de uma geração em streaming
+
+    Uso:
+        stream = StreamingGeneration(request, bucket=BUCKET)
+        for delta in stream:
+            enviar_ao_professor(delta)
+        print(stream.metrics.as_dict())
+
+    Se `request.key` estiver definido, o artefato (mesmo formato JSON dos
+    demais, com 'conteudo' e 'metrics') é gravado incrementalmente no S3.
+    """
+
+    def __init__(self, request: GenerationRequest, bucket: Optional[str] = None,
+                 bedrock=None, s3=None, part_size: int = MIN_PART_SIZE):
+        self.request = request
+        self.bucket = bucket
+        self.bedrock = bedrock or get_client('bedrock-runtime')
+        self.s3 = s3 if s3 is not None else (get_client('s3') if request.key else None)
+        self.part_size = part_size
+        self.metrics = StreamMetrics()
+        self.stop_reason: Optional[str] = None
+
+    def __iter__(self) -> Iterator[str]:
+        writer = None
+        if self.request.key:
+            writer = MultipartWriter(self.s3, self.bucket, self.request.key, self.part_size)
+            writer.write(self._artifact_head())
+
+        started = time.perf_counter()
+        try:
+            response = self.bedrock.invoke_model_with_response_stream(
+                modelId=self.request.model_id,
+                body=build_body(self.request)
+            )
+            for event in response['body']:
+                chunk = event.get('chunk')
+                if chunk is None:
+                    continue
+                delta = self._handle(json.loads(chunk['bytes']))
+                if delta:
+                    if self.metrics.ttft is None:
+                        self.metrics.ttft = time.perf_counter() - started
+                    self.metrics.chunks += 1
+                    if writer is not None:
+                        writer.write(json.dumps(delta, ensure_ascii=False)[1:-1].encode('utf-8'))
+                    yield delta
+            self.metrics.total = time.perf_counter() - started
+
+            if writer is not None:
+                writer.write(self._artifact_tail())
+                writer.close()
+        except BaseException:
+            if writer is not None:
+                writer.abort()
+            raise
+
+    def _handle(self, event: Dict[str, Any]) -> Optional[str]:
+        kind = event.get('type')
+        if kind == 'content_block_delta':
+            return event.get('delta', {}).get('text')
+        if kind == 'message_start':
+            self.metrics.input_tokens = event.get('message', {}).get('usage', {}).get('input_tokens', 0)
+        elif kind == 'message_delta':
+            self.metrics.output_tokens = event.get('usage', {}).get('output_tokens', self.metrics.output_tokens)
+            self.stop_reason = event.get('delta', {}).get('stop_reason')
+        elif kind == 'message_stop':
+            invocation = event.get('amazon-bedrock-invocationMetrics', {})
+            self.metrics.input_tokens = invocation.get('inputTokenCount', self.metrics.input_tokens)
+            self.metrics.output_tokens = invocation.get('outputTokenCount', self.metrics.output_tokens)
+        return None
+
+    def _artifact_head(self) -> bytes:
+        header = {
+            'id': str(uuid.uuid4()),
+            'timestamp': datetime.now().isoformat(),
+            'prompt': self.request.prompt,
+            'model': self.request.model_id,
+            **self.request.artifact
+        }
+        encoded = json.dumps(header, ensure_ascii=False)
+        return (encoded[:-1] + (', ' if header else '') + '"conteudo": "').encode('utf-8')
+
+    def _artifact_tail(self) -> bytes:
+        tail = {'metrics': self.metrics.as_dict(), 'stop_reason': self.stop_reason}
+        return ('", ' + json.dumps(tail, ensure_ascii=False)[1:]).encode('utf-8')
+
+    def text(self) -> str:
+        """Consome o stream inteiro e retorna o texto completo"""
+        return ''.join(self)
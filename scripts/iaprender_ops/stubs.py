@@ -0,0 +1,395 @@
+"""
+Dublês locais de serviços AWS para execução offline
+
+MemoryS3 implementa o subconjunto da API do cliente S3 usado pelas
+ferramentas deste pacote, guardando os objetos em memória. StubBedrock
+imita o bedrock-runtime com latências sorteadas de distribuições
+configuráveis por modelo e throttling acima de uma capacidade.
+"""
+
+import base64
+import hashlib
+import io
+import json
+import math
+import random
+import threading
+import time
+import uuid
+import zlib
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional
+
+
+class StubClientError(Exception):
+    """Erro no formato de botocore.exceptions.ClientError (atributo `response`)"""
+
+    def __init__(self, code: str, message: str = '', operation: str = ''):
+        super().__init__(f"An error occurred ({code}) when calling the {operation} operation: {message}")
+        self.response = {'Error': {'Code': code, 'Message': message}}
+
+
+class StreamingBody:
+    """Imitação de botocore.response.StreamingBody"""
+
+    def __init__(self, data: bytes):
+        self._stream = io.BytesIO(data)
+
+    def read(self, amt: Optional[int] = None) -> bytes:
+        return self._stream.read() if amt is None else self._stream.read(amt)
+
+    def iter_lines(self, chunk_size: int = 1024, keepends: bool = False) -> Iterator[bytes]:
+        for line in self._stream:
+            yield line if keepends else line.rstrip(b'\r\n')
+
+    def iter_chunks(self, chunk_size: int = 1024) -> Iterator[bytes]:
+        while True:
+            chunk = self._stream.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+    def close(self) -> None:
+        self._stream.close()
+
+
+class MemoryS3:
+    """Cliente S3 em memória (um único bucket lógico por nome)"""
+
+    def __init__(self):
+        self.objects: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self.calls: Dict[str, int] = {}
+        self.uploads: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def _count(self, operation: str) -> None:
+        self.calls[operation] = self.calls.get(operation, 0) + 1
+
+    def _bucket(self, name: str) -> Dict[str, Dict[str, Any]]:
+        return self.objects.setdefault(name, {})
+
+    def put_object(self, Bucket: str, Key: str, Body=b'', **extra) -> Dict[str, Any]:
+        data = Body.encode('utf-8') if isinstance(Body, str) else bytes(Body.read() if hasattr(Body, 'read') else Body)
+        etag = f'"{hashlib.md5(data).hexdigest()}"'
+        with self._lock:
+            self._count('PutObject')
+            self._bucket(Bucket)[Key] = {
+                'Body': data,
+                'ETag': etag,
+                'LastModified': datetime.now(timezone.utc),
+                'ContentType': extra.get('ContentType', 'binary/octet-stream'),
+                'ContentEncoding': extra.get('ContentEncoding'),
+                'Metadata': dict(extra.get('Metadata', {}))
+            }
+        return {'ETag': etag}
+
+    def _get(self, Bucket: str, Key: str, operation: str) -> Dict[str, Any]:
+        with self._lock:
+            self._count(operation)
+            obj = self._bucket(Bucket).get(Key)
+        if obj is None:
+            raise StubClientError('NoSuchKey', Key, operation)
+        return obj
+
+    def get_object(self, Bucket: str, Key: str, Range: Optional[str] = None, **extra) -> Dict[str, Any]:
+        obj = self._get(Bucket, Key, 'GetObject')
+        data = obj['Body']
+        if Range:
+            start, _, end = Range.replace('bytes=', '').partition('-')
+            data = data[int(start):int(end) + 1 if end else None]
+        response = {
+            'Body': StreamingBody(data),
+            'ContentLength': len(data),
+            'ETag': obj['ETag'],
+            'ContentType': obj['ContentType'],
+            'Metadata': dict(obj['Metadata'])
+        }
+        if obj['ContentEncoding']:
+            response['ContentEncoding'] = obj['ContentEncoding']
+        return response
+
+    def head_object(self, Bucket: str, Key: str, **extra) -> Dict[str, Any]:
+        obj = self._get(Bucket, Key, 'HeadObject')
+        response = {
+            'ContentLength': len(obj['Body']),
+            'ETag': obj['ETag'],
+            'LastModified': obj['LastModified'],
+            'ContentType': obj['ContentType'],
+            'Metadata': dict(obj['Metadata'])
+        }
+        if obj['ContentEncoding']:
+            response['ContentEncoding'] = obj['ContentEncoding']
+        return response
+
+    def head_bucket(self, Bucket: str) -> Dict[str, Any]:
+        self._count('HeadBucket')
+        return {}
+
+    def delete_object(self, Bucket: str, Key: str) -> Dict[str, Any]:
+        with self._lock:
+            self._count('DeleteObject')
+            self._bucket(Bucket).pop(Key, None)
+        return {}
+
+    def delete_objects(self, Bucket: str, Delete: Dict[str, Any]) -> Dict[str, Any]:
+        with self._lock:
+            self._count('DeleteObjects')
+            bucket = self._bucket(Bucket)
+            for item in Delete['Objects']:
+                bucket.pop(item['Key'], None)
+        return {'Deleted': [{'Key': item['Key']} for item in Delete['Objects']]}
+
+    def list_objects_v2(self, Bucket: str, Prefix: str = '', MaxKeys: int = 1000,
+                        ContinuationToken: Optional[str] = None, StartAfter: Optional[str] = None,
+                        Delimiter: Optional[str] = None) -> Dict[str, Any]:
+        with self._lock:
+            self._count('ListObjectsV2')
+            keys = sorted(k for k in self._bucket(Bucket) if k.startswith(Prefix))
+            bucket = self._bucket(Bucket)
+        after = ContinuationToken or StartAfter
+        if after:
+            keys = [k for k in keys if k > after]
+
+        contents, prefixes = [], []
+        for key in keys:
+            if Delimiter and Delimiter in key[len(Prefix):]:
+                common = key[:len(Prefix) + key[len(Prefix):].index(Delimiter) + 1]
+                if common not in prefixes:
+                    prefixes.append(common)
+                continue
+            contents.append(key)
+
+        page = contents[:MaxKeys]
+        response: Dict[str, Any] = {
+            'KeyCount': len(page),
+            'IsTruncated': len(contents) > MaxKeys,
+            'Prefix': Prefix
+        }
+        if page:
+            response['Contents'] = [
+                {
+                    'Key': key,
+                    'Size': len(bucket[key]['Body']),
+                    'ETag': bucket[key]['ETag'],
+                    'LastModified': bucket[key]['LastModified']
+                }
+                for key in page
+            ]
+        if prefixes:
+            response['CommonPrefixes'] = [{'Prefix': p} for p in prefixes]
+        if response['IsTruncated']:
+            response['NextContinuationToken'] = page[-1]
+        return response
+
+    def create_multipart_upload(self, Bucket: str, Key: str, **extra) -> Dict[str, Any]:
+        with self._lock:
+            self._count('CreateMultipartUpload')
+            upload_id = uuid.uuid4().hex
+            self.uploads[upload_id] = {'Bucket': Bucket, 'Key': Key, 'Parts': {}, 'Extra': extra}
+        return {'Bucket': Bucket, 'Key': Key, 'UploadId': upload_id}
+
+    def upload_part(self, Bucket: str, Key: str, UploadId: str, PartNumber: int, Body, **extra) -> Dict[str, Any]:
+        data = bytes(Body.read() if hasattr(Body, 'read') else Body)
+        etag = f'"{hashlib.md5(data).hexdigest()}"'
+        with self._lock:
+            self._count('UploadPart')
+            upload = self.uploads.get(UploadId)
+            if upload is None:
+                raise StubClientError('NoSuchUpload', UploadId, 'UploadPart')
+            upload['Parts'][PartNumber] = {'Body': data, 'ETag': etag, 'ChecksumCRC32': extra.get('ChecksumCRC32')}
+        response = {'ETag': etag}
+        if extra.get('ChecksumCRC32'):
+            response['ChecksumCRC32'] = extra['ChecksumCRC32']
+        return response
+
+    def list_parts(self, Bucket: str, Key: str, UploadId: str, PartNumberMarker: int = 0,
+                   MaxParts: int = 1000, **extra) -> Dict[str, Any]:
+        with self._lock:
+            self._count('ListParts')
+            upload = self.uploads.get(UploadId)
+        if upload is None:
+            raise StubClientError('NoSuchUpload', UploadId, 'ListParts')
+        parts = []
+        for number, part in sorted(upload['Parts'].items()):
+            if number <= PartNumberMarker:
+                continue
+            item = {'PartNumber': number, 'ETag': part['ETag'], 'Size': len(part['Body'])}
+            if part.get('ChecksumCRC32'):
+                item['ChecksumCRC32'] = part['ChecksumCRC32']
+            parts.append(item)
+        response = {'Parts': parts[:MaxParts], 'IsTruncated': len(parts) > MaxParts}
+        if response['IsTruncated']:
+            response['NextPartNumberMarker'] = parts[MaxParts - 1]['PartNumber']
+        return response
+
+    def complete_multipart_upload(self, Bucket: str, Key: str, UploadId: str,
+                                  MultipartUpload: Dict[str, Any], **extra) -> Dict[str, Any]:
+        with self._lock:
+            upload = self.uploads.pop(UploadId, None)
+        if upload is None:
+            raise StubClientError('NoSuchUpload', UploadId, 'CompleteMultipartUpload')
+        stored = [upload['Parts'][part['PartNumber']] for part in MultipartUpload['Parts']]
+        self.put_object(Bucket=Bucket, Key=Key, Body=b''.join(part['Body'] for part in stored), **upload['Extra'])
+        self.calls['PutObject'] -= 1
+        self._count('CompleteMultipartUpload')
+        response = {'Bucket': Bucket, 'Key': Key, 'ETag': self.objects[Bucket][Key]['ETag']}
+        if upload['Extra'].get('ChecksumAlgorithm') == 'CRC32' and all(p.get('ChecksumCRC32') for p in stored):
+            combined = b''.join(base64.b64decode(p['ChecksumCRC32']) for p in stored)
+            checksum = base64.b64encode(zlib.crc32(combined).to_bytes(4, 'big')).decode('ascii')
+            response['ChecksumCRC32'] = f"{checksum}-{len(stored)}"
+        return response
+
+    def abort_multipart_upload(self, Bucket: str, Key: str, UploadId: str) -> Dict[str, Any]:
+        with self._lock:
+            self._count('AbortMultipartUpload')
+            self.uploads.pop(UploadId, None)
+        return {}
+
+    def get_paginator(self, operation: str):
+        if operation != 'list_objects_v2':
+            raise NotImplementedError(operation)
+        return _ListPaginator(self)
+
+
+class _ListPaginator:
+    def __init__(self, s3: MemoryS3):
+        self.s3 = s3
+
+    def paginate(self, **kwargs) -> Iterator[Dict[str, Any]]:
+        page_size = kwargs.pop('PaginationConfig', {}).get('PageSize', 1000)
+        token = None
+        while True:
+            page = self.s3.list_objects_v2(MaxKeys=page_size, ContinuationToken=token, **kwargs)
+            yield page
+            if not page['IsTruncated']:
+                return
+            token = page['NextContinuationToken']
+
+
+@dataclass(frozen=True)
+class StubModelProfile:
+    """
+    Comportamento simulado de um modelo
+
+    TTFT segue uma log-normal (mediana e sigma); a saída é emitida a
+    `tokens_per_second`. Com mais de `capacity` chamadas simultâneas, cada
+    chamada excedente sofre throttling com probabilidade `throttle_probability`.
+    """
+    ttft_median: float = 0.4
+    ttft_sigma: float = 0.3
+    tokens_per_second: float = 80.0
+    output_tokens: int = 300
+    capacity: int = 8
+    throttle_probability: float = 0.5
+
+
+DEFAULT_STUB_PROFILES: Dict[str, StubModelProfile] = {
+    'anthropic.claude-3-haiku-20240307-v1:0': StubModelProfile(0.35, 0.3, 120.0, 300, 16, 0.5),
+    'us.anthropic.claude-3-5-haiku-20241022-v1:0': StubModelProfile(0.5, 0.3, 70.0, 300, 12, 0.5),
+    'us.anthropic.claude-3-5-sonnet-20241022-v2:0': StubModelProfile(0.8, 0.4, 50.0, 300, 6, 0.6)
+}
+
+
+class StubBedrock:
+    """
+    bedrock-runtime simulado: invoke_model, invoke_model_with_response_stream e converse
+
+    `time_scale` multiplica todos os tempos simulados (ex.: 0.01 em CI).
+    """
+
+    def __init__(self, profiles: Optional[Dict[str, StubModelProfile]] = None, time_scale: float = 1.0,
+                 seed: Optional[int] = None):
+        self.profiles = dict(DEFAULT_STUB_PROFILES if profiles is None else profiles)
+        self.time_scale = time_scale
+        self.calls: Dict[str, int] = {}
+        self._random = random.Random(seed)
+        self._in_flight: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def _profile(self, model_id: str) -> StubModelProfile:
+        return self.profiles.get(model_id) or StubModelProfile()
+
+    def _enter(self, model_id: str, operation: str) -> StubModelProfile:
+        profile = self._profile(model_id)
+        with self._lock:
+            self.calls[operation] = self.calls.get(operation, 0) + 1
+            in_flight = self._in_flight.get(model_id, 0)
+            throttled = in_flight >= profile.capacity and self._random.random() < profile.throttle_probability
+            if not throttled:
+                self._in_flight[model_id] = in_flight + 1
+        if throttled:
+            raise StubClientError('ThrottlingException', 'Too many requests, please wait before trying again.', operation)
+        return profile
+
+    def _leave(self, model_id: str) -> None:
+        with self._lock:
+            self._in_flight[model_id] -= 1
+
+    def _plan(self, profile: StubModelProfile, max_tokens: int) -> Dict[str, Any]:
+        with self._lock:
+            ttft = self._random.lognormvariate(math.log(profile.ttft_median), profile.ttft_sigma)
+            tokens = max(1, min(max_tokens, int(self._random.gauss(profile.output_tokens, profile.output_tokens * 0.2))))
+        return {'ttft': ttft * self.time_scale, 'tokens': tokens,
+                'per_token': self.time_scale / profile.tokens_per_second}
+
+    @staticmethod
+    def _input_tokens(body: Dict[str, Any]) -> int:
+        text = json.dumps(body.get('messages', []), ensure_ascii=False) + str(body.get('system', ''))
+        return max(1, len(text) // 4)
+
+    def invoke_model(self, modelId: str, body, **extra) -> Dict[str, Any]:
+        request = json.loads(body)
+        profile = self._enter(modelId, 'InvokeModel')
+        try:
+            plan = self._plan(profile, request.get('max_tokens', 800))
+            time.sleep(plan['ttft'] + plan['per_token'] * plan['tokens'])
+        finally:
+            self._leave(modelId)
+        payload = {
+            'content': [{'type': 'text', 'text': ' '.join(['token'] * plan['tokens'])}],
+            'stop_reason': 'end_turn',
+            'usage': {'input_tokens': self._input_tokens(request), 'output_tokens': plan['tokens']}
+        }
+        return {'body': StreamingBody(json.dumps(payload).encode('utf-8')), 'ResponseMetadata': {'HTTPHeaders': {}}}
+
+    def converse(self, modelId: str, messages: List[Dict[str, Any]], system=None,
+                 inferenceConfig: Optional[Dict[str, Any]] = None, **extra) -> Dict[str, Any]:
+        profile = self._enter(modelId, 'Converse')
+        try:
+            plan = self._plan(profile, (inferenceConfig or {}).get('maxTokens', 800))
+            time.sleep(plan['ttft'] + plan['per_token'] * plan['tokens'])
+        finally:
+            self._leave(modelId)
+        return {
+            'output': {'message': {'role': 'assistant', 'content': [{'text': ' '.join(['token'] * plan['tokens'])}]}},
+            'stopReason': 'end_turn',
+            'usage': {'inputTokens': self._input_tokens({'messages': messages, 'system': system}),
+                      'outputTokens': plan['tokens']}
+        }
+
+    def invoke_model_with_response_stream(self, modelId: str, body, **extra) -> Dict[str, Any]:
+        request = json.loads(body)
+        profile = self._enter(modelId, 'InvokeModelWithResponseStream')
+        plan = self._plan(profile, request.get('max_tokens', 800))
+        return {'body': self._events(modelId, plan, self._input_tokens(request))}
+
+    def _events(self, model_id: str, plan: Dict[str, Any], input_tokens: int) -> Iterator[Dict[str, Any]]:
+        def event(payload: Dict[str, Any]) -> Dict[str, Any]:
+            return {'chunk': {'bytes': json.dumps(payload).encode('utf-8')}}
+
+        try:
+            time.sleep(plan['ttft'])
+            yield event({'type': 'message_start', 'message': {'usage': {'input_tokens': input_tokens}}})
+            for start in range(0, plan['tokens'], 4):
+                count = min(4, plan['tokens'] - start)
+                if start:
+                    time.sleep(plan['per_token'] * count)
+                yield event({'type': 'content_block_delta', 'index': 0,
+                             'delta': {'type': 'text_delta', 'text': 'token ' * count}})
+            yield event({'type': 'message_delta', 'delta': {'stop_reason': 'end_turn'},
+                         'usage': {'output_tokens': plan['tokens']}})
+            yield event({'type': 'message_stop', 'amazon-bedrock-invocationMetrics': {
+                'inputTokenCount': input_tokens, 'outputTokenCount': plan['tokens']}})
+        finally:
+            self._leave(model_id)
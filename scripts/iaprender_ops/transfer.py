@@ -0,0 +1,263 @@
+"""
+Transferência paralela de arquivos grandes (videos/, audios/, imagens/, documentos/)
+
+Upload: multipart com partes enviadas em paralelo, tamanho de parte
+ajustado ao arquivo (mínimo 8MB, no máximo 10.000 partes) e CRC32 por
+parte, que o S3 valida no recebimento. O SHA-256 do arquivo inteiro vai
+no metadado `sha256` do objeto. Um upload interrompido é retomado: o
+UploadId fica em um arquivo `.upload.json` ao lado do original e as partes
+já aceitas (ListParts com o mesmo CRC32) não são reenviadas.
+
+Download: HEAD para obter o tamanho, GETs com Range em paralelo gravando
+direto em um arquivo mapeado em memória (mmap) e verificação do SHA-256
+ao final.
+"""
+
+import base64
+import hashlib
+import json
+import math
+import mmap
+import os
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+MIN_PART_SIZE = 5 * 1024 * 1024
+DEFAULT_PART_SIZE = 8 * 1024 * 1024
+MAX_PARTS = 10000
+MEDIA_PREFIXES = ('videos/', 'audios/', 'imagens/', 'documentos/')
+STATE_SUFFIX = '.upload.json'
+_MB = 1024 * 1024
+
+
+class ChecksumMismatch(Exception):
+    """O conteúdo transferido não confere com o checksum esperado"""
+
+
+def choose_part_size(size: int, preferred: int = DEFAULT_PART_SIZE) -> int:
+    """Menor tamanho de parte (múltiplo de 1MB, >= preferred) que cabe em MAX_PARTS partes"""
+    needed = math.ceil(size / MAX_PARTS / _MB) * _MB
+    return max(preferred, needed, MIN_PART_SIZE)
+
+
+def choose_threads(parts: int, maximum: int = 16) -> int:
+    return max(1, min(maximum, parts))
+
+
+def crc32_b64(data) -> str:
+    return base64.b64encode(zlib.crc32(data).to_bytes(4, 'big')).decode('ascii')
+
+
+def file_sha256(path: str, block_size: int = 8 * _MB) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while True:
+            block = f.read(block_size)
+            if not block:
+                return digest.hexdigest()
+            digest.update(block)
+
+
+class TransferEngine:
+    """
+    Upload/download paralelo com retomada e checksums
+
+    Uso:
+        engine = TransferEngine(get_client('s3'), BUCKET)
+        engine.upload('aula.mp4', 'videos/aula.mp4', content_type='video/mp4')
+        engine.download('videos/aula.mp4', '/tmp/aula.mp4')
+    """
+
+    def __init__(self, s3, bucket: str, part_size: int = DEFAULT_PART_SIZE, max_threads: int = 16,
+                 multipart_threshold: int = 16 * _MB):
+        if part_size < MIN_PART_SIZE:
+            raise ValueError(f"part_size deve ser >= {MIN_PART_SIZE} bytes")
+        self.s3 = s3
+        self.bucket = bucket
+        self.part_size = part_size
+        self.max_threads = max_threads
+        self.multipart_threshold = multipart_threshold
+
+    # Upload
+
+    def upload(self, path: str, key: str, content_type: Optional[str] = None,
+               metadata: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        """
+        Envia `path` para `key`, retomando um upload interrompido se houver
+
+        Returns:
+            Dict com key, bytes, parts, resumed_parts, seconds e MB/s
+        """
+        started = time.perf_counter()
+        size = os.path.getsize(path)
+        metadata = dict(metadata or {}, sha256=file_sha256(path))
+        extra: Dict[str, Any] = {'Metadata': metadata}
+        if content_type:
+            extra['ContentType'] = content_type
+
+        if size < self.multipart_threshold:
+            with open(path, 'rb') as f:
+                data = f.read()
+            self.s3.put_object(Bucket=self.bucket, Key=key, Body=data, ChecksumCRC32=crc32_b64(data), **extra)
+            return self._summary(key, size, 1, 0, started)
+
+        part_size = choose_part_size(size, self.part_size)
+        count = math.ceil(size / part_size)
+        upload_id, done = self._resume(path, key, part_size, metadata['sha256'])
+        if upload_id is None:
+            upload_id = self.s3.create_multipart_upload(
+                Bucket=self.bucket, Key=key, ChecksumAlgorithm='CRC32', **extra
+            )['UploadId']
+            self._save_state(path, {'key': key, 'upload_id': upload_id, 'part_size': part_size,
+                                    'sha256': metadata['sha256']})
+
+        with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as source:
+            def send(number: int) -> Dict[str, Any]:
+                start = (number - 1) * part_size
+                view = memoryview(source)[start:start + part_size]
+                try:
+                    checksum = crc32_b64(view)
+                    if number in done and done[number][0] == checksum:
+                        return {'PartNumber': number, 'ETag': done[number][1], 'ChecksumCRC32': checksum}
+                    response = self.s3.upload_part(
+                        Bucket=self.bucket, Key=key, UploadId=upload_id, PartNumber=number,
+                        Body=bytes(view), ChecksumAlgorithm='CRC32', ChecksumCRC32=checksum
+                    )
+                finally:
+                    view.release()
+                return {'PartNumber': number, 'ETag': response['ETag'], 'ChecksumCRC32': checksum}
+
+            # Em caso de erro o upload fica pendente no S3 e o estado local é
+            # mantido, para que a próxima chamada o retome
+            with ThreadPoolExecutor(max_workers=choose_threads(count, self.max_threads),
+                                    thread_name_prefix='upload') as executor:
+                parts = list(executor.map(send, range(1, count + 1)))
+
+        response = self.s3.complete_multipart_upload(
+            Bucket=self.bucket, Key=key, UploadId=upload_id, MultipartUpload={'Parts': parts}
+        )
+        if response.get('ChecksumCRC32') and response['ChecksumCRC32'] != list_checksum(parts):
+            raise ChecksumMismatch(f"{key}: checksum composto {response['ChecksumCRC32']} difere do local")
+        self._clear_state(path)
+        return self._summary(key, size, count, len(done), started)
+
+    def _state_path(self, path: str) -> str:
+        return path + STATE_SUFFIX
+
+    def _save_state(self, path: str, state: Dict[str, Any]) -> None:
+        with open(self._state_path(path), 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+
+    def _clear_state(self, path: str) -> None:
+        try:
+            os.remove(self._state_path(path))
+        except FileNotFoundError:
+            pass
+
+    def _resume(self, path: str, key: str, part_size: int,
+                sha256: str) -> Tuple[Optional[str], Dict[int, Tuple[str, str]]]:
+        """UploadId pendente compatível e partes já aceitas: {número: (crc32, etag)}"""
+        try:
+            with open(self._state_path(path), 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None, {}
+        if state.get('key') != key or state.get('part_size') != part_size or state.get('sha256') != sha256:
+            self._clear_state(path)
+            return None, {}
+
+        done: Dict[int, Tuple[str, str]] = {}
+        marker = 0
+        try:
+            while True:
+                response = self.s3.list_parts(
+                    Bucket=self.bucket, Key=key, UploadId=state['upload_id'], PartNumberMarker=marker
+                )
+                for part in response.get('Parts', []):
+                    if part.get('ChecksumCRC32'):
+                        done[part['PartNumber']] = (part['ChecksumCRC32'], part['ETag'])
+                if not response.get('IsTruncated'):
+                    break
+                marker = response['NextPartNumberMarker']
+        except Exception as e:
+            if getattr(e, 'response', {}).get('Error', {}).get('Code') != 'NoSuchUpload':
+                raise
+            self._clear_state(path)
+            return None, {}
+        return state['upload_id'], done
+
+    # Download
+
+    def download(self, key: str, path: str, verify: bool = True) -> Dict[str, Any]:
+        """
+        Baixa `key` para `path` com GETs com Range em paralelo sobre um mmap
+
+        Raises:
+            ChecksumMismatch: se o SHA-256 do arquivo não conferir com o metadado
+        """
+        started = time.perf_counter()
+        head = self.s3.head_object(Bucket=self.bucket, Key=key)
+        size = head['ContentLength']
+        etag = head['ETag']
+        part_size = choose_part_size(size, self.part_size)
+        count = max(1, math.ceil(size / part_size))
+        temp_path = f"{path}.part"
+
+        with open(temp_path, 'wb+') as f:
+            f.truncate(size)
+            if size:
+                with mmap.mmap(f.fileno(), size) as target:
+                    def fetch(index: int) -> None:
+                        start = index * part_size
+                        end = min(size, start + part_size) - 1
+                        body = self.s3.get_object(
+                            Bucket=self.bucket, Key=key, Range=f"bytes={start}-{end}", IfMatch=etag
+                        )['Body']
+                        position = start
+                        for chunk in body.iter_chunks(1024 * 1024):
+                            target[position:position + len(chunk)] = chunk
+                            position += len(chunk)
+                        if position != end + 1:
+                            raise IOError(f"Parte {index + 1} incompleta: {position - start} de {end - start + 1} bytes")
+
+                    with ThreadPoolExecutor(max_workers=choose_threads(count, self.max_threads),
+                                            thread_name_prefix='download') as executor:
+                        list(executor.map(fetch, range(count)))
+                    target.flush()
+
+        expected = head.get('Metadata', {}).get('sha256')
+        if verify and expected:
+            actual = file_sha256(temp_path)
+            if actual != expected:
+                os.remove(temp_path)
+                raise ChecksumMismatch(f"{key}: SHA-256 {actual} difere do esperado {expected}")
+        os.replace(temp_path, path)
+        return self._summary(key, size, count, 0, started)
+
+    @staticmethod
+    def _summary(key: str, size: int, parts: int, resumed: int, started: float) -> Dict[str, Any]:
+        seconds = time.perf_counter() - started
+        return {
+            'key': key,
+            'bytes': size,
+            'parts': parts,
+            'resumed_parts': resumed,
+            'seconds': round(seconds, 3),
+            'mb_per_second': round(size / _MB / seconds, 1) if seconds else 0.0
+        }
+
+
+def media_key(path: str, folder: str) -> str:
+    """Chave S3 para um arquivo de mídia em uma das pastas conhecidas"""
+    folder = folder if folder.endswith('/') else folder + '/'
+    if folder not in MEDIA_PREFIXES:
+        raise ValueError(f"Pasta desconhecida: {folder} (use {', '.join(MEDIA_PREFIXES)})")
+    return folder + os.path.basename(path)
+
+
+def list_checksum(parts: List[Dict[str, Any]]) -> str:
+    """Checksum composto do S3 para um upload multipart com CRC32 ('<b64>-<partes>')"""
+    combined = b''.join(base64.b64decode(part['ChecksumCRC32']) for part in parts)
+    return f"{crc32_b64(combined)}-{len(parts)}"
@@ -0,0 +1,189 @@
+"""
+Contabilidade de tokens das gerações do Bedrock
+
+- extract_usage(): lê o bloco `usage` real da resposta do modelo
+- estimate_tokens(): estimativa local e rápida para orçamento prévio
+- TokenLedger: agrega consumo por escola/usuário/modelo/dia em memória e
+  descarrega em lotes para um destino (ex.: JSONL em bedrock/logs/usage/)
+"""
+
+import json
+import logging
+import math
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+USAGE_PREFIX = 'bedrock/logs/usage/'
+_PIECE_RE = re.compile(r'\w+|[^\w\s]', re.UNICODE)
+
+# Média observada de caracteres por token em palavras do português com o
+# tokenizador do Claude; palavras longas e acentuadas viram vários tokens.
+CHARS_PER_TOKEN = 3.6
+
+
+def extract_usage(response: Optional[Dict[str, Any]], headers: Optional[Dict[str, str]] = None) -> Dict[str, int]:
+    """
+    Extrai a contagem real de tokens de uma resposta do Bedrock
+
+    Args:
+        response: Corpo JSON retornado pelo modelo (Messages API da Anthropic)
+        headers: HTTPHeaders do invoke_model, usados se o corpo não tiver `usage`
+
+    Returns:
+        Dict com input_tokens e output_tokens (e tokens de cache, se houver)
+    """
+    usage = dict((response or {}).get('usage') or {})
+    if not usage and headers:
+        usage = {
+            'input_tokens': int(headers.get('x-amzn-bedrock-input-token-count', 0)),
+            'output_tokens': int(headers.get('x-amzn-bedrock-output-token-count', 0))
+        }
+    result = {
+        'input_tokens': int(usage.get('input_tokens', 0)),
+        'output_tokens': int(usage.get('output_tokens', 0))
+    }
+    for key in ('cache_read_input_tokens', 'cache_creation_input_tokens'):
+        if usage.get(key):
+            result[key] = int(usage[key])
+    return result
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimativa local de tokens (sem rede), calibrada para texto em português"""
+    total = 0
+    for piece in _PIECE_RE.findall(text or ''):
+        total += 1 if len(piece) <= 4 else math.ceil(len(piece) / CHARS_PER_TOKEN)
+    return total
+
+
+def estimate_request_tokens(prompt: str, max_tokens: int) -> Dict[str, int]:
+    """Orçamento máximo de um pedido: entrada estimada + limite de saída"""
+    input_tokens = estimate_tokens(prompt)
+    return {'input_tokens': input_tokens, 'max_output_tokens': max_tokens, 'max_total_tokens': input_tokens + max_tokens}
+
+
+LedgerKey = Tuple[str, str, str, str]
+
+
+class TokenLedger:
+    """
+    Agregador de consumo de tokens com descarga em lote
+
+    Os registros são somados em memória por (escola_id, usuario_id,
+    model_id, dia) e enviados a `sink` quando há `batch_size` chaves
+    pendentes, a cada `flush_interval` segundos (com start()) ou em flush().
+    Com a thread ativa, record() nunca faz I/O no chamador.
+
+    Uso:
+        ledger = TokenLedger(S3LedgerSink(s3, BUCKET).write)
+        ledger.record('escola-1', 'prof-42', model_id, input_tokens=812, output_tokens=640)
+    """
+
+    def __init__(self, sink: Callable[[List[Dict[str, Any]]], None], batch_size: int = 500,
+                 flush_interval: float = 60.0):
+        self.sink = sink
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._pending: Dict[LedgerKey, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def record(self, escola_id: Optional[str], usuario_id: Optional[str], model_id: str,
+               input_tokens: int = 0, output_tokens: int = 0, cached: bool = False) -> None:
+        day = datetime.now(timezone.utc).strftime('%Y-%m-%d')
+        key = (escola_id or '-', usuario_id or '-', model_id, day)
+        with self._lock:
+            totals = self._pending.setdefault(
+                key, {'requests': 0, 'cached_requests': 0, 'input_tokens': 0, 'output_tokens': 0}
+            )
+            totals['requests'] += 1
+            totals['cached_requests'] += int(cached)
+            totals['input_tokens'] += input_tokens
+            totals['output_tokens'] += output_tokens
+            should_flush = len(self._pending) >= self.batch_size
+        if should_flush:
+            if self._thread is not None:
+                self._wake.set()
+            else:
+                self.flush()
+
+    def totals(self) -> Dict[LedgerKey, Dict[str, int]]:
+        """Cópia dos totais ainda não descarregados"""
+        with self._lock:
+            return {key: dict(value) for key, value in self._pending.items()}
+
+    def flush(self) -> int:
+        """Envia os totais pendentes ao destino; retorna o número de registros"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+        records = [
+            {'escola_id': e, 'usuario_id': u, 'model_id': m, 'dia': d, **totals}
+            for (e, u, m, d), totals in pending.items()
+        ]
+        try:
+            self.sink(records)
+        except Exception:
+            with self._lock:
+                for key, totals in pending.items():
+                    current = self._pending.setdefault(key, dict.fromkeys(totals, 0))
+                    for field, value in totals.items():
+                        current[field] += value
+            raise
+        return len(records)
+
+    def start(self) -> None:
+        """Inicia a descarga periódica em thread daemon"""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='token-ledger', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Interrompe a thread e descarrega o que estiver pendente"""
+        if self._thread is not None:
+            self._stop.set()
+            self._wake.set()
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            if self._stop.is_set():
+                return
+            try:
+                self.flush()
+            except Exception as e:
+                logger.warning("Falha ao descarregar ledger de tokens: %s", e)
+
+
+class S3LedgerSink:
+    """Grava cada lote como um objeto JSONL em bedrock/logs/usage/"""
+
+    def __init__(self, s3, bucket: str, prefix: str = USAGE_PREFIX):
+        self.s3 = s3
+        self.bucket = bucket
+        self.prefix = prefix
+
+    def write(self, records: List[Dict[str, Any]]) -> None:
+        now = datetime.now(timezone.utc)
+        key = f"{self.prefix}{now.strftime('%Y/%m/%d')}/usage-{now.strftime('%H%M%S')}-{time.monotonic_ns()}.jsonl"
+        body = '\n'.join(json.dumps(record, ensure_ascii=False) for record in records)
+        self.s3.put_object(
+            Bucket=self.bucket,
+            Key=key,
+            Body=body.encode('utf-8'),
+            ContentType='application/x-ndjson; charset=utf-8'
+        )
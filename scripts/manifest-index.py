@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Manifesto local dos artefatos de bedrock/outputs/
+
+Exemplos:
+    python scripts/manifest-index.py sync
+    python scripts/manifest-index.py query --ano "5º ano" --disciplina matemática --tipo atividade
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from config.aws_clients import get_client  # noqa: E402
+from iaprender_ops.manifest import OUTPUTS_PREFIX, ManifestIndex  # noqa: E402
+
+BUCKET = os.getenv("S3_BUCKET_NAME")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Índice local (SQLite) dos artefatos do S3")
+    parser.add_argument('--db', default='.cache/manifest.sqlite', help="Arquivo SQLite do índice")
+    parser.add_argument('--prefix', default=OUTPUTS_PREFIX, help="Prefixo raiz indexado")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    sync = subparsers.add_parser('sync', help="Atualiza o índice a partir do S3")
+    sync.add_argument('--since-last-key', action='store_true',
+                      help="Lista só as chaves após a última vista em cada shard (prefixos cronológicos)")
+    sync.add_argument('--workers', type=int, default=16)
+
+    query = subparsers.add_parser('query', help="Consulta o índice sem acessar o S3")
+    for field in ('disciplina', 'ano', 'tema', 'tipo'):
+        query.add_argument(f'--{field}')
+    query.add_argument('--limit', type=int)
+
+    args = parser.parse_args()
+
+    if args.command == 'sync':
+        index = ManifestIndex(get_client('s3'), BUCKET, args.db, args.prefix, workers=args.workers)
+        print(f"🔄 Sincronizando s3://{BUCKET}/{args.prefix} → {args.db}")
+        summary = index.sync(since_last_key=args.since_last_key)
+        print(f"  ✅ {summary['listed']} objetos listados em {summary['shards']} shards, "
+              f"{summary['fetched']} baixados, {summary['removed']} removidos ({summary['elapsed_s']}s)")
+        if 'segments' in summary:
+            print(f"  🧩 {summary['segments']} segmentos, {summary['segments_fetched']} lidos, "
+                  f"{summary['segments_removed']} removidos")
+        print(f"  📚 {index.count()} objetos no índice")
+    else:
+        index = ManifestIndex(None, BUCKET, args.db, args.prefix)
+        started = time.perf_counter()
+        rows = index.query(limit=args.limit, disciplina=args.disciplina, ano=args.ano, tema=args.tema, tipo=args.tipo)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        for row in rows:
+            print(f"  📄 {row['key']} ({row['size'] / 1024:.1f} KB) {row['disciplina'] or '-'} | "
+                  f"{row['ano'] or '-'} | {row['tema'] or '-'} | {row['tipo'] or '-'}")
+        print(f"\n🔎 {len(rows)} resultado(s) em {elapsed_ms:.1f} ms")
+    index.close()
+
+
+if __name__ == "__main__":
+    main()
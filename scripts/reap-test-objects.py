@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Remove objetos de teste (test-{uuid}.json, integration-test-*.json, ...) e temp/ do bucket
+
+Por padrão só mostra o que seria apagado (dry-run); use --execute para apagar.
+
+Exemplos:
+    python scripts/reap-test-objects.py
+    python scripts/reap-test-objects.py --execute --min-age 6 --workers 16
+    python scripts/reap-test-objects.py --rule temp --execute
+"""
+
+import argparse
+import json
+import os
+import sys
+from dataclasses import replace
+from datetime import timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from config.aws_clients import get_client  # noqa: E402
+from iaprender_ops.reaper import DEFAULT_RULES, Reaper  # noqa: E402
+
+BUCKET = os.getenv("S3_BUCKET_NAME")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Limpeza em massa de objetos de teste e temporários")
+    parser.add_argument('--execute', action='store_true', help="Apaga de fato (sem isso é dry-run)")
+    parser.add_argument('--rule', action='append', choices=[rule.name for rule in DEFAULT_RULES],
+                        help="Aplica só a(s) regra(s) indicada(s)")
+    parser.add_argument('--min-age', type=float, help="Idade mínima em horas (substitui a de cada regra)")
+    parser.add_argument('--workers', type=int, default=8, help="Listagens/lotes de exclusão simultâneos")
+    parser.add_argument('--output', help="Arquivo JSON com o relatório")
+    args = parser.parse_args()
+
+    rules = [rule for rule in DEFAULT_RULES if not args.rule or rule.name in args.rule]
+    if args.min_age is not None:
+        rules = [replace(rule, min_age=timedelta(hours=args.min_age)) for rule in rules]
+
+    modo = "EXECUÇÃO" if args.execute else "DRY-RUN"
+    print(f"🧹 Limpeza de s3://{BUCKET} ({modo})")
+    for rule in rules:
+        print(f"  📋 {rule.name}: prefixos {', '.join(rule.prefixes)}, padrão {rule.pattern.pattern}, idade >= {rule.min_age}")
+
+    reaper = Reaper(get_client('s3'), BUCKET, rules, workers=args.workers, dry_run=not args.execute)
+    summary = reaper.run()
+
+    print()
+    for name, report in summary['rules'].items():
+        print(f"📁 {name}: {report['matched']} objetos ({report['bytes'] / 1024:.1f} KB)")
+        for key in report['sample']:
+            print(f"    - {key}")
+        if report['matched'] > len(report['sample']):
+            print(f"    ... e mais {report['matched'] - len(report['sample'])}")
+        for error in report['errors'][:10]:
+            print(f"    ❌ {error['Key']}: {error['Message']}")
+
+    print(f"\n📊 {summary['listed']} objetos listados em {summary['seconds']}s "
+          f"({summary['listed_per_second']} objetos/s)")
+    if args.execute:
+        print(f"  🗑️ {summary['deleted']} de {summary['matched']} apagados ({summary['deleted_per_second']} objetos/s)")
+    else:
+        print(f"  💡 {summary['matched']} seriam apagados ({summary['bytes'] / 1024:.1f} KB); use --execute para apagar")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2, ensure_ascii=False)
+        print(f"\n💾 Relatório salvo em {args.output}")
+
+    if any(report['errors'] for report in summary['rules'].values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
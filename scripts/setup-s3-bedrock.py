@@ -1,10 +1,14 @@
 #!/usr/bin/env python3
-import boto3
 import os
+import sys
 import json
 import uuid
 from datetime import datetime
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from config.aws_clients import get_client  # noqa: E402
+
 # Carregar configs do ambiente
 AWS_KEY = os.getenv("AWS_ACCESS_KEY_ID")
 AWS_SECRET = os.getenv("AWS_SECRET_ACCESS_KEY")
@@ -20,20 +24,10 @@ def setup_s3_bedrock():
         return False
     
     # Cliente S3
-    s3 = boto3.client(
-        's3',
-        aws_access_key_id=AWS_KEY,
-        aws_secret_access_key=AWS_SECRET,
-        region_name=REGIAO
-    )
+    s3 = get_client('s3')
     
     # Cliente Bedrock
-    bedrock = boto3.client(
-        'bedrock-runtime',
-        aws_access_key_id=AWS_KEY,
-        aws_secret_access_key=AWS_SECRET,
-        region_name=REGIAO
-    )
+    bedrock = get_client('bedrock-runtime')
     
     try:
         print(f"🪣 Configurando bucket: {BUCKET}")
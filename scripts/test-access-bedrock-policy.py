@@ -1,10 +1,15 @@
 #!/usr/bin/env python3
-import boto3
 import json
 import os
+import sys
 import uuid
 from datetime import datetime
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from config.aws_clients import get_client  # noqa: E402
+from iaprender_ops.access_matrix import simulation_main  # noqa: E402
+
 # Carregar configs do ambiente
 AWS_KEY = os.getenv("AWS_ACCESS_KEY_ID")
 AWS_SECRET = os.getenv("AWS_SECRET_ACCESS_KEY")
@@ -19,20 +24,10 @@ def test_access_bedrock_policy():
     print(f"⏰ Timestamp: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     
     # Cliente S3
-    s3 = boto3.client(
-        's3',
-        aws_access_key_id=AWS_KEY,
-        aws_secret_access_key=AWS_SECRET,
-        region_name=REGIAO
-    )
+    s3 = get_client('s3')
     
     # Cliente Bedrock
-    bedrock = boto3.client(
-        'bedrock-runtime',
-        aws_access_key_id=AWS_KEY,
-        aws_secret_access_key=AWS_SECRET,
-        region_name=REGIAO
-    )
+    bedrock = get_client('bedrock-runtime')
     
     success_count = 0
     total_tests = 0
@@ -198,4 +193,4 @@ def test_access_bedrock_policy():
         return False
 
 if __name__ == "__main__":
-    test_access_bedrock_policy()
\ No newline at end of file
+    simulation_main("Testa se a política AcessoBedRock está funcionando", BUCKET, REGIAO, test_access_bedrock_policy)
\ No newline at end of file
@@ -1,10 +1,15 @@
 #!/usr/bin/env python3
-import boto3
 import os
+import sys
 import json
 import uuid
 from datetime import datetime
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from config.aws_clients import get_client  # noqa: E402
+from iaprender_ops.access_matrix import simulation_main  # noqa: E402
+
 # Carregar configs do ambiente
 AWS_KEY = os.getenv("AWS_ACCESS_KEY_ID")
 AWS_SECRET = os.getenv("AWS_SECRET_ACCESS_KEY")
@@ -20,20 +25,10 @@ def test_bedrock_permissions():
     print(f"📁 Pasta Output: {PASTA_OUTPUT}")
     
     # Cliente S3
-    s3 = boto3.client(
-        's3',
-        aws_access_key_id=AWS_KEY,
-        aws_secret_access_key=AWS_SECRET,
-        region_name=REGIAO
-    )
+    s3 = get_client('s3')
     
     # Cliente Bedrock Runtime
-    bedrock = boto3.client(
-        'bedrock-runtime',
-        aws_access_key_id=AWS_KEY,
-        aws_secret_access_key=AWS_SECRET,
-        region_name=REGIAO
-    )
+    bedrock = get_client('bedrock-runtime')
     
     # Testar acesso às pastas específicas
     pastas_permitidas = [
@@ -91,7 +86,7 @@ def test_bedrock_permissions():
     
     try:
         # Listar modelos disponíveis
-        bedrock_client = boto3.client('bedrock', region_name=REGIAO)
+        bedrock_client = get_client('bedrock')
         models = bedrock_client.list_foundation_models()
         print(f"✅ Modelos disponíveis: {len(models['modelSummaries'])}")
         
@@ -174,4 +169,4 @@ def test_bedrock_permissions():
     return True
 
 if __name__ == "__main__":
-    test_bedrock_permissions()
\ No newline at end of file
+    simulation_main("Testa permissões IAM do S3 e do Bedrock", BUCKET, REGIAO, test_bedrock_permissions)
\ No newline at end of file
@@ -1,10 +1,16 @@
 #!/usr/bin/env python3
-import boto3
 import os
+import sys
 import json
+import time
 import uuid
 from datetime import datetime
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from config.aws_clients import get_client  # noqa: E402
+from iaprender_ops.usage import estimate_tokens, extract_usage  # noqa: E402
+
 # Carregar configs do ambiente
 AWS_KEY = os.getenv("AWS_ACCESS_KEY_ID")
 AWS_SECRET = os.getenv("AWS_SECRET_ACCESS_KEY")
@@ -19,12 +25,7 @@ def test_direct_s3():
     print(f"📦 Bucket: {BUCKET}")
     
     # Cliente S3
-    s3 = boto3.client(
-        's3',
-        aws_access_key_id=AWS_KEY,
-        aws_secret_access_key=AWS_SECRET,
-        region_name=REGIAO
-    )
+    s3 = get_client('s3')
     
     # Testar PutObject diretamente
     test_key = f"{PASTA_OUTPUT}/test-direct-{uuid.uuid4()}.json"
@@ -81,16 +82,12 @@ def test_direct_s3():
     
     try:
         # Cliente Bedrock
-        bedrock = boto3.client(
-            'bedrock-runtime',
-            aws_access_key_id=AWS_KEY,
-            aws_secret_access_key=AWS_SECRET,
-            region_name=REGIAO
-        )
+        bedrock = get_client('bedrock-runtime')
         
         # Fazer uma chamada para o Bedrock
         prompt = "Explique em uma frase o que é inteligência artificial educacional."
         
+        started = time.perf_counter()
         response = bedrock.invoke_model(
             modelId='anthropic.claude-3-haiku-20240307-v1:0',
             body=json.dumps({
@@ -101,7 +98,9 @@ def test_direct_s3():
         )
         
         result = json.loads(response['body'].read())
+        processing_time = time.perf_counter() - started
         bedrock_output = result['content'][0]['text']
+        usage = extract_usage(result, response['ResponseMetadata'].get('HTTPHeaders'))
         
         print(f"✅ Resposta do Bedrock: {bedrock_output[:60]}...")
         
@@ -114,9 +113,10 @@ def test_direct_s3():
             "model": "anthropic.claude-3-haiku-20240307-v1:0",
             "response": bedrock_output,
             "metadata": {
-                "tokens_input": len(prompt.split()),
-                "tokens_output": len(bedrock_output.split()),
-                "processing_time": "~1s"
+                "tokens_input": usage['input_tokens'],
+                "tokens_output": usage['output_tokens'],
+                "tokens_input_estimado": estimate_tokens(prompt),
+                "processing_time_ms": round(processing_time * 1000, 1)
             }
         }
         
@@ -1,10 +1,17 @@
 #!/usr/bin/env python3
-import boto3
-import json
+import asyncio
 import os
+import sys
 import uuid
 from datetime import datetime
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from config.aws_clients import get_client  # noqa: E402
+from iaprender_ops.codec import ArtifactCodec  # noqa: E402
+from iaprender_ops.converse import ATIVIDADE, PLANO_AULA  # noqa: E402
+from iaprender_ops.generation import GenerationEngine, GenerationRequest, bedrock_client  # noqa: E402
+
 # Carregar configs do ambiente
 AWS_KEY = os.getenv("AWS_ACCESS_KEY_ID")
 AWS_SECRET = os.getenv("AWS_SECRET_ACCESS_KEY")
@@ -20,19 +27,9 @@ def test_final_system():
     print(f"⏰ Timestamp: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     
     # Clientes AWS
-    s3 = boto3.client(
-        's3',
-        aws_access_key_id=AWS_KEY,
-        aws_secret_access_key=AWS_SECRET,
-        region_name=REGIAO
-    )
+    s3 = get_client('s3')
     
-    bedrock = boto3.client(
-        'bedrock-runtime',
-        aws_access_key_id=AWS_KEY,
-        aws_secret_access_key=AWS_SECRET,
-        region_name=REGIAO
-    )
+    bedrock = bedrock_client()
     
     # Teste 1: Criar estrutura de pastas
     print(f"\n📁 Teste 1: Criando estrutura de pastas...")
@@ -56,119 +53,64 @@ def test_final_system():
         except Exception as e:
             print(f"  ❌ {pasta}: {str(e)}")
     
-    # Teste 2: Cenário educacional - Plano de aula
-    print(f"\n📚 Teste 2: Cenário educacional - Plano de aula...")
-    
-    try:
-        # Prompt educacional
-        prompt = """
-        Crie um plano de aula de matemática para 5º ano do ensino fundamental sobre frações. 
-        Inclua: objetivos, conteúdos, metodologia, recursos e avaliação.
-        Alinhado com a BNCC.
-        """
-        
-        # Chamada para Bedrock
-        response = bedrock.invoke_model(
-            modelId='anthropic.claude-3-haiku-20240307-v1:0',
-            body=json.dumps({
-                "anthropic_version": "bedrock-2023-05-31",
-                "max_tokens": 800,
-                "messages": [{"role": "user", "content": prompt}]
-            })
-        )
-        
-        result = json.loads(response['body'].read())
-        plano_aula = result['content'][0]['text']
-        
-        print(f"  ✅ Plano de aula gerado ({len(plano_aula)} caracteres)")
-        
-        # Salvar no S3
-        plano_key = f"bedrock/outputs/planos-aula/plano-fracoes-{uuid.uuid4()}.json"
-        plano_data = {
-            "id": str(uuid.uuid4()),
-            "timestamp": datetime.now().isoformat(),
-            "disciplina": "Matemática",
-            "ano": "5º ano",
-            "tema": "Frações",
-            "prompt": prompt,
-            "model": "anthropic.claude-3-haiku-20240307-v1:0",
-            "conteudo": plano_aula,
-            "metadata": {
-                "tipo": "plano_aula",
-                "bncc_aligned": True,
-                "professor": "Sistema IAprender",
-                "duracao_estimada": "50 minutos"
+    # Testes 2 e 3: Cenários educacionais gerados em paralelo
+    print(f"\n📚 Testes 2 e 3: Plano de aula e atividade (geração concorrente)...")
+    
+    requests = [
+        GenerationRequest.from_template(
+            PLANO_AULA,
+            {"disciplina": "matemática", "ano": "5º ano do ensino fundamental", "tema": "frações",
+             "duracao": "50 minutos"},
+            max_tokens=800,
+            key=f"bedrock/outputs/planos-aula/plano-fracoes-{uuid.uuid4()}.json",
+            artifact={
+                "disciplina": "Matemática",
+                "ano": "5º ano",
+                "tema": "Frações",
+                "metadata": {
+                    "tipo": "plano_aula",
+                    "bncc_aligned": True,
+                    "professor": "Sistema IAprender",
+                    "duracao_estimada": "50 minutos"
+                }
+            }
+        ),
+        GenerationRequest.from_template(
+            ATIVIDADE,
+            {"disciplina": "matemática", "ano": "5º ano", "tema": "frações", "exercicios": 5},
+            max_tokens=600,
+            key=f"bedrock/outputs/atividades/atividade-fracoes-{uuid.uuid4()}.json",
+            artifact={
+                "disciplina": "Matemática",
+                "ano": "5º ano",
+                "tema": "Frações",
+                "tipo": "atividade_pratica",
+                "metadata": {
+                    "exercicios": 5,
+                    "dificuldade": "variada",
+                    "tempo_estimado": "30 minutos",
+                    "gabarito_incluido": True
+                }
             }
-        }
-        
-        s3.put_object(
-            Bucket=BUCKET,
-            Key=plano_key,
-            Body=json.dumps(plano_data, indent=2, ensure_ascii=False),
-            ContentType='application/json; charset=utf-8'
         )
-        
-        print(f"  ✅ Plano salvo: {plano_key}")
-        
-    except Exception as e:
-        print(f"  ❌ Erro no plano de aula: {str(e)}")
-    
-    # Teste 3: Cenário educacional - Atividade
-    print(f"\n📝 Teste 3: Cenário educacional - Atividade...")
+    ]
     
+    codec = ArtifactCodec(s3, BUCKET)
+    engine = GenerationEngine(bucket=BUCKET, bedrock=bedrock, s3=s3, codec=codec)
     try:
-        # Prompt para atividade
-        prompt_atividade = """
-        Crie uma atividade prática sobre frações para alunos do 5º ano.
-        Inclua: 5 exercícios de diferentes níveis de dificuldade,
-        gabarito detalhado e sugestões de adaptação.
-        """
-        
-        response = bedrock.invoke_model(
-            modelId='anthropic.claude-3-haiku-20240307-v1:0',
-            body=json.dumps({
-                "anthropic_version": "bedrock-2023-05-31",
-                "max_tokens": 600,
-                "messages": [{"role": "user", "content": prompt_atividade}]
-            })
-        )
-        
-        result = json.loads(response['body'].read())
-        atividade = result['content'][0]['text']
-        
-        print(f"  ✅ Atividade gerada ({len(atividade)} caracteres)")
-        
-        # Salvar no S3
-        atividade_key = f"bedrock/outputs/atividades/atividade-fracoes-{uuid.uuid4()}.json"
-        atividade_data = {
-            "id": str(uuid.uuid4()),
-            "timestamp": datetime.now().isoformat(),
-            "disciplina": "Matemática",
-            "ano": "5º ano",
-            "tema": "Frações",
-            "tipo": "atividade_pratica",
-            "prompt": prompt_atividade,
-            "model": "anthropic.claude-3-haiku-20240307-v1:0",
-            "conteudo": atividade,
-            "metadata": {
-                "exercicios": 5,
-                "dificuldade": "variada",
-                "tempo_estimado": "30 minutos",
-                "gabarito_incluido": True
-            }
-        }
-        
-        s3.put_object(
-            Bucket=BUCKET,
-            Key=atividade_key,
-            Body=json.dumps(atividade_data, indent=2, ensure_ascii=False),
-            ContentType='application/json; charset=utf-8'
-        )
-        
-        print(f"  ✅ Atividade salva: {atividade_key}")
-        
-    except Exception as e:
-        print(f"  ❌ Erro na atividade: {str(e)}")
+        plano, atividade = asyncio.run(engine.run_many(requests))
+    finally:
+        engine.close()
+    modelos = sorted({result.request.model_id for result in (plano, atividade) if result.ok})
+    
+    for nome, result in (("Plano de aula", plano), ("Atividade", atividade)):
+        if result.ok:
+            print(f"  ✅ {nome} gerado ({len(result.text)} caracteres, {result.latency:.1f}s)")
+            print(f"  ✅ {nome} salvo: {result.s3_key}")
+            print(f"  🧠 Cache de prompt: {result.usage.get('cache_read_input_tokens', 0)} tokens lidos, "
+                  f"{result.usage.get('cache_creation_input_tokens', 0)} gravados")
+        else:
+            print(f"  ❌ Erro em {nome.lower()}: {result.error}")
     
     # Teste 4: Listar arquivos criados
     print(f"\n📋 Teste 4: Listando arquivos criados...")
@@ -209,9 +151,7 @@ def test_final_system():
                 "Listagem de arquivos",
                 "Integração S3+Bedrock"
             ],
-            "modelos_testados": [
-                "anthropic.claude-3-haiku-20240307-v1:0"
-            ],
+            "modelos_testados": modelos,
             "operacoes_s3": [
                 "PutObject",
                 "GetObject",
@@ -228,14 +168,11 @@ def test_final_system():
         
         relatorio_key = f"bedrock/logs/relatorio-sistema-{datetime.now().strftime('%Y%m%d%H%M%S')}.json"
         
-        s3.put_object(
-            Bucket=BUCKET,
-            Key=relatorio_key,
-            Body=json.dumps(relatorio, indent=2, ensure_ascii=False),
-            ContentType='application/json; charset=utf-8'
-        )
+        codec.put(relatorio_key, relatorio)
         
         print(f"  ✅ Relatório salvo: {relatorio_key}")
+        print(f"  📦 Artefatos: {codec.stats['bytes_raw']} bytes em JSON compacto, "
+              f"{codec.stats['bytes_stored']} gravados ({codec.encoding})")
         
     except Exception as e:
         print(f"  ❌ Erro no relatório: {str(e)}")
@@ -252,7 +189,7 @@ def test_final_system():
     print(f"\n🚀 PRONTO PARA PRODUÇÃO!")
     print(f"📚 Sistema preparado para cenários educacionais")
     print(f"🔧 Configuração: {BUCKET} na região {REGIAO}")
-    print(f"🤖 Modelos disponíveis: Claude 3 Haiku (testado)")
+    print(f"🤖 Modelos testados: {', '.join(modelos) or 'nenhum'}")
     
     return True
 
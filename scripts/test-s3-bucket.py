@@ -1,9 +1,13 @@
 #!/usr/bin/env python3
-import boto3
 import os
+import sys
 import json
 import uuid
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from config.aws_clients import get_client  # noqa: E402
+
 # Carregar configs do ambiente
 AWS_KEY = os.getenv("AWS_ACCESS_KEY_ID")
 AWS_SECRET = os.getenv("AWS_SECRET_ACCESS_KEY")
@@ -17,12 +21,7 @@ def test_s3_bucket():
     print(f"🪣 Testando acesso ao bucket: {BUCKET}")
     
     # Cliente S3
-    s3 = boto3.client(
-        's3',
-        aws_access_key_id=AWS_KEY,
-        aws_secret_access_key=AWS_SECRET,
-        region_name=REGIAO
-    )
+    s3 = get_client('s3')
     
     try:
         # Testar se o bucket existe e é acessível
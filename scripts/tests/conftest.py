@@ -0,0 +1,9 @@
+"""Torna importáveis `config` (raiz do repositório) e `iaprender_ops` (scripts/)"""
+
+import os
+import sys
+
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in (os.path.dirname(SCRIPTS_DIR), SCRIPTS_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)
@@ -0,0 +1,84 @@
+"""Gravação dos registros de entrada e coleta das saídas do modo em lote"""
+
+import json
+
+import pytest
+
+from iaprender_ops.batch import INPUT_PREFIX, BatchJobApi, BatchRunner, LocalBatchJobApi
+from iaprender_ops.generation import GenerationRequest
+from iaprender_ops.stubs import MemoryS3
+
+BUCKET = 'bucket-teste'
+
+
+def _requests(count, **kwargs):
+    return {f"plano-{n:03d}": GenerationRequest(prompt=f"Plano de aula {n}", key=f"bedrock/outputs/plano-{n:03d}.json",
+                                                **kwargs)
+            for n in range(count)}
+
+
+@pytest.fixture
+def s3():
+    return MemoryS3()
+
+
+def _runner(s3, **kwargs):
+    return BatchRunner(BUCKET, api=LocalBatchJobApi(s3), s3=s3, poll_interval=0, **kwargs)
+
+
+def test_api_de_jobs_e_abstrata():
+    with pytest.raises(TypeError):
+        BatchJobApi()
+
+
+def test_write_inputs_grava_um_registro_por_linha(s3):
+    requests = _requests(3, max_tokens=300)
+    uri = _runner(s3, min_records=1).write_inputs('job-teste', requests)
+
+    assert uri == f"s3://{BUCKET}/{INPUT_PREFIX}job-teste.jsonl"
+    lines = s3.objects[BUCKET][f"{INPUT_PREFIX}job-teste.jsonl"]['Body'].decode('utf-8').splitlines()
+    records = [json.loads(line) for line in lines]
+    assert [record['recordId'] for record in records] == list(requests)
+    assert records[0]['modelInput']['max_tokens'] == 300
+    assert records[0]['modelInput']['messages'][0]['content'] == 'Plano de aula 0'
+
+
+def test_job_abaixo_do_minimo_levanta_erro_sem_gravar(s3):
+    with pytest.raises(ValueError, match='no mínimo'):
+        _runner(s3).submit('job-pequeno', _requests(5))
+    assert s3.calls.get('PutObject', 0) == 0
+
+
+def test_um_job_por_modelo(s3):
+    requests = {**_requests(2), 'outro': GenerationRequest(prompt='x', model_id='amazon.nova-lite-v1:0')}
+    jobs = _runner(s3, min_records=1).submit('job-modelos', requests)
+    assert sorted(job.model_id for job in jobs) == ['amazon.nova-lite-v1:0', 'anthropic.claude-3-haiku-20240307-v1:0']
+    assert len({job.name for job in jobs}) == 2
+
+
+def test_run_salva_um_artefato_por_registro(s3):
+    results = _runner(s3, min_records=1).run('job-completo', _requests(4))
+
+    assert all(result.ok for result in results.values())
+    for record_id, result in results.items():
+        artifact = json.loads(s3.objects[BUCKET][result.s3_key]['Body'])
+        assert artifact['prompt'] == result.request.prompt
+        assert result.text.startswith('[resposta local]')
+
+
+def test_falha_ao_gravar_um_registro_nao_interrompe_os_demais(s3):
+    put_object = s3.put_object
+
+    def put(**kwargs):
+        if kwargs['Key'] == 'bedrock/outputs/plano-001.json':
+            raise RuntimeError('SlowDown')
+        return put_object(**kwargs)
+
+    s3.put_object = put
+    results = _runner(s3, min_records=1).run('job-falha', _requests(3))
+
+    assert 'SlowDown' in results['plano-001'].error
+    assert results['plano-001'].s3_key is None
+    assert [results[key].s3_key for key in ('plano-000', 'plano-002')] == [
+        'bedrock/outputs/plano-000.json', 'bedrock/outputs/plano-002.json'
+    ]
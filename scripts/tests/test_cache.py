@@ -0,0 +1,77 @@
+"""Cache exato de gerações: níveis, TTL e acertos no motor"""
+
+import asyncio
+
+import pytest
+
+from iaprender_ops.cache import CacheTier, DiskTier, GenerationCache, MemoryTier, S3Tier, cache_key
+from iaprender_ops.generation import GenerationEngine, GenerationRequest
+from iaprender_ops.stubs import MemoryS3, StubBedrock
+
+
+def test_nivel_base_e_abstrato():
+    with pytest.raises(TypeError):
+        CacheTier()
+
+
+def test_chave_normaliza_espacos_e_ignora_parametros_nulos():
+    assert cache_key('m', 'Plano  de\naula', 800) == cache_key('m', 'Plano de aula', 800, {'temperature': None})
+    assert cache_key('m', 'Plano de aula', 800) != cache_key('m', 'Plano de aula', 600)
+
+
+def test_memoria_acerto_falha_e_ttl(monkeypatch):
+    tier = MemoryTier(ttl=10)
+    assert tier.get('k') is None
+    tier.set('k', {'text': 'a', 'created_at': 1000.0})
+    monkeypatch.setattr('iaprender_ops.cache.time.time', lambda: 1005.0)
+    assert tier.get('k')['text'] == 'a'
+    monkeypatch.setattr('iaprender_ops.cache.time.time', lambda: 1011.0)
+    assert tier.get('k') is None
+    assert tier.metrics()['hits'] == 1 and tier.metrics()['misses'] == 2
+
+
+def test_memoria_lru_descarta_a_mais_antiga():
+    tier = MemoryTier(max_entries=2, ttl=None)
+    tier.set('a', {})
+    tier.set('b', {})
+    tier.get('a')
+    tier.set('c', {})
+    assert tier.get('b') is None and tier.get('a') is not None
+    assert tier.evictions == 1
+
+
+def test_acerto_persistente_e_promovido_a_memoria(tmp_path):
+    GenerationCache(MemoryTier(), DiskTier(str(tmp_path))).set('k', {'text': 'salvo'})
+    cache = GenerationCache(MemoryTier(), DiskTier(str(tmp_path)))
+    assert cache.get('k')['text'] == 'salvo'
+    assert cache.get('k')['text'] == 'salvo'
+    assert cache.metrics()['disk']['hits'] == 1
+    assert cache.metrics()['memory']['hits'] == 1
+
+
+def test_s3_chave_inexistente_e_falha():
+    s3 = MemoryS3()
+    tier = S3Tier(s3, 'bucket')
+    assert tier.get('ausente') is None
+    tier.set('k', {'text': 'a'})
+    assert tier.get('k') == {'text': 'a'}
+    assert list(s3.objects['bucket']) == ['bedrock/cache/k.json']
+
+
+def test_motor_reutiliza_resposta_em_cache():
+    bedrock = StubBedrock(time_scale=0)
+    cache = GenerationCache(MemoryTier())
+    engine = GenerationEngine(bedrock=bedrock, cache=cache)
+    try:
+        first, = asyncio.run(engine.run_many([GenerationRequest(prompt='Plano de aula sobre frações')]))
+        second, = asyncio.run(engine.run_many([GenerationRequest(prompt='Plano de aula  sobre frações')]))
+        bypassed, = asyncio.run(engine.run_many([GenerationRequest(prompt='Plano de aula sobre frações',
+                                                                   bypass_cache=True)]))
+    finally:
+        engine.close()
+
+    assert not first.cached and second.cached and not bypassed.cached
+    assert second.text == first.text
+    assert engine.stats['cache_hits'] == 1
+    assert engine.stats['completed'] == 2
+    assert cache.bypassed == 1
@@ -0,0 +1,78 @@
+"""Conversão de valores tipados e recarga do ConfigSnapshot"""
+
+import pytest
+
+import config.secrets as secrets
+from config.secret_backends import BackendChain, StaticBackend
+from config.secrets import SecretsManager, build_snapshot, parse_duration
+
+
+@pytest.mark.parametrize('value, seconds', [
+    ('24h', 86400),
+    ('30m', 1800),
+    ('7 days', 604800),
+    ('1w', 604800),
+    ('1.5h', 5400),
+    ('500ms', 0),
+    ('120000', 120),
+])
+def test_parse_duration(value, seconds):
+    assert parse_duration(value) == seconds
+
+
+@pytest.mark.parametrize('value', ['', 'amanhã', '10 parsecs', None])
+def test_parse_duration_invalida(value):
+    with pytest.raises(ValueError):
+        parse_duration(value)
+
+
+def test_snapshot_converte_valores_tipados():
+    snapshot = build_snapshot({'PGPORT': '6543', 'JWT_EXPIRATION': '2h', 'DEBUG': 'TRUE'})
+    assert snapshot.database.pgport == 6543
+    assert snapshot.jwt.jwt_expiration == 7200
+    assert snapshot.application.debug_mode is True
+    assert snapshot.legacy['database']['pgport'] == '6543'
+    assert not snapshot.invalid
+
+
+def test_snapshot_valor_invalido_usa_padrao():
+    snapshot = build_snapshot({'PGPORT': 'abc', 'SMTP_PORT': '70000'})
+    assert snapshot.database.pgport == 5432
+    assert snapshot.email.smtp_port == 587
+    assert set(snapshot.invalid) == {'PGPORT', 'SMTP_PORT'}
+    # Os dicts legados mantêm o texto original
+    assert snapshot.legacy['database']['pgport'] == 'abc'
+
+
+def test_snapshot_strict_levanta_erro():
+    with pytest.raises(ValueError, match='PGPORT'):
+        build_snapshot({'PGPORT': 'abc'}, strict=True)
+
+
+@pytest.fixture
+def isolated_secrets(monkeypatch):
+    """Estado global do SecretsManager restaurado ao fim do teste"""
+    monkeypatch.setattr(secrets, '_snapshot', None)
+    monkeypatch.setattr(secrets, '_chain', None)
+    monkeypatch.setattr(secrets, '_source', lambda: {})
+
+
+def test_reload_troca_o_snapshot(isolated_secrets, monkeypatch):
+    env = {'PGPORT': '5433'}
+    monkeypatch.setattr(secrets, '_source', lambda: env)
+    before = SecretsManager.snapshot()
+    env['PGPORT'] = '5434'
+    assert SecretsManager.snapshot() is before
+    after = SecretsManager.reload()
+    assert after is not before
+    assert SecretsManager.snapshot().database.pgport == 5434
+
+
+def test_reload_com_backends(isolated_secrets):
+    backend = StaticBackend({'S3_BUCKET_NAME': 'bucket-a'})
+    chain = BackendChain([backend], ttl=3600)
+    assert SecretsManager.use_backends(chain, background=False).aws.s3_bucket == 'bucket-a'
+
+    backend.values['S3_BUCKET_NAME'] = 'bucket-b'
+    assert SecretsManager.reload(refresh=False).aws.s3_bucket == 'bucket-a'
+    assert SecretsManager.reload().aws.s3_bucket == 'bucket-b'
@@ -0,0 +1,67 @@
+"""Motor de geração: coalescência de pedidos e persistência em segmentos"""
+
+import asyncio
+
+import pytest
+
+from iaprender_ops.generation import GenerationEngine, GenerationRequest
+from iaprender_ops.segments import SegmentWriter
+from iaprender_ops.stubs import MemoryS3, StubBedrock
+
+BUCKET = 'bucket-teste'
+
+
+def _run(engine, requests):
+    try:
+        return asyncio.run(engine.run_many(requests))
+    finally:
+        engine.close()
+
+
+@pytest.mark.parametrize('segmented', [False, True])
+def test_seguidores_recebem_a_chave_do_artefato_do_lider(segmented):
+    s3 = MemoryS3()
+    engine = GenerationEngine(bucket=BUCKET, s3=s3, bedrock=StubBedrock(time_scale=0.01),
+                              segments=SegmentWriter(s3, BUCKET) if segmented else None)
+    results = _run(engine, [GenerationRequest(prompt='Atividade de frações', key=f"out/{n}.json") for n in range(3)])
+
+    assert [result.coalesced for result in results] == [False, True, True]
+    assert [result.s3_key for result in results] == ['out/0.json'] * 3
+    assert all(result.ok for result in results)
+    assert engine.stats['persisted'] == 1
+
+
+class FlakyS3(MemoryS3):
+    """MemoryS3 cujos primeiros `failures` PutObject falham"""
+
+    def __init__(self, failures):
+        super().__init__()
+        self.failures = failures
+
+    def put_object(self, **kwargs):
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError('SlowDown')
+        return super().put_object(**kwargs)
+
+
+def test_falha_de_segmento_no_append_nao_falha_o_pedido():
+    s3 = FlakyS3(failures=1)
+    writer = SegmentWriter(s3, BUCKET, max_bytes=1)
+    engine = GenerationEngine(bucket=BUCKET, s3=s3, bedrock=StubBedrock(time_scale=0), segments=writer)
+    result, = _run(engine, [GenerationRequest(prompt='Plano de aula', key='out/plano.json')])
+
+    assert result.ok and result.s3_key == 'out/plano.json'
+    assert writer.stats['flush_errors'] == 1
+    assert writer.index['out/plano.json'].segment in s3.objects[BUCKET]
+
+
+def test_erro_do_flush_final_e_limpo_quando_a_linha_e_gravada():
+    s3 = FlakyS3(failures=1)
+    engine = GenerationEngine(bucket=BUCKET, s3=s3, bedrock=StubBedrock(time_scale=0),
+                              segments=SegmentWriter(s3, BUCKET))
+    result, = asyncio.run(engine.run_many([GenerationRequest(prompt='Plano de aula', key='out/plano.json')]))
+    assert not result.ok and result.s3_key is None
+
+    engine.close()
+    assert result.ok and result.s3_key == 'out/plano.json'
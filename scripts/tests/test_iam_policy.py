@@ -0,0 +1,74 @@
+"""Avaliação local de políticas IAM"""
+
+import json
+import os
+import re
+
+import pytest
+
+from iaprender_ops.iam_policy import (
+    ALLOWED, EXPLICIT_DENY, IMPLICIT_DENY, PolicyEvaluator, compare_simulation, load_fixture
+)
+
+FIXTURE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'iaprender_ops', 'fixtures',
+                       'simulate-principal-policy.json')
+ANONYMOUS_ACCOUNT = '111122223333'
+
+BUCKET_ARN = 'arn:aws:s3:::iaprender-bucket'
+
+POLICY = {
+    'Version': '2012-10-17',
+    'Statement': [
+        {'Sid': 'Objetos', 'Effect': 'Allow', 'Action': ['s3:GetObject', 's3:PutObject'],
+         'Resource': f"{BUCKET_ARN}/bedrock/*"},
+        {'Sid': 'Listagem', 'Effect': 'Allow', 'Action': 's3:ListBucket', 'Resource': BUCKET_ARN,
+         'Condition': {'StringLike': {'s3:prefix': ['bedrock/*']}}},
+        {'Sid': 'Pessoal', 'Effect': 'Allow', 'Action': 's3:*',
+         'Resource': f"{BUCKET_ARN}/home/${{aws:username}}/*"},
+        {'Sid': 'Modelos', 'Effect': 'Allow', 'Action': 'bedrock:InvokeModel*', 'Resource': '*'},
+        {'Sid': 'SemApagarLogs', 'Effect': 'Deny', 'Action': 's3:DeleteObject',
+         'Resource': f"{BUCKET_ARN}/bedrock/logs/*"},
+        {'Sid': 'Apagar', 'Effect': 'Allow', 'Action': 's3:DeleteObject', 'Resource': f"{BUCKET_ARN}/*"}
+    ]
+}
+
+
+@pytest.fixture(scope='module')
+def evaluator():
+    return PolicyEvaluator([('inline:teste', POLICY)])
+
+
+@pytest.mark.parametrize('action, resource, context, expected', [
+    ('s3:GetObject', f"{BUCKET_ARN}/bedrock/outputs/plano.json", None, ALLOWED),
+    ('S3:putobject', f"{BUCKET_ARN}/bedrock/inputs/job.jsonl", None, ALLOWED),
+    ('s3:GetObject', f"{BUCKET_ARN}/documentos/a.pdf", None, IMPLICIT_DENY),
+    ('s3:ListBucket', BUCKET_ARN, {'s3:prefix': 'bedrock/outputs/'}, ALLOWED),
+    ('s3:ListBucket', BUCKET_ARN, {'s3:prefix': 'documentos/'}, IMPLICIT_DENY),
+    ('s3:ListBucket', BUCKET_ARN, None, IMPLICIT_DENY),
+    ('s3:GetObject', f"{BUCKET_ARN}/home/ana/notas.txt", {'aws:username': 'ana'}, ALLOWED),
+    ('s3:GetObject', f"{BUCKET_ARN}/home/ana/notas.txt", {'aws:username': 'bia'}, IMPLICIT_DENY),
+    ('bedrock:InvokeModelWithResponseStream', '*', None, ALLOWED),
+    ('s3:DeleteObject', f"{BUCKET_ARN}/temp/x", None, ALLOWED),
+    ('s3:DeleteObject', f"{BUCKET_ARN}/bedrock/logs/usage.jsonl", None, EXPLICIT_DENY),
+])
+def test_decisoes(evaluator, action, resource, context, expected):
+    assert evaluator.evaluate(action, resource, context).decision == expected
+
+
+def test_deny_vence_e_informa_statement(evaluator):
+    decision = evaluator.evaluate('s3:DeleteObject', f"{BUCKET_ARN}/bedrock/logs/x")
+    assert not decision.allowed
+    assert any('SemApagarLogs' in matched for matched in decision.matched)
+
+
+def test_fixture_do_simulador_sem_divergencias():
+    evaluator, cases = load_fixture(FIXTURE)
+    assert sum(len(case['EvaluationResults']) for case in cases) > 0
+    assert compare_simulation(evaluator, cases) == []
+
+
+def test_fixture_so_tem_conta_anonimizada():
+    with open(FIXTURE, 'r', encoding='utf-8') as f:
+        text = f.read()
+    assert json.loads(text)['origin'] in ('manual', 'simulate_principal_policy')
+    assert set(re.findall(r'arn:aws:[a-z0-9-]+:[a-z0-9-]*:(\d{12}):', text)) <= {ANONYMOUS_ACCOUNT}
@@ -0,0 +1,58 @@
+"""Manifesto local: artefatos avulsos e gravados em segmentos"""
+
+import json
+
+import pytest
+
+from iaprender_ops.manifest import ManifestIndex
+from iaprender_ops.segments import SegmentWriter
+from iaprender_ops.stubs import MemoryS3
+
+BUCKET = 'bucket-teste'
+
+
+def _artifact(disciplina, ano, tipo):
+    return {'disciplina': disciplina, 'ano': ano, 'tema': 'frações', 'metadata': {'tipo': tipo}}
+
+
+@pytest.fixture
+def s3():
+    s3 = MemoryS3()
+    s3.put_object(Bucket=BUCKET, Key='bedrock/outputs/planos-aula/plano-1.json',
+                  Body=json.dumps(_artifact('Matemática', '5º ano', 'plano_aula')))
+    writer = SegmentWriter(s3, BUCKET)
+    writer.append('bedrock/outputs/atividades/atividade-1.json', _artifact('Matemática', '5º ano', 'atividade_pratica'))
+    writer.append('bedrock/outputs/atividades/atividade-2.json', _artifact('Ciências', '6º ano', 'atividade_pratica'))
+    writer.flush()
+    return s3
+
+
+def test_indexa_artefatos_de_segmentos(s3, tmp_path):
+    index = ManifestIndex(s3, BUCKET, str(tmp_path / 'manifest.sqlite'))
+    summary = index.sync()
+
+    assert summary['segments'] == 1 and summary['segments_fetched'] == 1
+    assert index.count() == 3
+    rows = index.query(disciplina='matematica', ano='5o ano', tipo='atividade')
+    assert [row['key'] for row in rows] == ['bedrock/outputs/atividades/atividade-1.json']
+
+
+def test_segmento_ja_indexado_nao_e_relido(s3, tmp_path):
+    index = ManifestIndex(s3, BUCKET, str(tmp_path / 'manifest.sqlite'))
+    index.sync()
+    gets = s3.calls['GetObject']
+
+    summary = index.sync()
+    assert summary['segments_fetched'] == 0 and summary['removed'] == 0
+    assert s3.calls['GetObject'] == gets
+    assert index.count() == 3
+
+
+def test_segmento_removido_sai_do_indice(s3, tmp_path):
+    index = ManifestIndex(s3, BUCKET, str(tmp_path / 'manifest.sqlite'))
+    index.sync()
+    for key in [key for key in s3.objects[BUCKET] if key.startswith('bedrock/segments/')]:
+        del s3.objects[BUCKET][key]
+
+    assert index.sync()['segments_removed'] == 1
+    assert [row['key'] for row in index.query()] == ['bedrock/outputs/planos-aula/plano-1.json']
@@ -0,0 +1,101 @@
+"""Cadeia de backends de segredos (precedência, falhas e Secrets Manager em lote)"""
+
+import json
+
+import pytest
+
+from config.secret_backends import (
+    AwsSecretsManagerBackend, BackendChain, DotEnvBackend, SecretBackend, StaticBackend
+)
+
+
+class FailingBackend(SecretBackend):
+    name = 'failing'
+
+    def __init__(self):
+        self.fail = False
+
+    def fetch(self):
+        if self.fail:
+            raise RuntimeError('indisponível')
+        return {'JWT_SECRET': 'antigo'}
+
+
+class FakeSecretsManager:
+    """batch_get_secret_value com segredos conhecidos; os demais vão para Errors"""
+
+    def __init__(self, secrets):
+        self.secrets = secrets
+        self.calls = []
+
+    def batch_get_secret_value(self, SecretIdList, NextToken=None):
+        self.calls.append(list(SecretIdList))
+        return {
+            'SecretValues': [{'Name': name, 'SecretString': self.secrets[name]}
+                             for name in SecretIdList if name in self.secrets],
+            'Errors': [{'SecretId': name, 'ErrorCode': 'ResourceNotFoundException'}
+                       for name in SecretIdList if name not in self.secrets]
+        }
+
+
+def test_backend_base_e_abstrato():
+    with pytest.raises(TypeError):
+        SecretBackend()
+
+
+def test_primeiro_backend_tem_precedencia():
+    chain = BackendChain([StaticBackend({'PGPORT': '1'}), StaticBackend({'PGPORT': '2', 'PGHOST': 'db'})])
+    assert dict(chain.values()) == {'PGPORT': '1', 'PGHOST': 'db'}
+
+
+def test_falha_mantem_ultimos_valores():
+    backend = FailingBackend()
+    chain = BackendChain([backend])
+    chain.refresh()
+    backend.fail = True
+    assert chain.refresh()['JWT_SECRET'] == 'antigo'
+    assert chain.errors == {'failing': 'indisponível'}
+
+
+def test_ouvintes_so_recebem_mudancas():
+    backend = StaticBackend({'PORT': '5000'})
+    chain = BackendChain([backend])
+    received = []
+    chain.subscribe(received.append)
+    chain.refresh()
+    chain.refresh()
+    backend.values['PORT'] = '5001'
+    chain.refresh()
+    assert [dict(values) for values in received] == [{'PORT': '5001'}]
+
+
+def test_secrets_manager_expande_json_e_texto():
+    client = FakeSecretsManager({
+        'app/db': json.dumps({'PGHOST': 'db', 'PGPORT': 5433}),
+        'app/JWT_SECRET': 's3cr3t'
+    })
+    values = AwsSecretsManagerBackend(['app/db', 'app/JWT_SECRET'], client=client).fetch()
+    assert values == {'PGHOST': 'db', 'PGPORT': '5433', 'JWT_SECRET': 's3cr3t'}
+
+
+def test_secrets_manager_em_lotes():
+    ids = [f"app/s{n}" for n in range(45)]
+    client = FakeSecretsManager({name: 'x' for name in ids})
+    AwsSecretsManagerBackend(ids, client=client).fetch()
+    assert [len(batch) for batch in client.calls] == [20, 20, 5]
+
+
+def test_secrets_manager_falha_parcial_mantem_sucessos():
+    client = FakeSecretsManager({'app/db': json.dumps({'PGPORT': '5433'})})
+    backend = AwsSecretsManagerBackend(['app/db', 'app/jwt'], client=client)
+    chain = BackendChain([backend])
+    assert dict(chain.refresh()) == {'PGPORT': '5433'}
+    assert backend.failed == {'app/jwt': 'ResourceNotFoundException'}
+    assert 'app/jwt' in chain.errors['secretsmanager']
+
+
+def test_dotenv_ausente_nao_e_erro(tmp_path):
+    assert DotEnvBackend(str(tmp_path / '.env')).fetch() == {}
+    path = tmp_path / '.env'
+    path.write_text('PGHOST=localhost\nSMTP_PORT=2525\n', encoding='utf-8')
+    assert DotEnvBackend(str(path)).fetch() == {'PGHOST': 'localhost', 'SMTP_PORT': '2525'}